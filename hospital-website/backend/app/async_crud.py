@@ -0,0 +1,328 @@
+"""Async versions of the ``crud`` functions used by the request handlers.
+
+They take an ``AsyncSession`` (see ``database.get_async_db``) and behave
+like their namesakes in ``crud``, which stays in place for scripts, tests
+and the sync routes. Helpers built on the ORM ``Query`` API (dashboard
+counters) run through ``AsyncSession.run_sync``, which still does its I/O
+on the async driver.
+
+Writes cost one round trip each. Inserts go through the unit of work,
+whose INSERT already RETURNs the generated columns, and updates of a
+single row are ``UPDATE ... RETURNING``; async sessions do not expire on
+commit, so nothing is reloaded afterwards. Updates that bypass the unit of
+work tell the availability index themselves (``record_on_commit``).
+"""
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
+from typing import Optional
+import secrets
+
+from . import availability, crud, models, schemas, principal_cache, response_cache
+from .pagination import keyset_page_async
+
+async def _update_returning(db: AsyncSession, model, row_id: int, values: dict):
+    """UPDATE one row by id and return it as RETURNING loaded it, or None if there is no such row"""
+    if not values:
+        return await db.get(model, row_id)
+    return await db.scalar(
+        update(model)
+        .where(model.id == row_id)
+        .values(**values)
+        .returning(model)
+        .execution_options(populate_existing=True)
+    )
+
+# Users and admins
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.User).where(models.User.email == email).limit(1))
+
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(models.User, user_id)
+
+async def get_users(db: AsyncSession):
+    return (await db.scalars(select(models.User))).all()
+
+async def get_admin_by_id(db: AsyncSession, admin_id: int):
+    return await db.get(models.Admin, admin_id)
+
+async def get_admin_by_username(db: AsyncSession, username: str):
+    return await db.scalar(select(models.Admin).where(models.Admin.username == username).limit(1))
+
+async def get_admin_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(models.Admin).where(models.Admin.email == email).limit(1))
+
+async def get_admins(db: AsyncSession):
+    return (await db.scalars(select(models.Admin))).all()
+
+async def update_user(db: AsyncSession, user_id: int, update_data: dict):
+    """Update a user's columns; returns the updated user, or None if there is none"""
+    try:
+        db_user = await _update_returning(db, models.User, user_id, update_data)
+        if db_user:
+            await db.commit()
+            principal_cache.invalidate_user(user_id)
+        return db_user
+    except Exception as e:
+        print(f"Error in update_user: {str(e)}")
+        await db.rollback()
+        raise e
+
+async def update_admin(db: AsyncSession, admin_id: int, update_data: dict):
+    try:
+        db_admin = await _update_returning(db, models.Admin, admin_id, update_data)
+        if db_admin:
+            await db.commit()
+            principal_cache.invalidate_admin(admin_id)
+        return db_admin
+    except Exception as e:
+        print(f"Error in update_admin: {str(e)}")
+        await db.rollback()
+        raise e
+
+# Refresh tokens
+
+USER_REFRESH_TOKEN_LIFETIME = timedelta(days=30)
+ADMIN_REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+
+async def create_refresh_token(db: AsyncSession, user_id: int) -> models.RefreshToken:
+    db_token = models.RefreshToken(
+        token=secrets.token_urlsafe(32),
+        user_id=user_id,
+        expires_at=datetime.utcnow() + USER_REFRESH_TOKEN_LIFETIME
+    )
+    db.add(db_token)
+    await db.commit()
+    return db_token
+
+async def create_admin_refresh_token(db: AsyncSession, admin_id: int, token: str, expires_delta: timedelta = None):
+    """Create a new admin refresh token"""
+    if expires_delta is None:
+        expires_delta = ADMIN_REFRESH_TOKEN_LIFETIME
+
+    db_token = models.RefreshToken(
+        token=token,
+        admin_id=admin_id,
+        expires_at=datetime.utcnow() + expires_delta
+    )
+    db.add(db_token)
+    await db.commit()
+    return db_token
+
+async def get_refresh_token(db: AsyncSession, token: str):
+    """Get refresh token from database"""
+    return await db.scalar(
+        select(models.RefreshToken).where(models.RefreshToken.token == token).limit(1)
+    )
+
+_refresh_tokens = models.RefreshToken.__table__
+_token_owner_email = (
+    select(models.User.email)
+    .where(models.User.id == _refresh_tokens.c.user_id)
+    .correlate(_refresh_tokens)
+    .scalar_subquery()
+)
+
+async def rotate_refresh_token(db: AsyncSession, token: str):
+    """Revoke a live refresh token and issue its successor, in one transaction
+
+    The revoking UPDATE is also the validity check (exists, not revoked,
+    not expired), so of several concurrent rotations of one token only one
+    succeeds. It returns the owner, including a user's email for the
+    access token, so the whole rotation is that UPDATE plus one INSERT.
+
+    Returns (owner row with user_id, admin_id and email, new token), or
+    None if the token cannot be rotated.
+    """
+    now = datetime.utcnow()
+    owner = (await db.execute(
+        update(_refresh_tokens)
+        .where(
+            _refresh_tokens.c.token == token,
+            _refresh_tokens.c.is_revoked.isnot(True),
+            _refresh_tokens.c.expires_at > now
+        )
+        .values(is_revoked=True, revoked_at=now)
+        .returning(_refresh_tokens.c.user_id, _refresh_tokens.c.admin_id, _token_owner_email.label("email"))
+    )).one_or_none()
+    if owner is None or (owner.user_id is None and owner.admin_id is None) or (owner.user_id and owner.email is None):
+        await db.rollback()
+        return None
+
+    new_token = secrets.token_urlsafe(32)
+    lifetime = USER_REFRESH_TOKEN_LIFETIME if owner.user_id else ADMIN_REFRESH_TOKEN_LIFETIME
+    await db.execute(insert(_refresh_tokens).values(
+        token=new_token, user_id=owner.user_id, admin_id=owner.admin_id,
+        expires_at=now + lifetime, created_at=now, is_revoked=False
+    ))
+    await db.commit()
+    return owner, new_token
+
+async def revoke_refresh_token(db: AsyncSession, token: str):
+    """Revoke a refresh token"""
+    db_token = await db.scalar(
+        update(models.RefreshToken)
+        .where(models.RefreshToken.token == token)
+        .values(is_revoked=True, revoked_at=datetime.utcnow())
+        .returning(models.RefreshToken)
+        .execution_options(populate_existing=True)
+    )
+    if db_token:
+        await db.commit()
+    return db_token
+
+# Appointments
+
+async def create_appointment(db: AsyncSession, appointment: dict):
+    """Create a new appointment"""
+    if appointment.get("doctor_id") is not None:
+        await availability.ready()
+        availability.claim_changes(db, None, appointment)
+        try:
+            await availability.confirm(db)
+        except HTTPException:
+            await db.rollback()
+            raise
+    db_appointment = models.Appointment(**appointment)
+    db.add(db_appointment)
+    await db.commit()
+    return db_appointment
+
+async def get_appointment(db: AsyncSession, appointment_id: int):
+    return await db.get(models.Appointment, appointment_id)
+
+async def get_appointments_page(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    """Page of appointments ordered by date; returns (appointments, next_cursor)"""
+    statement = select(models.Appointment)
+    if status:
+        statement = statement.where(models.Appointment.status == status)
+    return await keyset_page_async(
+        db,
+        statement,
+        models.Appointment.date,
+        models.Appointment.id,
+        limit,
+        cursor=cursor,
+        skip=skip
+    )
+
+async def get_user_appointments(db: AsyncSession, user_id: int):
+    """Get all appointments for a specific user"""
+    return (await db.scalars(
+        select(models.Appointment).where(models.Appointment.user_id == user_id)
+    )).all()
+
+async def _write_appointment(db: AsyncSession, appointment_id: int, changes: dict):
+    """UPDATE ... RETURNING an appointment, claim the slot it now books and commit
+
+    The claim is checked, and confirmed against the database, after the
+    UPDATE (the row stays locked until the commit); a conflict rolls the
+    UPDATE back and raises 409.
+    """
+    books = bool(changes.keys() & {"doctor_id", "date", "status"})
+    if books and changes.get("status") not in availability.RELEASED_STATUSES:
+        await availability.ready()
+    db_appointment = await _update_returning(db, models.Appointment, appointment_id, changes)
+    if not db_appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+
+    if books:
+        try:
+            availability.claim_changes(db, db_appointment, changes)
+            await availability.confirm(db)
+        except HTTPException:
+            await db.rollback()
+            raise
+        availability.record_on_commit(
+            db, db_appointment.id, db_appointment.doctor_id, db_appointment.date, db_appointment.status
+        )
+    await db.commit()
+    return db_appointment
+
+async def update_appointment(db: AsyncSession, appointment_id: int, appointment: schemas.AppointmentUpdate):
+    """Update an appointment"""
+    return await _write_appointment(db, appointment_id, appointment.model_dump(exclude_unset=True))
+
+async def delete_appointment(db: AsyncSession, appointment_id: int):
+    """Soft delete appointment by marking it as cancelled"""
+    return await _write_appointment(db, appointment_id, {"status": "cancelled"})
+
+async def assign_doctor_to_appointment(db: AsyncSession, appointment_id: int, doctor_id: int):
+    return await _write_appointment(db, appointment_id, {"doctor_id": doctor_id, "status": "assigned"})
+
+# News articles (admin side)
+
+async def get_news_articles_count(db: AsyncSession):
+    return await db.scalar(select(func.count()).select_from(models.NewsArticle))
+
+async def get_news_articles_page(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    """Newest-first page of all articles; returns (articles, next_cursor)"""
+    try:
+        return await keyset_page_async(
+            db,
+            select(models.NewsArticle),
+            models.NewsArticle.date,
+            models.NewsArticle.id,
+            limit,
+            cursor=cursor,
+            skip=skip,
+            descending=True
+        )
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+
+async def get_news_article(db: AsyncSession, article_id: int):
+    """Admin lookup of an article, drafts included (views are not counted)"""
+    return await db.get(models.NewsArticle, article_id)
+
+async def create_news_article(db: AsyncSession, article: schemas.NewsArticleCreate, admin_id: int):
+    try:
+        valid_fields = {key: value for key, value in article.dict().items() if key in models.NewsArticle.__table__.columns}
+
+        # Set the date to the current datetime if not provided
+        if 'date' not in valid_fields or valid_fields['date'] is None:
+            valid_fields['date'] = datetime.utcnow()
+
+        db_article = models.NewsArticle(**valid_fields, admin_id=admin_id)
+        db.add(db_article)
+        await db.commit()
+        response_cache.invalidate_tags("news:list")
+        return db_article
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create article: {str(e)}"
+        )
+
+async def delete_news_article(db: AsyncSession, article_id: int):
+    db_article = await get_news_article(db, article_id)
+    if not db_article:
+        raise HTTPException(status_code=404, detail="Article not found")
+
+    await db.delete(db_article)
+    await db.commit()
+    response_cache.invalidate_tags("news:list", f"news:{article_id}")
+    return True
+
+async def get_news_categories(db: AsyncSession):
+    return (await db.scalars(select(models.NewsArticle.category).distinct())).all()
+
+async def get_admin_statistics(db: AsyncSession):
+    """Dashboard totals (see crud.get_admin_statistics)"""
+    return await db.run_sync(crud.get_admin_statistics)
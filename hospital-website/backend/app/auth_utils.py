@@ -1,19 +1,20 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from typing import Optional
 import os
-import bcrypt
+import secrets
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-from .database import get_db
-from . import crud
+from .database import get_async_db
+from . import async_crud, principal_cache, server_timing, token_denylist
 from .models import Admin
+from .password_utils import get_password_hash, verify_password
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -26,68 +27,96 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
-
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'),
-        hashed_password.encode('utf-8')
-    )
+# For endpoints that work without a token but use one if sent (logout)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login", auto_error=False)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a new JWT access token"""
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation (see app.token_denylist)
+    to_encode.update({"exp": expire, "jti": secrets.token_urlsafe(12)})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+async def revoke_access_token(db: AsyncSession, token: str) -> bool:
+    """Deny a still-valid access token for the rest of its lifetime; returns whether it was revoked"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        # Invalid or already expired: nothing to revoke
+        return False
+    if not payload.get("jti"):
+        return False
+    await token_denylist.revoke(db, payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+    return True
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user from JWT token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    with server_timing.timer("auth"):
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        await token_denylist.ready()
+        cached = principal_cache.lookup_with_claims("user", token)
+        if cached is not None:
+            claims, principal = cached
+            if token_denylist.is_revoked(claims.get("jti")):
+                raise credentials_exception
+            return principal
+
+        generation = principal_cache.generation()
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = crud.get_user_by_email(db, email=email)
-    if user is None:
-        raise credentials_exception
-    return user
+        if token_denylist.is_revoked(payload.get("jti")):
+            raise credentials_exception
+
+        user = await async_crud.get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        return principal_cache.store("user", token, payload, user, generation)
 
 async def get_current_admin(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Admin:
     """Get current admin from JWT token"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        admin_id: str = payload.get("sub")
-        if admin_id is None:
+    with server_timing.timer("auth"):
+        credentials_exception = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        await token_denylist.ready()
+        cached = principal_cache.lookup_with_claims("admin", token)
+        if cached is not None:
+            claims, principal = cached
+            if token_denylist.is_revoked(claims.get("jti")):
+                raise credentials_exception
+            return principal
+
+        generation = principal_cache.generation()
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            admin_id: str = payload.get("sub")
+            if admin_id is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    admin = crud.get_admin_by_id(db, int(admin_id))
-    if admin is None:
-        raise credentials_exception
-    return admin
+        if token_denylist.is_revoked(payload.get("jti")):
+            raise credentials_exception
+
+        admin = await async_crud.get_admin_by_id(db, int(admin_id))
+        if admin is None:
+            raise credentials_exception
+        return principal_cache.store("admin", token, payload, admin, generation)
@@ -0,0 +1,210 @@
+"""Batch assignment of pending appointments to doctors.
+
+``plan`` walks the pending appointments of a window in date order and
+gives each one to the least-loaded doctor of its specialty who is free at
+that time, or else to the least-loaded free general practitioner. Each
+specialty has a min-heap of (load, doctor id), seeded with the doctors'
+current bookings in the window: the top of the heap is tried first and,
+once chosen, pushed back with its load + 1, so the work spreads evenly.
+"Free" comes from app.availability (working hours, booked and claimed
+slots) plus the slots this plan has already handed out.
+
+Appointments carry no specialty, so it is inferred from the reason by
+keyword (``REASON_SPECIALTIES``), falling back to ``DEFAULT_SPECIALTY``,
+unless the caller asks for one specialty for the whole batch.
+
+``apply`` claims every planned slot, confirms the claims against the
+database (dropping slots another worker booked) and writes all
+assignments with a single ``UPDATE ... FROM (VALUES ...)``, guarded on
+``status = 'pending'`` so rows changed meanwhile are left alone.
+"""
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import availability, models
+
+DEFAULT_WINDOW_DAYS = 14
+DEFAULT_SPECIALTY = "General"
+# (keyword in the lower-cased reason, specialty); first match wins
+REASON_SPECIALTIES = [
+    ("chest", "Cardiology"), ("heart", "Cardiology"), ("palpitation", "Cardiology"),
+    ("skin", "Dermatology"), ("rash", "Dermatology"), ("acne", "Dermatology"),
+    ("headache", "Neurology"), ("migraine", "Neurology"), ("dizz", "Neurology"),
+    ("back pain", "Orthopedics"), ("joint", "Orthopedics"), ("fracture", "Orthopedics"),
+    ("eye", "Ophthalmology"), ("vision", "Ophthalmology"),
+    ("stomach", "Gastroenterology"), ("abdominal", "Gastroenterology"),
+    ("anxiety", "Psychiatry"), ("depress", "Psychiatry"),
+    ("child", "Pediatrics"), ("x-ray", "Radiology"), ("urinary", "Urology"),
+]
+
+class Assignment(NamedTuple):
+    appointment_id: int
+    doctor_id: int
+    doctor_name: str
+    specialty: str
+    date: datetime
+
+class Skipped(NamedTuple):
+    appointment_id: int
+    reason: str
+
+def specialty_for(reason: Optional[str]) -> str:
+    text = (reason or "").lower()
+    for keyword, specialty in REASON_SPECIALTIES:
+        if keyword in text:
+            return specialty
+    return DEFAULT_SPECIALTY
+
+def plan(appointments: List[Tuple[int, datetime, Optional[str]]], loads: Dict[int, int],
+         specialty: Optional[str] = None) -> Tuple[List[Assignment], List[Skipped]]:
+    """Greedy least-loaded assignment of (id, date, reason) appointments
+
+    ``loads`` holds each doctor's current number of bookings. The index
+    must be loaded.
+    """
+    heaps: Dict[str, list] = {}
+    names: Dict[int, str] = {}
+    planned = set()
+    assignments, skipped = [], []
+
+    def heap_for(wanted: str):
+        if wanted.casefold() not in heaps:
+            doctors = availability.doctors_for(wanted)
+            names.update(doctors)
+            heap = [(loads.get(doctor_id, 0), doctor_id) for doctor_id in doctors]
+            heapq.heapify(heap)
+            heaps[wanted.casefold()] = heap
+        return heaps[wanted.casefold()]
+
+    def least_loaded_free(heap, day, slot, when):
+        busy = []
+        chosen = None
+        while heap:
+            load, doctor_id = heapq.heappop(heap)
+            if (doctor_id, day, slot) not in planned and availability.is_free(doctor_id, when):
+                chosen = doctor_id
+                heapq.heappush(heap, (load + 1, doctor_id))
+                break
+            busy.append((load, doctor_id))
+        for entry in busy:
+            heapq.heappush(heap, entry)
+        return chosen
+
+    for appointment_id, when, reason in sorted(appointments, key=lambda row: (row[1], row[0])):
+        wanted = specialty or specialty_for(reason)
+        # Without a requested specialty, general practitioners take the overflow
+        candidates = [wanted] if specialty or wanted == DEFAULT_SPECIALTY else [wanted, DEFAULT_SPECIALTY]
+        day, slot = availability.slot_of(when)
+        chosen = None
+        for candidate in candidates:
+            chosen = least_loaded_free(heap_for(candidate), day, slot, when)
+            if chosen is not None:
+                break
+        if chosen is None:
+            if not any(heap_for(candidate) for candidate in candidates):
+                skipped.append(Skipped(appointment_id, f"No {' or '.join(candidates)} doctors"))
+            else:
+                skipped.append(Skipped(appointment_id, f"No {wanted} doctor free at {when:%Y-%m-%d %H:%M}"))
+            continue
+        planned.add((chosen, day, slot))
+        assignments.append(Assignment(appointment_id, chosen, names[chosen], candidate, when))
+    return assignments, skipped
+
+async def pending_in_window(db: AsyncSession, date_from: datetime, date_to: datetime, limit: int):
+    appointment = models.Appointment
+    rows = await db.execute(
+        select(appointment.id, appointment.date, appointment.reason)
+        .where(appointment.status == "pending", appointment.date >= date_from, appointment.date < date_to)
+        .order_by(appointment.date, appointment.id)
+        .limit(limit)
+    )
+    return rows.all()
+
+async def doctor_loads(db: AsyncSession, date_from: datetime, date_to: datetime) -> Dict[int, int]:
+    """Bookings per doctor in the window"""
+    appointment = models.Appointment
+    rows = await db.execute(
+        select(appointment.doctor_id, func.count())
+        .where(appointment.doctor_id.isnot(None), appointment.date >= date_from, appointment.date < date_to)
+        .where(func.coalesce(appointment.status, "pending").notin_(availability.RELEASED_STATUSES))
+        .group_by(appointment.doctor_id)
+    )
+    return dict(rows.all())
+
+async def apply(db: AsyncSession, assignments: List[Assignment]) -> Tuple[List[Assignment], List[Skipped]]:
+    """Claim and write the plan in one UPDATE; returns (written, skipped)"""
+    claimed, skipped = [], []
+    for assignment in assignments:
+        try:
+            availability.claim(db, assignment.doctor_id, assignment.date, assignment.appointment_id)
+            claimed.append(assignment)
+        except HTTPException:
+            skipped.append(Skipped(assignment.appointment_id, "Slot was booked meanwhile"))
+    # Slots another worker booked since this one last resynced
+    taken = await availability.taken_slots(db)
+    if taken:
+        booked = [a for a in claimed if (a.doctor_id, *availability.slot_of(a.date)) in taken]
+        skipped += [Skipped(a.appointment_id, "Slot was booked meanwhile") for a in booked]
+        claimed = [a for a in claimed if a not in booked]
+    if not claimed:
+        await db.rollback()
+        return [], skipped
+
+    table = models.Appointment.__table__
+    planned = values(column("id", Integer), column("doctor_id", Integer), name="planned").data(
+        [(assignment.appointment_id, assignment.doctor_id) for assignment in claimed]
+    )
+    result = await db.execute(
+        update(table)
+        .where(table.c.id == planned.c.id, table.c.status == "pending")
+        .values(doctor_id=planned.c.doctor_id, status="assigned")
+        .returning(table.c.id)
+    )
+    updated = set(result.scalars())
+    written = []
+    for assignment in claimed:
+        if assignment.appointment_id in updated:
+            availability.record_on_commit(db, assignment.appointment_id, assignment.doctor_id, assignment.date, "assigned")
+            written.append(assignment)
+        else:
+            skipped.append(Skipped(assignment.appointment_id, "No longer pending"))
+    await db.commit()
+    return written, skipped
+
+async def auto_assign(db: AsyncSession, date_from: Optional[datetime], date_to: Optional[datetime], limit: int,
+                      specialty: Optional[str] = None, dry_run: bool = False) -> dict:
+    """Plan and (unless ``dry_run``) write assignments for [date_from, date_to); returns the report
+
+    The window defaults to the next ``DEFAULT_WINDOW_DAYS`` days.
+    """
+    date_from = date_from or datetime.utcnow()
+    date_to = date_to or date_from + timedelta(days=DEFAULT_WINDOW_DAYS)
+    await availability.ready()
+    pending = await pending_in_window(db, date_from, date_to, limit)
+    loads = await doctor_loads(db, date_from, date_to)
+
+    started = time.perf_counter()
+    assignments, skipped = plan(pending, loads, specialty)
+    scheduling = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if not dry_run and assignments:
+        assignments, conflicts = await apply(db, assignments)
+        skipped += conflicts
+    writing = time.perf_counter() - started
+
+    return {
+        "considered": len(pending),
+        "assigned": 0 if dry_run else len(assignments),
+        "dry_run": dry_run,
+        "scheduling_ms": round(scheduling * 1000, 3),
+        "write_ms": round(writing * 1000, 3),
+        "assignments": [assignment._asdict() for assignment in assignments],
+        "skipped": [entry._asdict() for entry in skipped],
+    }
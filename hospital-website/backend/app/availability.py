@@ -0,0 +1,505 @@
+"""In-memory index of booked doctor time: conflict checks and free-slot search.
+
+Appointments have a start but no length, so the day is divided into
+``APPOINTMENT_SLOT_MINUTES`` slots and an appointment books the slot its
+start falls in. The index keeps one int bitmap of booked slots per
+(doctor, day) and, per doctor, one bitmap per weekday of the slots inside
+their working hours (``Doctor.schedule``, else ``DEFAULT_SCHEDULE``). A
+day's free slots are ``hours & ~booked``, so "next N free slots for
+specialty X" costs a few integer operations per doctor per day, and a
+conflict check is a dict lookup.
+
+The index is loaded once, lazily, from the doctors and the non-cancelled
+assigned appointments from today on. After that it follows the database
+incrementally:
+
+* session hooks collect every flushed Appointment/Doctor change and apply
+  it on commit (or drop it on rollback), as site_counters does;
+* writers that bypass the ORM (bulk UPDATEs) call ``record`` themselves;
+* every ``AVAILABILITY_RESYNC_SECONDS`` it is reloaded in the background,
+  to pick up writes made by other processes and forget past days.
+
+Writers ``claim`` a slot before booking it. The check and the claim happen
+under one lock, so two concurrent requests of this process cannot book the
+same slot; the claim is released when the session commits (the row then
+holds the slot), rolls back, or after ``CLAIM_TTL_SECONDS`` at the latest.
+
+Other workers only see a booking at their next resync, so before writing,
+``confirm`` takes a transaction-scoped advisory lock per claimed slot and
+re-checks the appointments table. Whoever gets the lock second waits for
+the first transaction to end and then sees its row, so the slot cannot be
+double-booked across processes either. A slot found taken this way is
+added to the local index straight away.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Integer, column, event, func, inspect, select, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import background, database, metrics, models
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENT_SLOT_MINUTES = int(os.getenv("APPOINTMENT_SLOT_MINUTES", "30"))
+AVAILABILITY_HORIZON_DAYS = int(os.getenv("AVAILABILITY_HORIZON_DAYS", "60"))
+AVAILABILITY_RESYNC_SECONDS = float(os.getenv("AVAILABILITY_RESYNC_SECONDS", "600"))
+CLAIM_TTL_SECONDS = 30.0
+
+SLOTS_PER_DAY = -(-24 * 60 // APPOINTMENT_SLOT_MINUTES)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DEFAULT_SCHEDULE = {day: ["09:00-17:00"] for day in WEEKDAYS[:5]}
+# Appointments in these states no longer hold their slot
+RELEASED_STATUSES = ("cancelled",)
+
+SlotKey = Tuple[int, date, int]  # (doctor id, day, slot of the day)
+
+def _minutes(clock: str) -> int:
+    hours, minutes = clock.strip().split(":")
+    value = int(hours) * 60 + int(minutes)
+    if not 0 <= value <= 24 * 60:
+        raise ValueError(f"invalid time {clock!r}")
+    return value
+
+def parse_schedule(schedule: Optional[dict]) -> Tuple[int, ...]:
+    """Per-weekday bitmaps of the slots lying entirely within the given hours"""
+    masks = [0] * 7
+    for weekday, name in enumerate(WEEKDAYS):
+        for span in (schedule or {}).get(name, []):
+            start, end = (_minutes(part) for part in span.split("-"))
+            first = -(-start // APPOINTMENT_SLOT_MINUTES)
+            last = end // APPOINTMENT_SLOT_MINUTES
+            if last > first:
+                masks[weekday] |= (1 << last) - (1 << first)
+    return tuple(masks)
+
+DEFAULT_HOURS = parse_schedule(DEFAULT_SCHEDULE)
+
+def slot_of(when: datetime) -> Tuple[date, int]:
+    return when.date(), (when.hour * 60 + when.minute) // APPOINTMENT_SLOT_MINUTES
+
+def slot_start(day: date, slot: int) -> datetime:
+    return datetime.combine(day, datetime.min.time()) + timedelta(minutes=slot * APPOINTMENT_SLOT_MINUTES)
+
+class _Doctor(NamedTuple):
+    name: str
+    specialty: str
+    hours: Tuple[int, ...]
+
+class _Index:
+    """Booked slots from ``start`` on; callers hold ``_lock``"""
+
+    def __init__(self, start: date):
+        self.start = start
+        self.doctors: Dict[int, _Doctor] = {}
+        self.by_specialty: Dict[str, List[int]] = {}
+        self.holders: Dict[SlotKey, Set[int]] = {}
+        self.placement: Dict[int, SlotKey] = {}
+        self.booked: Dict[Tuple[int, date], int] = {}
+
+    def set_doctor(self, doctor_id: int, name: Optional[str], specialty: Optional[str], schedule):
+        old = self.doctors.pop(doctor_id, None)
+        if old is not None:
+            self.by_specialty[old.specialty.casefold()].remove(doctor_id)
+        if name is None:
+            return
+        try:
+            hours = parse_schedule(schedule) if schedule is not None else DEFAULT_HOURS
+        except (AttributeError, TypeError, ValueError):
+            logger.warning("Doctor %s has an invalid schedule %r; using the default hours", doctor_id, schedule)
+            hours = DEFAULT_HOURS
+        self.doctors[doctor_id] = _Doctor(name, specialty, hours)
+        ids = self.by_specialty.setdefault(specialty.casefold(), [])
+        ids.append(doctor_id)
+        ids.sort()
+
+    def place(self, appointment_id: int, doctor_id: Optional[int], when: Optional[datetime], state: Optional[str]):
+        old = self.placement.pop(appointment_id, None)
+        if old is not None:
+            holders = self.holders[old]
+            holders.discard(appointment_id)
+            if not holders:
+                del self.holders[old]
+            self.refresh(old)
+        if doctor_id is None or when is None or state in RELEASED_STATUSES:
+            return
+        day, slot = slot_of(when)
+        if day < self.start:
+            return
+        key = (doctor_id, day, slot)
+        self.placement[appointment_id] = key
+        self.holders.setdefault(key, set()).add(appointment_id)
+        self.refresh(key)
+
+    def refresh(self, key: SlotKey):
+        """Recompute one bit of the booked bitmap from holders and claims"""
+        doctor_id, day, slot = key
+        bits = self.booked.get((doctor_id, day), 0)
+        if key in self.holders or _live_claim(key) is not None:
+            bits |= 1 << slot
+        else:
+            bits &= ~(1 << slot)
+        if bits:
+            self.booked[(doctor_id, day)] = bits
+        else:
+            self.booked.pop((doctor_id, day), None)
+
+    def apply(self, kind: str, values: tuple):
+        if kind == "doctor":
+            self.set_doctor(*values)
+        else:
+            self.place(*values)
+
+_lock = threading.RLock()
+_build_lock = threading.Lock()
+_index: Optional[_Index] = None
+# Changes committed while a rebuild is reading the database, replayed onto it
+_journal: Optional[list] = None
+# Slot -> (owner token, expiry on the monotonic clock)
+_claims: Dict[SlotKey, Tuple[object, float]] = {}
+_stats = {"builds": 0, "last_build_seconds": 0.0, "claims": 0, "conflicts": 0, "records": 0}
+
+_CHANGES = "availability_changes"
+_CLAIMS = "availability_claims"
+_OWNER = "availability_owner"
+# Slots claimed but not yet confirmed against the database -> appointment id (None if new)
+_UNCONFIRMED = "availability_unconfirmed"
+
+def _live_claim(key: SlotKey):
+    """Owner of an unexpired claim on the slot, or None"""
+    claim = _claims.get(key)
+    if claim is None or claim[1] < time.monotonic():
+        return None
+    return claim[0]
+
+def _load(db: Session) -> _Index:
+    index = _Index(datetime.utcnow().date())
+    doctor = models.Doctor
+    for row in db.execute(select(doctor.id, doctor.name, doctor.specialty, doctor.schedule)):
+        index.set_doctor(*row)
+    appointment = models.Appointment
+    rows = db.execute(
+        select(appointment.id, appointment.doctor_id, appointment.date)
+        .where(appointment.doctor_id.isnot(None))
+        .where(appointment.date >= datetime.combine(index.start, datetime.min.time()))
+        .where(func.coalesce(appointment.status, "pending").notin_(RELEASED_STATUSES))
+        .execution_options(yield_per=10000)
+    )
+    for appointment_id, doctor_id, when in rows:
+        index.place(appointment_id, doctor_id, when, None)
+    return index
+
+def rebuild():
+    """Reload the index from the database, keeping changes committed meanwhile"""
+    global _index, _journal
+    with _build_lock:
+        started = time.perf_counter()
+        with _lock:
+            _journal = []
+        try:
+            with database.SessionLocal() as db:
+                index = _load(db)
+            with _lock:
+                for kind, values in _journal:
+                    index.apply(kind, values)
+                now = time.monotonic()
+                for key, (owner, expires) in list(_claims.items()):
+                    if expires < now:
+                        del _claims[key]
+                    else:
+                        index.refresh(key)
+                _index = index
+        finally:
+            with _lock:
+                _journal = None
+        with _lock:
+            _stats["builds"] += 1
+            _stats["last_build_seconds"] = round(time.perf_counter() - started, 3)
+
+def ensure_loaded():
+    """Build the index if this process has not yet"""
+    if _index is None:
+        with _build_lock:
+            loaded = _index is not None
+        if not loaded:
+            rebuild()
+
+async def ready():
+    """``ensure_loaded`` for async callers, off the event loop"""
+    if _index is None:
+        # run_in_executor, unlike to_thread, does not copy the context, so the
+        # one-off build is not charged to the current request's query log
+        await asyncio.get_running_loop().run_in_executor(None, ensure_loaded)
+
+def resync():
+    """Periodic reload; a no-op until something has used the index"""
+    if _index is not None:
+        rebuild()
+
+def reset():
+    """Forget everything; the next use reloads (used by tests)"""
+    global _index
+    with _lock:
+        _index = None
+        _claims.clear()
+
+def record(appointment_id: int, doctor_id: Optional[int], when: Optional[datetime], state: Optional[str]):
+    """Apply a committed appointment change made without the ORM (e.g. a bulk UPDATE)"""
+    _apply([("appointment", (appointment_id, doctor_id, when, state))])
+
+def record_on_commit(session, appointment_id: int, doctor_id: Optional[int], when: Optional[datetime], state: Optional[str]):
+    """``record`` a change the session writes without the ORM, once (and if) it commits"""
+    session.info.setdefault(_CHANGES, []).append(("appointment", (appointment_id, doctor_id, when, state)))
+
+def _apply(changes: list):
+    with _lock:
+        if _index is not None:
+            for kind, values in changes:
+                _index.apply(kind, values)
+        if _journal is not None:
+            _journal.extend(changes)
+        _stats["records"] += len(changes)
+
+def doctors_for(specialty: str) -> Dict[int, str]:
+    """Names of the doctors of a specialty, by id"""
+    with _lock:
+        if _index is None:
+            return {}
+        return {doctor_id: _index.doctors[doctor_id].name for doctor_id in _index.by_specialty.get(specialty.casefold(), [])}
+
+def is_free(doctor_id: int, when: datetime) -> bool:
+    """Whether ``when`` is within the doctor's hours, and their slot is neither booked nor claimed"""
+    day, slot = slot_of(when)
+    with _lock:
+        doctor = _index.doctors.get(doctor_id) if _index is not None else None
+        if doctor is None or not doctor.hours[day.weekday()] >> slot & 1:
+            return False
+        return not _index.booked.get((doctor_id, day), 0) >> slot & 1
+
+def claim(session, doctor_id: int, when: datetime, appointment_id: Optional[int] = None):
+    """Hold the doctor's slot at ``when`` for the session's transaction
+
+    Raises 409 if another appointment holds it or another transaction has
+    claimed it. ``session`` is a Session or AsyncSession; the index must be
+    loaded (``ensure_loaded`` / ``ready``).
+    """
+    day, slot = slot_of(when)
+    key = (doctor_id, day, slot)
+    owner = session.info.setdefault(_OWNER, object())
+    with _lock:
+        if _index is None or day < _index.start:
+            return
+        holders = _index.holders.get(key, ())
+        claimed_by = _live_claim(key)
+        if any(holder != appointment_id for holder in holders) or claimed_by not in (None, owner):
+            _stats["conflicts"] += 1
+            raise _conflict(key)
+        _claims[key] = (owner, time.monotonic() + CLAIM_TTL_SECONDS)
+        _index.refresh(key)
+        _stats["claims"] += 1
+    session.info.setdefault(_CLAIMS, []).append(key)
+    session.info.setdefault(_UNCONFIRMED, {})[key] = appointment_id
+
+def _conflict(key: SlotKey) -> HTTPException:
+    doctor_id, day, slot = key
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Doctor {doctor_id} is already booked at {slot_start(day, slot):%Y-%m-%d %H:%M}"
+    )
+
+def _guard_statements(bookings: Dict[SlotKey, Optional[int]]):
+    """(lock, check) statements for the slots of ``bookings``
+
+    The lock statement takes ``pg_advisory_xact_lock(doctor id, slot number)``
+    for every slot, in key order so that batches cannot deadlock. The check
+    runs after it, in a fresh snapshot, and returns the other live
+    appointments in those slots.
+    """
+    keys = sorted(bookings)
+    epoch = date(1970, 1, 1)
+    slots = values(column("doctor_id", Integer), column("slot", Integer), name="slots").data(
+        [(doctor_id, (day - epoch).days * SLOTS_PER_DAY + slot) for doctor_id, day, slot in keys]
+    )
+    lock = select(func.pg_advisory_xact_lock(slots.c.doctor_id, slots.c.slot)).order_by(
+        slots.c.doctor_id, slots.c.slot
+    )
+    spans = values(
+        column("doctor_id", Integer), column("start", DateTime), column("end", DateTime), name="spans"
+    ).data([
+        (doctor_id, slot_start(day, slot), slot_start(day, slot + 1)) for doctor_id, day, slot in keys
+    ])
+    appointment = models.Appointment
+    check = (
+        select(appointment.id, appointment.doctor_id, appointment.date, appointment.status)
+        .join(spans, (appointment.doctor_id == spans.c.doctor_id)
+              & (appointment.date >= spans.c.start) & (appointment.date < spans.c.end))
+        .where(func.coalesce(appointment.status, "pending").notin_(RELEASED_STATUSES))
+        .where(appointment.id.notin_([i for i in bookings.values() if i is not None]))
+    )
+    return lock, check
+
+def _taken(rows) -> Set[SlotKey]:
+    """Slots the checked rows hold; they are placed in the index as this process missed them"""
+    taken = set()
+    with _lock:
+        for appointment_id, doctor_id, when, state in rows:
+            taken.add((doctor_id, *slot_of(when)))
+            if _index is not None:
+                _index.place(appointment_id, doctor_id, when, state)
+        _stats["conflicts"] += len(taken)
+    return taken
+
+async def taken_slots(session: AsyncSession) -> Set[SlotKey]:
+    """Lock the slots the session has claimed until its transaction ends, and
+    return those another committed appointment already holds"""
+    bookings = session.info.pop(_UNCONFIRMED, None)
+    if not bookings:
+        return set()
+    lock, check = _guard_statements(bookings)
+    await session.execute(lock)
+    return _taken((await session.execute(check)).all())
+
+async def confirm(session: AsyncSession):
+    """``taken_slots``, raising 409 if any claimed slot is taken"""
+    taken = await taken_slots(session)
+    if taken:
+        raise _conflict(min(taken))
+
+def confirm_sync(session: Session):
+    """``confirm`` for a sync Session"""
+    bookings = session.info.pop(_UNCONFIRMED, None)
+    if not bookings:
+        return
+    lock, check = _guard_statements(bookings)
+    session.execute(lock)
+    taken = _taken(session.execute(check).all())
+    if taken:
+        raise _conflict(min(taken))
+
+def claim_changes(session, appointment, changes: dict):
+    """Claim the slot a create or update books, if it books one
+
+    ``appointment`` is the row being updated, or None for a new one.
+    """
+    if appointment is not None and not {"doctor_id", "date", "status"} & changes.keys():
+        return
+    doctor_id = changes.get("doctor_id", getattr(appointment, "doctor_id", None))
+    when = changes.get("date", getattr(appointment, "date", None))
+    state = changes.get("status", getattr(appointment, "status", None))
+    if doctor_id is not None and when is not None and state not in RELEASED_STATUSES:
+        claim(session, doctor_id, when, getattr(appointment, "id", None))
+
+def _release_claims(session):
+    session.info.pop(_UNCONFIRMED, None)
+    keys = session.info.pop(_CLAIMS, [])
+    owner = session.info.get(_OWNER)
+    with _lock:
+        for key in keys:
+            if _claims.get(key, (None,))[0] is owner:
+                del _claims[key]
+                if _index is not None:
+                    _index.refresh(key)
+
+def next_free_slots(specialty: str, count: int = 5, after: Optional[datetime] = None) -> List[dict]:
+    """The first ``count`` free (doctor, slot) pairs of a specialty, by start time then doctor"""
+    now = datetime.utcnow()
+    after = max(after or now, now)
+    day = after.date()
+    minute = after.hour * 60 + after.minute + (1 if after.second or after.microsecond else 0)
+    first_slot = -(-minute // APPOINTMENT_SLOT_MINUTES)
+    found = []
+    with _lock:
+        index = _index
+        doctors = index.by_specialty.get(specialty.casefold(), []) if index is not None else []
+        for offset in range(AVAILABILITY_HORIZON_DAYS if doctors else 0):
+            current = day + timedelta(days=offset)
+            weekday = current.weekday()
+            floor = -(1 << first_slot) if offset == 0 else -1
+            free = {}
+            for doctor_id in doctors:
+                bits = index.doctors[doctor_id].hours[weekday] & ~index.booked.get((doctor_id, current), 0) & floor
+                if bits:
+                    free[doctor_id] = bits
+            combined = 0
+            for bits in free.values():
+                combined |= bits
+            while combined and len(found) < count:
+                lowest = combined & -combined
+                start = slot_start(current, lowest.bit_length() - 1)
+                for doctor_id, bits in free.items():
+                    if bits & lowest:
+                        found.append((doctor_id, start))
+                combined ^= lowest
+            if len(found) >= count:
+                break
+        return [
+            {
+                "doctor_id": doctor_id,
+                "doctor_name": index.doctors[doctor_id].name,
+                "specialty": index.doctors[doctor_id].specialty,
+                "start": start,
+                "end": start + timedelta(minutes=APPOINTMENT_SLOT_MINUTES),
+            }
+            for doctor_id, start in found[:count]
+        ]
+
+def _changed(obj, *keys: str) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[key].history.has_changes() for key in keys)
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_changes(session, flush_context):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, models.Appointment):
+            changes.append(("appointment", (obj.id, obj.doctor_id, obj.date, obj.status)))
+        elif isinstance(obj, models.Doctor):
+            changes.append(("doctor", (obj.id, obj.name, obj.specialty, obj.schedule)))
+    for obj in session.dirty:
+        if obj in session.deleted:
+            continue
+        if isinstance(obj, models.Appointment) and _changed(obj, "doctor_id", "date", "status"):
+            changes.append(("appointment", (obj.id, obj.doctor_id, obj.date, obj.status)))
+        elif isinstance(obj, models.Doctor) and _changed(obj, "name", "specialty", "schedule"):
+            changes.append(("doctor", (obj.id, obj.name, obj.specialty, obj.schedule)))
+    for obj in session.deleted:
+        if isinstance(obj, models.Appointment):
+            changes.append(("appointment", (obj.id, None, None, None)))
+        elif isinstance(obj, models.Doctor):
+            changes.append(("doctor", (obj.id, None, None, None)))
+    if changes:
+        session.info.setdefault(_CHANGES, []).extend(changes)
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session):
+    changes = session.info.pop(_CHANGES, None)
+    if changes:
+        _apply(changes)
+    _release_claims(session)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_CHANGES, None)
+    _release_claims(session)
+
+def get_metrics() -> dict:
+    with _lock:
+        loaded = _index is not None
+        return {
+            **_stats,
+            "loaded": loaded,
+            "doctors": len(_index.doctors) if loaded else 0,
+            "booked_slots": len(_index.holders) if loaded else 0,
+            "pending_claims": len(_claims),
+        }
+
+background.register(background.PeriodicTask("availability-resync", AVAILABILITY_RESYNC_SECONDS, resync))
+metrics.register("availability", get_metrics)
@@ -0,0 +1,61 @@
+"""Periodic background jobs run on the application's event loop."""
+import asyncio
+import logging
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """Run a blocking ``func`` in a worker thread every ``interval`` seconds.
+
+    ``on_stop`` (if given) runs once more when the task is stopped, which is
+    how write-behind buffers get their final flush on shutdown.
+    """
+
+    def __init__(self, name: str, interval: float, func: Callable, on_stop: Optional[Callable] = None):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.on_stop = on_stop
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.func)
+            except Exception:
+                logger.exception("Background task %s failed", self.name)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.on_stop is not None:
+            try:
+                await asyncio.to_thread(self.on_stop)
+            except Exception:
+                logger.exception("Final run of background task %s failed", self.name)
+
+_tasks: List[PeriodicTask] = []
+
+def register(task: PeriodicTask) -> PeriodicTask:
+    """Add a task to be started on startup and stopped on shutdown"""
+    _tasks.append(task)
+    return task
+
+async def start_all():
+    for task in _tasks:
+        task.start()
+
+async def stop_all():
+    for task in reversed(_tasks):
+        await task.stop()
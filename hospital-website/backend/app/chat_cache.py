@@ -0,0 +1,101 @@
+"""Cache of chat completions for repeated questions.
+
+Most chat traffic is the same handful of questions (visiting hours,
+parking, what a specialist does) with different spacing, case and
+punctuation. Replies are cached under a hash of the normalized system
+prompt plus the last ``CHAT_CACHE_TAIL_MESSAGES`` messages of the
+conversation, with a TTL and an LRU size bound.
+
+Identical prompts that arrive while the first one is still waiting on the
+upstream share that single call (single-flight). The upstream call runs
+as its own task, so a client disconnecting doesn't cancel it for the
+others.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from typing import Awaitable, Callable, Dict, List
+
+from . import metrics
+from .ttl_cache import TTLCache
+
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2048"))
+# How much of the conversation (besides the system prompt) the key covers
+CHAT_CACHE_TAIL_MESSAGES = int(os.getenv("CHAT_CACHE_TAIL_MESSAGES", "3"))
+
+_cache = TTLCache(CHAT_CACHE_MAX_ENTRIES, CHAT_CACHE_TTL_SECONDS)
+_in_flight: Dict[str, asyncio.Task] = {}
+_stats = {"hits": 0, "coalesced": 0, "upstream_calls": 0}
+
+_whitespace = re.compile(r"\s+")
+_trailing_punctuation = re.compile(r"[\s?!.,;:]+$")
+
+def normalize(text: str) -> str:
+    """Case-, spacing- and trailing-punctuation-insensitive form of a message"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = _whitespace.sub(" ", text).strip()
+    return _trailing_punctuation.sub("", text)
+
+def cache_key(messages: List[Dict[str, str]]) -> str:
+    system = [m for m in messages if m["role"] == "system"]
+    conversation = [m for m in messages if m["role"] != "system"]
+    tail = conversation[-CHAT_CACHE_TAIL_MESSAGES:] if CHAT_CACHE_TAIL_MESSAGES > 0 else conversation
+    parts = [[m["role"], normalize(m["content"])] for m in system + tail]
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+def lookup(messages: List[Dict[str, str]]):
+    """Cached reply for the conversation, or None (the caller then goes upstream)"""
+    reply = _cache.get(cache_key(messages))
+    _stats["hits" if reply is not None else "upstream_calls"] += 1
+    return reply
+
+def store(messages: List[Dict[str, str]], reply: str):
+    if reply:
+        _cache.set(cache_key(messages), reply)
+
+async def get_or_complete(messages: List[Dict[str, str]], complete: Callable[[], Awaitable[str]]) -> str:
+    """Return the cached reply, join an identical in-flight call, or call ``complete``"""
+    key = cache_key(messages)
+    reply = _cache.get(key)
+    if reply is not None:
+        _stats["hits"] += 1
+        return reply
+
+    task = _in_flight.get(key)
+    if task is not None:
+        _stats["coalesced"] += 1
+    else:
+        _stats["upstream_calls"] += 1
+        task = asyncio.ensure_future(complete())
+        _in_flight[key] = task
+        task.add_done_callback(lambda done: _finish(key, done))
+    # Shielded so one caller going away doesn't cancel the call for the rest
+    return await asyncio.shield(task)
+
+def _finish(key: str, task: asyncio.Task):
+    _in_flight.pop(key, None)
+    if not task.cancelled() and task.exception() is None and task.result():
+        _cache.set(key, task.result())
+
+def clear():
+    _cache.clear()
+
+def get_metrics() -> dict:
+    saved = _stats["hits"] + _stats["coalesced"]
+    requests = saved + _stats["upstream_calls"]
+    cache_stats = _cache.stats()
+    return {
+        "entries": cache_stats["entries"],
+        "max_entries": cache_stats["max_entries"],
+        "evictions": cache_stats["evictions"],
+        **_stats,
+        "in_flight": len(_in_flight),
+        "saved_upstream_calls": saved,
+        "hit_ratio": round(saved / requests, 4) if requests else 0.0,
+    }
+
+metrics.register("chat_cache", get_metrics)
@@ -0,0 +1,203 @@
+"""Chat completion providers for the ``/api/chat`` routes.
+
+Routes get a provider from the ``get_chat_provider`` dependency and never
+talk to a vendor SDK directly. The default ``OpenAIProvider`` uses the
+async client over one pooled ``httpx.AsyncClient`` per process, with
+connect/read timeouts. Pointing ``CHAT_API_BASE_URL`` at any
+OpenAI-compatible server (such as ``python -m benchmarks.stub_llm``) swaps
+the upstream for load tests, and tests can override the dependency.
+
+``limit`` (or ``acquire`` and ``Slot.release``, for a stream that outlives
+the route) caps how many completions run at once; callers that can't get a
+slot within ``CHAT_QUEUE_TIMEOUT_SECONDS`` are turned away with a 503
+instead of piling up behind a slow upstream.
+"""
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import openai
+from fastapi import HTTPException, status
+
+from . import metrics
+
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-3.5-turbo")
+# Leave unset for api.openai.com; e.g. http://localhost:9100/v1 for the stub server
+CHAT_API_BASE_URL = os.getenv("CHAT_API_BASE_URL") or None
+CHAT_TIMEOUT_SECONDS = float(os.getenv("CHAT_TIMEOUT_SECONDS", "30"))
+CHAT_CONNECT_TIMEOUT_SECONDS = float(os.getenv("CHAT_CONNECT_TIMEOUT_SECONDS", "5"))
+CHAT_MAX_RETRIES = int(os.getenv("CHAT_MAX_RETRIES", "1"))
+# Pooled upstream connections per process
+CHAT_MAX_CONNECTIONS = int(os.getenv("CHAT_MAX_CONNECTIONS", "100"))
+# Completions allowed to run at once, and how long a request may wait for a slot
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "32"))
+CHAT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "2"))
+
+Messages = List[Dict[str, str]]
+
+class ChatProvider(ABC):
+    """Interface of a chat backend"""
+
+    @abstractmethod
+    async def complete(self, messages: Messages) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, messages: Messages) -> AsyncIterator[str]:
+        """Yield the reply in pieces as the upstream produces them"""
+
+    async def close(self):
+        pass
+
+class OpenAIProvider(ChatProvider):
+    """OpenAI (or any OpenAI-compatible server) through the async SDK client"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = CHAT_API_BASE_URL,
+        model: str = CHAT_MODEL,
+        http_client: Optional[httpx.AsyncClient] = None
+    ):
+        self.model = model
+        if http_client is None:
+            http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(CHAT_TIMEOUT_SECONDS, connect=CHAT_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=CHAT_MAX_CONNECTIONS,
+                    max_keepalive_connections=CHAT_MAX_CONNECTIONS
+                )
+            )
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY") or "not-set",
+            base_url=base_url,
+            max_retries=CHAT_MAX_RETRIES,
+            http_client=http_client
+        )
+
+    async def complete(self, messages: Messages) -> str:
+        response = await self._client.chat.completions.create(model=self.model, messages=messages)
+        return response.choices[0].message.content or ""
+
+    async def stream(self, messages: Messages) -> AsyncIterator[str]:
+        response = await self._client.chat.completions.create(
+            model=self.model, messages=messages, stream=True
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self):
+        await self._client.close()
+
+_provider: Optional[ChatProvider] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_waiting = 0
+_in_flight = 0
+_latencies = deque(maxlen=1024)
+_stats = {"completed": 0, "rejected": 0, "failed": 0, "timeouts": 0}
+
+def get_chat_provider() -> ChatProvider:
+    """FastAPI dependency returning the process-wide provider (created on first use)"""
+    global _provider
+    if _provider is None:
+        _provider = OpenAIProvider()
+    return _provider
+
+class Slot:
+    """One of the CHAT_MAX_CONCURRENCY upstream slots, taken by ``acquire``"""
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self._semaphore = semaphore
+        self._start = time.perf_counter()
+        self._released = False
+
+    async def release(self, error: Optional[BaseException] = None):
+        """Give the slot back and count the call's outcome; later calls are no-ops"""
+        global _in_flight
+        if self._released:
+            return
+        self._released = True
+        _in_flight -= 1
+        _latencies.append(time.perf_counter() - self._start)
+        if error is None:
+            _stats["completed"] += 1
+        elif isinstance(error, openai.APITimeoutError):
+            _stats["timeouts"] += 1
+        else:
+            _stats["failed"] += 1
+        self._semaphore.release()
+
+async def acquire() -> Slot:
+    """Wait up to CHAT_QUEUE_TIMEOUT_SECONDS for a slot, or raise a 503"""
+    global _semaphore, _waiting, _in_flight
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(CHAT_MAX_CONCURRENCY)
+    semaphore = _semaphore
+
+    _waiting += 1
+    try:
+        await asyncio.wait_for(semaphore.acquire(), CHAT_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        _stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The assistant is busy, please try again shortly",
+            headers={"Retry-After": "1"}
+        )
+    finally:
+        _waiting -= 1
+
+    _in_flight += 1
+    return Slot(semaphore)
+
+@asynccontextmanager
+async def limit():
+    """Hold an upstream slot for the duration of the block
+
+    Upstream errors must leave the block unchanged to be counted as
+    timeouts or failures.
+    """
+    slot = await acquire()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        await slot.release(error)
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def get_metrics() -> dict:
+    latencies = list(_latencies)
+    return {
+        "max_concurrency": CHAT_MAX_CONCURRENCY,
+        "in_flight": _in_flight,
+        "waiting": _waiting,
+        **_stats,
+        "latency_ms_p50": round(_percentile(latencies, 0.50) * 1000, 2),
+        "latency_ms_p99": round(_percentile(latencies, 0.99) * 1000, 2),
+    }
+
+async def close():
+    """Close pooled upstream connections (called on application shutdown)"""
+    global _provider, _semaphore
+    if _provider is not None:
+        await _provider.close()
+        _provider = None
+    # The semaphore belongs to this event loop; the next loop gets a fresh one
+    _semaphore = None
+
+metrics.register("chat", get_metrics)
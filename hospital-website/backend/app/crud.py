@@ -1,18 +1,30 @@
 from sqlalchemy.orm import Session
-from . import models, schemas
+from . import availability, models, schemas, principal_cache, response_cache, site_counters, view_counter
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 from sqlalchemy.exc import SQLAlchemyError
-import bcrypt
 import secrets
 from typing import Optional
 from sqlalchemy.sql import func
 from .password_utils import get_password_hash, verify_password
 from .auth_utils import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token
+from .pagination import keyset_page
 
 def get_news_articles(db: Session, skip: int = 0, limit: int = 100):
+    return get_news_articles_page(db, skip=skip, limit=limit)[0]
+
+def get_news_articles_page(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    """Newest-first page of all articles; returns (articles, next_cursor)"""
     try:
-        return db.query(models.NewsArticle).offset(skip).limit(limit).all()
+        return keyset_page(
+            db.query(models.NewsArticle),
+            models.NewsArticle.date,
+            models.NewsArticle.id,
+            limit,
+            cursor=cursor,
+            skip=skip,
+            descending=True
+        )
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -30,8 +42,9 @@ def get_news_article(db: Session, article_id: int, increment_views: bool = False
         article = query.first()
         
         if article and increment_views:
-            article.views_count += 1
-            db.commit()
+            # Buffered and flushed in batches by view_counter, so the
+            # returned row's views_count does not include this view yet
+            view_counter.record_view(article.id)
             
         return article
     except SQLAlchemyError as e:
@@ -54,6 +67,7 @@ def create_news_article(db: Session, article: schemas.NewsArticleCreate, admin_i
         db.add(db_article)
         db.commit()
         db.refresh(db_article)
+        response_cache.invalidate_tags("news:list")
         return db_article
     except SQLAlchemyError as e:
         db.rollback()
@@ -73,6 +87,7 @@ def update_news_article(db: Session, article_id: int, article: dict):
     db_article.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(db_article)
+    response_cache.invalidate_tags("news:list", f"news:{article_id}")
     return db_article
 
 def delete_news_article(db: Session, article_id: int):
@@ -82,6 +97,7 @@ def delete_news_article(db: Session, article_id: int):
     
     db.delete(db_article)
     db.commit()
+    response_cache.invalidate_tags("news:list", f"news:{article_id}")
     return True
 
 def get_user_by_email(db: Session, email: str):
@@ -106,11 +122,10 @@ def get_admin_by_username(db: Session, username: str):
     return db.query(models.Admin).filter(models.Admin.username == username).first()
 
 def create_admin(db: Session, admin: schemas.AdminCreate):
-    hashed_password = bcrypt.hashpw(admin.password.encode('utf-8'), bcrypt.gensalt())
     db_admin = models.Admin(
         username=admin.username,
         email=admin.email,
-        password_hash=hashed_password.decode('utf-8'),
+        password_hash=get_password_hash(admin.password),
         role=admin.role,
         permissions=admin.permissions
     )
@@ -119,12 +134,6 @@ def create_admin(db: Session, admin: schemas.AdminCreate):
     db.refresh(db_admin)
     return db_admin
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'),
-        hashed_password.encode('utf-8')
-    )
-
 def get_user_by_id(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
@@ -165,6 +174,14 @@ def revoke_refresh_token(db: Session, token: str):
 
 def create_appointment(db: Session, appointment: dict):
     """Create a new appointment"""
+    if appointment.get("doctor_id") is not None:
+        availability.ensure_loaded()
+        availability.claim_changes(db, None, appointment)
+        try:
+            availability.confirm_sync(db)
+        except HTTPException:
+            db.rollback()
+            raise
     # Create new appointment directly from dict
     db_appointment = models.Appointment(**appointment)
     db.add(db_appointment)
@@ -173,10 +190,27 @@ def create_appointment(db: Session, appointment: dict):
     return db_appointment
 
 def get_appointments(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None):
+    return get_appointments_page(db, skip=skip, limit=limit, status=status)[0]
+
+def get_appointments_page(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None
+):
+    """Page of appointments ordered by date; returns (appointments, next_cursor)"""
     query = db.query(models.Appointment)
     if status:
         query = query.filter(models.Appointment.status == status)
-    return query.offset(skip).limit(limit).all()
+    return keyset_page(
+        query,
+        models.Appointment.date,
+        models.Appointment.id,
+        limit,
+        cursor=cursor,
+        skip=skip
+    )
 
 def get_appointment(db: Session, appointment_id: int):
     return db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
@@ -188,6 +222,13 @@ def update_appointment(db: Session, appointment_id: int, appointment: schemas.Ap
         raise HTTPException(status_code=404, detail="Appointment not found")
     
     update_data = appointment.model_dump(exclude_unset=True)
+    availability.ensure_loaded()
+    availability.claim_changes(db, db_appointment, update_data)
+    try:
+        availability.confirm_sync(db)
+    except HTTPException:
+        db.rollback()
+        raise
     for field, value in update_data.items():
         setattr(db_appointment, field, value)
     
@@ -211,6 +252,13 @@ def assign_doctor_to_appointment(db: Session, appointment_id: int, doctor_id: in
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
+    availability.ensure_loaded()
+    availability.claim(db, doctor_id, appointment.date, appointment.id)
+    try:
+        availability.confirm_sync(db)
+    except HTTPException:
+        db.rollback()
+        raise
     appointment.doctor_id = doctor_id
     appointment.status = "assigned"
     db.commit()
@@ -239,6 +287,7 @@ def update_admin(db: Session, admin_id: int, update_data: dict):
                 setattr(db_admin, key, value)
             db.commit()
             db.refresh(db_admin)
+            principal_cache.invalidate_admin(admin_id)
         return db_admin
     except Exception as e:
         print(f"Error in update_admin: {str(e)}")
@@ -249,33 +298,11 @@ def get_news_categories(db: Session):
     return db.query(models.NewsArticle.category).distinct().all()
 
 def get_admin_statistics(db: Session):
-    total = db.query(models.NewsArticle).count()
-    published = db.query(models.NewsArticle).filter(
-        models.NewsArticle.status == "published"
-    ).count()
-    draft = db.query(models.NewsArticle).filter(
-        models.NewsArticle.status == "draft"
-    ).count()
-    
-    total_views = db.query(func.sum(models.NewsArticle.views_count)).scalar() or 0
-    
-    categories = db.query(
-        models.NewsArticle.category,
-        func.count(models.NewsArticle.id)
-    ).group_by(models.NewsArticle.category).all()
-    
-    recent = db.query(models.NewsArticle).order_by(
-        models.NewsArticle.created_at.desc()
-    ).limit(5).all()
-    
-    return {
-        "total_articles": total,
-        "published_articles": published,
-        "draft_articles": draft,
-        "total_views": total_views,
-        "articles_by_category": dict(categories),
-        "recent_articles": recent
-    }
+    """Dashboard totals, read from the site_counters table in a single query"""
+    stats = site_counters.read(db)
+    # Include views that are still waiting in the write-behind buffer
+    stats["total_views"] += view_counter.pending_views()
+    return stats
 
 def get_admin_by_id(db: Session, admin_id: int):
     return db.query(models.Admin).filter(models.Admin.id == admin_id).first()
@@ -340,6 +367,7 @@ def delete_user(db: Session, user_id: int):
     if user:
         db.delete(user)
         db.commit()
+        principal_cache.invalidate_user(user_id)
         return True
 
     # If not found, try to find and delete admin
@@ -354,6 +382,7 @@ def delete_user(db: Session, user_id: int):
             )
         db.delete(admin)
         db.commit()
+        principal_cache.invalidate_admin(user_id)
         return True
 
     raise HTTPException(
@@ -371,6 +400,7 @@ def update_user(db: Session, user_id: int, update_data: dict):
             setattr(db_user, key, value)
         db.commit()
         db.refresh(db_user)
+        principal_cache.invalidate_user(user_id)
     return db_user
 
 def get_admin_by_email(db: Session, email: str):
@@ -0,0 +1,125 @@
+"""Streaming NDJSON/CSV exports for the admin panel.
+
+Rows are read with a Core ``select`` of plain columns through
+``AsyncSession.stream`` with ``yield_per``, i.e. a server-side cursor
+fetching ``EXPORT_BATCH_SIZE`` rows at a time, and each batch is encoded
+and sent before the next is fetched. No ORM objects are built and neither
+the result set nor the body is ever held in memory whole, so an export of
+a million rows costs about as much memory as one of a thousand.
+
+The stream opens its own session: request-scoped dependencies are closed
+before a ``StreamingResponse`` body is sent.
+"""
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import AsyncIterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from . import models
+from .database import AsyncSessionLocal
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+USER_COLUMNS = [
+    models.User.id, models.User.email, models.User.name, models.User.phone, models.User.is_active,
+    models.User.email_verified, models.User.created_at, models.User.last_login,
+]
+APPOINTMENT_COLUMNS = [
+    models.Appointment.id, models.Appointment.date, models.Appointment.status, models.Appointment.reason,
+    models.Appointment.additional_notes, models.Appointment.user_id, models.Appointment.doctor_id,
+    models.Appointment.created_at,
+]
+
+ARTICLE_COLUMNS = [
+    models.NewsArticle.id, models.NewsArticle.title, models.NewsArticle.summary, models.NewsArticle.content,
+    models.NewsArticle.category, models.NewsArticle.image_url, models.NewsArticle.status, models.NewsArticle.date,
+    models.NewsArticle.published_at, models.NewsArticle.views_count, models.NewsArticle.admin_id,
+    models.NewsArticle.created_at,
+]
+
+def users_query(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None, is_active: Optional[bool] = None):
+    """Users, optionally by signup date range [date_from, date_to) and active flag"""
+    statement = select(*USER_COLUMNS).order_by(models.User.id)
+    if date_from is not None:
+        statement = statement.where(models.User.created_at >= date_from)
+    if date_to is not None:
+        statement = statement.where(models.User.created_at < date_to)
+    if is_active is not None:
+        statement = statement.where(models.User.is_active == is_active)
+    return statement
+
+def appointments_query(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None, statuses: Optional[List[str]] = None):
+    """Appointments, optionally by appointment date range [date_from, date_to) and status"""
+    statement = select(*APPOINTMENT_COLUMNS).order_by(models.Appointment.date, models.Appointment.id)
+    if date_from is not None:
+        statement = statement.where(models.Appointment.date >= date_from)
+    if date_to is not None:
+        statement = statement.where(models.Appointment.date < date_to)
+    if statuses:
+        statement = statement.where(models.Appointment.status.in_(statuses))
+    return statement
+
+def articles_query(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                   statuses: Optional[List[str]] = None, category: Optional[str] = None):
+    """Articles, optionally by article date range [date_from, date_to), status and category
+
+    The output is accepted as is by the bulk import (see app.news_import).
+    """
+    statement = select(*ARTICLE_COLUMNS).order_by(models.NewsArticle.id)
+    if date_from is not None:
+        statement = statement.where(models.NewsArticle.date >= date_from)
+    if date_to is not None:
+        statement = statement.where(models.NewsArticle.date < date_to)
+    if statuses:
+        statement = statement.where(models.NewsArticle.status.in_(statuses))
+    if category is not None:
+        statement = statement.where(models.NewsArticle.category == category)
+    return statement
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _encode_ndjson(names, rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(names, row)), default=_json_value, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _encode_csv(names, rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+async def stream_rows(statement, fmt: str) -> AsyncIterator[str]:
+    """Encoded export body, one chunk per batch of rows"""
+    names = [column.name for column in statement.selected_columns]
+    encode = _encode_ndjson if fmt == "ndjson" else _encode_csv
+    if fmt == "csv":
+        yield _encode_csv(names, [names])
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield encode(names, rows)
+
+def export_response(statement, fmt: str, name: str) -> StreamingResponse:
+    timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        stream_rows(statement, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}-{timestamp}.{fmt}"'}
+    )
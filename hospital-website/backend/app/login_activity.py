@@ -0,0 +1,107 @@
+"""Write-behind buffer for login timestamps.
+
+Logins record ``last_login`` in memory instead of committing their own
+``UPDATE users`` next to the refresh-token INSERT. Pending timestamps are
+coalesced per account (only the latest matters) and flushed periodically,
+and on shutdown, as one multi-row
+``UPDATE ... SET last_login = greatest(last_login, v.last_login) FROM (VALUES ...) AS v``
+per table. ``greatest`` keeps the newest value when several workers flush
+the same account in any order.
+
+Accounts are keyed by kind ("user", "admin"); another kind of row (say,
+session metadata) is another entry in ``_TABLES``.
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import DateTime, Integer, column, func, update, values
+from sqlalchemy.orm import Session
+
+from . import background, database, metrics, models
+
+logger = logging.getLogger(__name__)
+
+LOGIN_ACTIVITY_FLUSH_INTERVAL = float(os.getenv("LOGIN_ACTIVITY_FLUSH_INTERVAL", "5"))
+
+_TABLES = {
+    "user": models.User.__table__,
+    "admin": models.Admin.__table__,
+}
+
+_lock = threading.Lock()
+# kind -> {id: latest login not yet written}
+_pending: Dict[str, Dict[int, datetime]] = {kind: {} for kind in _TABLES}
+_stats = {"recorded": 0, "flushes": 0, "flushed_rows": 0, "failed_flushes": 0}
+
+def _merge(kind: str, rows: Dict[int, datetime]):
+    with _lock:
+        pending = _pending[kind]
+        for row_id, when in rows.items():
+            if row_id not in pending or pending[row_id] < when:
+                pending[row_id] = when
+
+def record_login(kind: str, row_id: int, when: Optional[datetime] = None):
+    """Note a login of a user or admin; it reaches the database on the next flush"""
+    _merge(kind, {row_id: when or datetime.utcnow()})
+    _stats["recorded"] += 1
+
+def _drain() -> Dict[str, Dict[int, datetime]]:
+    with _lock:
+        drained = {kind: rows for kind, rows in _pending.items() if rows}
+        for kind in drained:
+            _pending[kind] = {}
+    return drained
+
+def flush(db: Optional[Session] = None) -> int:
+    """Write pending logins to the database and return how many rows were updated"""
+    drained = _drain()
+    if not drained:
+        return 0
+
+    own_session = db is None
+    if own_session:
+        db = database.SessionLocal()
+    try:
+        for kind, rows in drained.items():
+            table = _TABLES[kind]
+            latest = values(column("id", Integer), column("last_login", DateTime), name="latest").data(
+                list(rows.items())
+            )
+            db.execute(
+                update(table)
+                .where(table.c.id == latest.c.id)
+                .values(last_login=func.greatest(table.c.last_login, latest.c.last_login))
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Put the logins back so the next flush retries them
+        for kind, rows in drained.items():
+            _merge(kind, rows)
+        _stats["failed_flushes"] += 1
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+    flushed = sum(len(rows) for rows in drained.values())
+    _stats["flushes"] += 1
+    _stats["flushed_rows"] += flushed
+    return flushed
+
+def discard_pending():
+    """Drop all pending logins without writing them (used by tests)"""
+    _drain()
+
+def get_metrics() -> dict:
+    with _lock:
+        pending = sum(len(rows) for rows in _pending.values())
+    return {**_stats, "pending": pending}
+
+background.register(background.PeriodicTask(
+    "flush-login-activity", LOGIN_ACTIVITY_FLUSH_INTERVAL, flush, on_stop=flush
+))
+metrics.register("login_activity", get_metrics)
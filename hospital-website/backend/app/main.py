@@ -1,11 +1,10 @@
 from fastapi import FastAPI
 from app.middleware.middleware import setup_middlewares
-from app.routers import news, auth, appointments, admin, chat
-from app.database import engine
-from app import models
+from app.routers import news, auth, appointments, admin, chat, monitoring
+from app import password_utils, background, chat_provider, token_purge
+from app.middleware import request_metrics
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# The schema is managed with Alembic: run `alembic upgrade head` before starting
 
 app = FastAPI()
 
@@ -18,6 +17,21 @@ app.include_router(auth.router)
 app.include_router(appointments.router)
 app.include_router(admin.router)
 app.include_router(chat.router, prefix="/api")
+app.include_router(monitoring.router)
+
+@app.on_event("startup")
+async def start_background_services():
+    request_metrics.start_access_log()
+    await background.start_all()
+
+@app.on_event("shutdown")
+async def shutdown_background_services():
+    # Stopping the tasks also runs their final flush
+    await background.stop_all()
+    password_utils.shutdown_executor()
+    await chat_provider.close()
+    request_metrics.stop_access_log()
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to City General Hospital API"}
\ No newline at end of file
@@ -0,0 +1,16 @@
+"""Registry of runtime metrics reported by the app's subsystems.
+
+Each subsystem registers a provider returning a dict of its current
+counters; ``snapshot`` collects them all for the admin metrics endpoint.
+"""
+from typing import Callable, Dict, Any
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+def register(name: str, provider: Callable[[], Dict[str, Any]]):
+    """Register (or replace) the metrics provider for a subsystem"""
+    _providers[name] = provider
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Return the current metrics of every registered subsystem"""
+    return {name: provider() for name, provider in _providers.items()}
@@ -1,4 +1,5 @@
 from fastapi.middleware.cors import CORSMiddleware
-from .middleware import RequestLoggingMiddleware, setup_middlewares
+from .middleware import setup_middlewares
+from .request_metrics import RequestMetricsMiddleware
 
-__all__ = ['RequestLoggingMiddleware', 'CORSMiddleware', 'setup_middlewares']
\ No newline at end of file
+__all__ = ['RequestMetricsMiddleware', 'CORSMiddleware', 'setup_middlewares']
\ No newline at end of file
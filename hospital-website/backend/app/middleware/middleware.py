@@ -1,21 +1,12 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
-import time
-from starlette.middleware.base import BaseHTTPMiddleware
+from .request_metrics import RequestMetricsMiddleware
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        logger.info(f"{request.method} {request.url.path} completed in {process_time:.3f}s")
-        return response
-
 def setup_middlewares(app: FastAPI):
     # CORS middleware
     app.add_middleware(
@@ -30,7 +21,8 @@ def setup_middlewares(app: FastAPI):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
     
-    # Request logging middleware
-    app.add_middleware(RequestLoggingMiddleware)
\ No newline at end of file
+    # Request metrics and sampled access logging (outermost, so it times everything)
+    app.add_middleware(RequestMetricsMiddleware)
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""Per-route request metrics and sampled access logging.
+
+``RequestMetricsMiddleware`` is a plain ASGI middleware: it wraps ``send``
+to see the status code and the end of the body, so streaming responses
+pass straight through and no extra task is spawned per request. For each
+route template (``/api/news/{article_id}``, not the raw path) it keeps a
+log-bucketed latency histogram and status counts, plus in-flight gauges
+per method. ``app.prometheus`` renders them for ``/metrics``.
+
+Access log lines go through a ``QueueHandler`` so the request path only
+enqueues a record; a ``QueueListener`` thread does the formatting and
+I/O. Only a sample of successful requests is logged
+(``REQUEST_LOG_SAMPLE_RATE``); errors and slow requests always are.
+
+The middleware also opens the request's ``query_counter`` log and
+``server_timing`` scope, and adds the ``Server-Timing`` header to the
+response start and the timing fields to the access log record, as
+``SERVER_TIMING`` selects.
+"""
+import bisect
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .. import metrics, query_counter, server_timing
+
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "0.1"))
+REQUEST_LOG_SLOW_MS = float(os.getenv("REQUEST_LOG_SLOW_MS", "500"))
+
+# Bucket upper bounds in seconds: 1 ms to ~65 s, each sqrt(2) wider than the last
+LATENCY_BUCKETS = tuple(0.001 * 2 ** (i / 2) for i in range(33))
+
+UNMATCHED_ROUTE = "unmatched"
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets; cheap to update, mergeable, percentile-able"""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        # The last slot counts observations above the largest bound
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+_lock = threading.Lock()
+_latency: Dict[Tuple[str, str], LatencyHistogram] = {}
+_status_counts: Dict[Tuple[str, str, int], int] = {}
+_in_flight: Dict[str, int] = {}
+
+def record(method: str, route: str, status: int, seconds: float):
+    with _lock:
+        histogram = _latency.get((method, route))
+        if histogram is None:
+            histogram = _latency[(method, route)] = LatencyHistogram()
+        histogram.observe(seconds)
+        key = (method, route, status)
+        _status_counts[key] = _status_counts.get(key, 0) + 1
+
+def snapshot():
+    """Copies of the histograms, status counts and in-flight gauges"""
+    with _lock:
+        latency = {}
+        for key, histogram in _latency.items():
+            copy = LatencyHistogram()
+            copy.counts, copy.count, copy.sum = list(histogram.counts), histogram.count, histogram.sum
+            latency[key] = copy
+        return latency, dict(_status_counts), dict(_in_flight)
+
+def reset():
+    with _lock:
+        _latency.clear()
+        _status_counts.clear()
+
+def get_metrics() -> dict:
+    """Per-route summary for the admin JSON metrics endpoint"""
+    latency, statuses, in_flight = snapshot()
+    routes = {}
+    for (method, route), histogram in sorted(latency.items()):
+        routes[f"{method} {route}"] = {
+            "count": histogram.count,
+            "p50_ms": round(histogram.percentile(0.50) * 1000, 2),
+            "p99_ms": round(histogram.percentile(0.99) * 1000, 2),
+            "errors": sum(
+                count for (m, r, status), count in statuses.items()
+                if (m, r) == (method, route) and status >= 500
+            ),
+        }
+    return {"in_flight": sum(in_flight.values()), "routes": routes}
+
+# Access log: the handler only enqueues, the listener thread writes
+
+access_logger = logging.getLogger("app.access")
+_log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def start_access_log():
+    """Route access log records through a queue to a background writer thread"""
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    _listener = logging.handlers.QueueListener(_log_queue, output, respect_handler_level=True)
+    access_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+    _listener.start()
+
+def stop_access_log():
+    """Flush and stop the writer thread (called on application shutdown)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _should_log(status: int, seconds: float) -> bool:
+    if status >= 500 or seconds * 1000 >= REQUEST_LOG_SLOW_MS:
+        return True
+    return random.random() < REQUEST_LOG_SAMPLE_RATE
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status = 500
+        finished = False
+        timing_token = server_timing.begin()
+        timings = server_timing.current()
+        query_token = query_counter.begin()
+
+        async def send_wrapper(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings is not None and server_timing.header_enabled():
+                    value = timings.header_value(time.perf_counter() - start)
+                    message = {
+                        **message,
+                        "headers": [*message.get("headers", []), (b"server-timing", value.encode("latin-1"))],
+                    }
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = True
+            await send(message)
+
+        with _lock:
+            _in_flight[method] = _in_flight.get(method, 0) + 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            seconds = time.perf_counter() - start
+            with _lock:
+                _in_flight[method] -= 1
+            if not finished and status < 500:
+                # Client went away or the app failed mid-response
+                status = 499
+            # The router stores the matched route in the (shared) scope
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            record(method, path, status, seconds)
+            if _should_log(status, seconds):
+                if timings is not None and server_timing.log_enabled():
+                    fields = timings.fields(seconds)
+                    access_logger.info(
+                        "%s %s %d %.1fms %s", method, scope["path"], status, seconds * 1000,
+                        " ".join(f"{key}={value}" for key, value in fields.items()),
+                        extra={"timing": fields}
+                    )
+                else:
+                    access_logger.info(
+                        "%s %s %d %.1fms", method, scope["path"], status, seconds * 1000
+                    )
+            server_timing.end(timing_token)
+            query_counter.end(query_token, f"{method} {path}")
+
+metrics.register("http", get_metrics)
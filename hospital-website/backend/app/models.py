@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Text, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from sqlalchemy.sql import func
 from .database import Base
+from .query_counter import RELATIONSHIP_LOADING
 
 class NewsArticle(Base):
     __tablename__ = "news_articles"
@@ -21,7 +22,18 @@ class NewsArticle(Base):
     views_count = Column(Integer, default=0)
     admin_id = Column(Integer, ForeignKey("admins.id"))
 
-    admin = relationship("Admin", back_populates="articles")
+    admin = relationship("Admin", back_populates="articles", lazy=RELATIONSHIP_LOADING)
+
+    __table_args__ = (
+        # Public listing: published articles, newest first (keyset on date, id)
+        Index(
+            "ix_news_articles_published_date_id",
+            date.desc(), id.desc(),
+            postgresql_where=(status == "published")
+        ),
+        # Admin listing over all articles
+        Index("ix_news_articles_date_id", date.desc(), id.desc()),
+    )
 
 class User(Base):
     __tablename__ = "users"
@@ -38,10 +50,10 @@ class User(Base):
     verification_token = Column(String, nullable=True)
     email_verified = Column(Boolean, default=False)
     email_verified_at = Column(DateTime, nullable=True)
-    appointments = relationship("Appointment", back_populates="user")
+    appointments = relationship("Appointment", back_populates="user", lazy=RELATIONSHIP_LOADING)
 
-    sessions = relationship("UserSession", back_populates="user")
-    refresh_tokens = relationship("RefreshToken", back_populates="user")
+    sessions = relationship("UserSession", back_populates="user", lazy=RELATIONSHIP_LOADING)
+    refresh_tokens = relationship("RefreshToken", back_populates="user", lazy=RELATIONSHIP_LOADING)
 
 class Admin(Base):
     __tablename__ = "admins"
@@ -57,9 +69,9 @@ class Admin(Base):
     role = Column(String, default='editor')
     permissions = Column(JSON, nullable=True)
 
-    articles = relationship("NewsArticle", back_populates="admin")
-    sessions = relationship("AdminSession", back_populates="admin")
-    refresh_tokens = relationship("RefreshToken", back_populates="admin")
+    articles = relationship("NewsArticle", back_populates="admin", lazy=RELATIONSHIP_LOADING)
+    sessions = relationship("AdminSession", back_populates="admin", lazy=RELATIONSHIP_LOADING)
+    refresh_tokens = relationship("RefreshToken", back_populates="admin", lazy=RELATIONSHIP_LOADING)
 
 class UserSession(Base):
     __tablename__ = "user_sessions"
@@ -72,7 +84,11 @@ class UserSession(Base):
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
 
-    user = relationship("User", back_populates="sessions")
+    user = relationship("User", back_populates="sessions", lazy=RELATIONSHIP_LOADING)
+
+    __table_args__ = (
+        Index("ix_user_sessions_expires_at", expires_at),
+    )
 
 class AdminSession(Base):
     __tablename__ = "admin_sessions"
@@ -85,7 +101,11 @@ class AdminSession(Base):
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
 
-    admin = relationship("Admin", back_populates="sessions")
+    admin = relationship("Admin", back_populates="sessions", lazy=RELATIONSHIP_LOADING)
+
+    __table_args__ = (
+        Index("ix_admin_sessions_expires_at", expires_at),
+    )
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
@@ -99,8 +119,28 @@ class RefreshToken(Base):
     is_revoked = Column(Boolean, default=False)
     revoked_at = Column(DateTime, nullable=True)
 
-    user = relationship("User", back_populates="refresh_tokens")
-    admin = relationship("Admin", back_populates="refresh_tokens")
+    user = relationship("User", back_populates="refresh_tokens", lazy=RELATIONSHIP_LOADING)
+    admin = relationship("Admin", back_populates="refresh_tokens", lazy=RELATIONSHIP_LOADING)
+
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_id", user_id),
+        Index("ix_refresh_tokens_admin_id", admin_id),
+        Index("ix_refresh_tokens_expires_at", expires_at),
+        Index("ix_refresh_tokens_revoked_at", revoked_at, postgresql_where=is_revoked),
+    )
+
+class RevokedToken(Base):
+    """Revoked access token, kept until it would have expired (see app.token_denylist)"""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_revoked_tokens_expires_at", expires_at),
+        Index("ix_revoked_tokens_revoked_at", revoked_at),
+    )
 
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
@@ -113,6 +153,11 @@ class PasswordResetToken(Base):
     used_at = Column(DateTime, nullable=True)
     is_used = Column(Boolean, default=False)
 
+    __table_args__ = (
+        Index("ix_password_reset_tokens_email", email),
+        Index("ix_password_reset_tokens_expires_at", expires_at),
+    )
+
 class Doctor(Base):
     __tablename__ = "doctors"
 
@@ -120,6 +165,9 @@ class Doctor(Base):
     name = Column(String, nullable=False)
     specialty = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
+    # Weekly hours, e.g. {"monday": ["09:00-12:00", "13:00-17:00"]}; NULL means
+    # the clinic's default hours (see app.availability)
+    schedule = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -136,5 +184,26 @@ class Appointment(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
-    user = relationship("User", back_populates="appointments")
+    user = relationship("User", back_populates="appointments", lazy=RELATIONSHIP_LOADING)
     doctor_id = Column(Integer, ForeignKey("doctors.id"), nullable=True)
+
+    __table_args__ = (
+        Index("ix_appointments_user_id", user_id),
+        Index("ix_appointments_doctor_id_date", doctor_id, date),
+        Index("ix_appointments_date_id", date, id),
+        # Pending queue is a small, hot subset of all appointments
+        Index(
+            "ix_appointments_pending_date_id",
+            date, id,
+            postgresql_where=(status == "pending")
+        ),
+    )
+
+class SiteCounter(Base):
+    """Running totals for the admin dashboard, maintained by app.site_counters"""
+    __tablename__ = "site_counters"
+
+    name = Column(String, primary_key=True)
+    # Stripe of the counter; a counter's value is the sum over its slots
+    slot = Column(SmallInteger, primary_key=True, default=0, server_default="0")
+    value = Column(BigInteger, nullable=False, default=0, server_default="0")
@@ -0,0 +1,186 @@
+"""Bulk article import for content migrations.
+
+An upload (NDJSON, one article object per line, or CSV with a header row
+naming the ``NewsArticleCreate`` fields) is parsed and validated
+``IMPORT_CHUNK_SIZE`` rows at a time. Each chunk's valid rows are written
+with ``COPY`` (asyncpg's ``copy_records_to_table``) on the session's
+connection, so the whole upload lands in a single transaction with a
+single commit, instead of one ``POST /api/admin/news`` request, commit and
+refresh per article.
+
+Decoding, parsing and validation are CPU-bound, so each chunk is prepared
+in the threadpool and only the ``COPY`` runs on the event loop; other
+requests keep being served while a large upload is imported.
+
+``COPY`` bypasses the ORM, so the ``site_counters`` hook never sees these
+rows: the import bumps the counters itself before committing.
+
+With ``on_error="abort"`` (the default) nothing is written if any row is
+invalid; with ``"skip"`` the valid rows are imported. Either way the
+report lists every invalid row with its pydantic errors (the first
+``IMPORT_MAX_ERRORS`` of them).
+"""
+import csv
+import io
+import json
+import os
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from . import models, response_cache, schemas, site_counters
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(20 * 2**20)))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+FIELDS = list(schemas.NewsArticleCreate.model_fields)
+COPY_COLUMNS = FIELDS + ["admin_id", "created_at", "updated_at", "views_count"]
+
+class ImportFormatError(ValueError):
+    """The upload as a whole cannot be parsed (bad encoding, missing CSV header)"""
+
+class RowError(NamedTuple):
+    """A row the parser could not decode, in place of the row's value"""
+    message: str
+
+def parse_ndjson(text: str) -> Iterator[Tuple[int, object]]:
+    """(line number, decoded value or RowError) per non-blank line"""
+    for number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, RowError(f"Invalid JSON: {e.msg}")
+
+def parse_csv(text: str) -> Iterator[Tuple[int, object]]:
+    """(record number, row dict or RowError) per CSV record
+
+    Empty cells become missing fields and, as in NDJSON, columns that are
+    not ``NewsArticleCreate`` fields (e.g. those of an export) are ignored.
+    """
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    if not reader.fieldnames:
+        raise ImportFormatError("CSV upload has no header row")
+    for number, row in enumerate(reader, start=1):
+        # Extra cells land under the None key
+        if None in row:
+            yield number, RowError("Row has more cells than the header")
+            continue
+        yield number, {key: value for key, value in row.items() if value not in ("", None)}
+
+PARSERS = {"ndjson": parse_ndjson, "csv": parse_csv}
+
+def validate(number: int, raw) -> Tuple[Optional[schemas.NewsArticleCreate], Optional[dict]]:
+    """The validated article, or None and the row's error report"""
+    if isinstance(raw, RowError):
+        return None, {"row": number, "errors": [raw.message]}
+    if not isinstance(raw, dict):
+        return None, {"row": number, "errors": ["Expected an object"]}
+    try:
+        return schemas.NewsArticleCreate.model_validate(raw), None
+    except ValidationError as e:
+        return None, {
+            "row": number,
+            "errors": [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()]
+        }
+
+def _chunks(rows: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _naive_utc(value: datetime):
+    # The columns are timestamp without time zone, holding UTC
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+async def _copy(db: AsyncSession, records: List[tuple]):
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        models.NewsArticle.__tablename__, records=records, columns=COPY_COLUMNS
+    )
+
+class _Chunk(NamedTuple):
+    rows: int
+    records: List[tuple]
+    errors: List[dict]
+    deltas: Counter
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ImportFormatError(f"Upload is not valid UTF-8: {e.reason}") from e
+
+def _prepare(chunks: Iterator[list], admin_id: int, now: datetime) -> Optional[_Chunk]:
+    """Parse and validate the next chunk into COPY records, or None at the end"""
+    chunk = next(chunks, None)
+    if chunk is None:
+        return None
+    records, errors, deltas = [], [], Counter()
+    for number, raw in chunk:
+        article, error = validate(number, raw)
+        if error:
+            errors.append(error)
+            continue
+        fields = article.model_dump()
+        fields["date"] = _naive_utc(fields["date"]) or now
+        records.append(tuple(fields[name] for name in FIELDS) + (admin_id, now, now, 0))
+        deltas[site_counters.STATUS_PREFIX + article.status] += 1
+        deltas[site_counters.CATEGORY_PREFIX + article.category] += 1
+    return _Chunk(len(chunk), records, errors, deltas)
+
+async def import_articles(db: AsyncSession, data: bytes, fmt: str, admin_id: int, on_error: str = "abort") -> dict:
+    """Validate and load an upload in one transaction; returns the report"""
+    text = await run_in_threadpool(_decode, data)
+    chunks = _chunks(PARSERS[fmt](text), IMPORT_CHUNK_SIZE)
+
+    now = datetime.utcnow()
+    rows, imported, invalid = 0, 0, 0
+    errors: List[dict] = []
+    deltas = Counter()
+    try:
+        while True:
+            chunk = await run_in_threadpool(_prepare, chunks, admin_id, now)
+            if chunk is None:
+                break
+            rows += chunk.rows
+            invalid += len(chunk.errors)
+            errors.extend(chunk.errors[:IMPORT_MAX_ERRORS - len(errors)])
+            deltas.update(chunk.deltas)
+            # Past the first error an aborting import only validates
+            if chunk.records and not (invalid and on_error == "abort"):
+                await _copy(db, chunk.records)
+                imported += len(chunk.records)
+
+        if invalid and on_error == "abort":
+            await db.rollback()
+            imported = 0
+        elif imported:
+            deltas[site_counters.ARTICLES] = imported
+            await db.run_sync(lambda session: site_counters.bump(session, deltas))
+            await db.commit()
+            response_cache.invalidate_tags("news:list")
+    except BaseException:
+        await db.rollback()
+        raise
+
+    return {
+        "rows": rows,
+        "imported": imported,
+        "invalid": invalid,
+        "errors": errors,
+    }
@@ -0,0 +1,111 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token encoding the sort key and id of the
+last row of the previous page. Filtering on ``(sort_key, id) < cursor``
+lets the database seek straight to the next page instead of scanning and
+discarding ``skip`` rows, and pages stay stable when rows are inserted
+while a client is scrolling. Offset pagination (``skip``) is still applied
+when no cursor is given.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[object, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def _sort_value(sort_column, value):
+    # A cursor is client input: a value of the wrong type would otherwise
+    # only fail in the database
+    try:
+        expected = sort_column.type.python_type
+    except NotImplementedError:
+        return value
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return value
+
+def _keyset_query(query, sort_column, id_column, limit, cursor, skip, descending):
+    # Works on both ORM Query objects and select() statements
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        sort_value = _sort_value(sort_column, sort_value)
+        key = tuple_(sort_column, id_column)
+        bound = tuple_(sort_value, row_id)
+        query = query.filter(key < bound if descending else key > bound)
+    elif skip:
+        query = query.offset(skip)
+
+    # Fetch one extra row to know whether another page exists
+    return query.limit(max(limit, 0) + 1)
+
+def _split_page(rows, sort_column, id_column, limit: int):
+    next_cursor = None
+    if limit <= 0:
+        return [], None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+def keyset_page(
+    query,
+    sort_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False
+):
+    """Order ``query`` by (sort_column, id_column) and return one page.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    rows = _keyset_query(query, sort_column, id_column, limit, cursor, skip, descending).all()
+    return _split_page(rows, sort_column, id_column, limit)
+
+async def keyset_page_async(
+    db,
+    statement,
+    sort_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    descending: bool = False
+):
+    """``keyset_page`` for a ``select()`` statement run on an AsyncSession"""
+    statement = _keyset_query(statement, sort_column, id_column, limit, cursor, skip, descending)
+    rows = (await db.scalars(statement)).all()
+    return _split_page(rows, sort_column, id_column, limit)
@@ -1,4 +1,31 @@
+"""Password hashing service.
+
+Every password hash and check in the app goes through this module. The
+``*_async`` variants run bcrypt in a process pool so request handlers never
+block the event loop; the plain functions are kept for scripts and fixtures
+that run outside of a request.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
 import bcrypt
+from fastapi import HTTPException, status
+
+from . import metrics
+
+# Number of worker processes; 0 runs hashing on the default thread pool instead
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Maximum number of hash/verify jobs waiting or running before we shed load
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+_latencies = deque(maxlen=1024)
+_stats = {"completed": 0, "rejected": 0, "failed": 0}
 
 def get_password_hash(password: str) -> str:
     # Convert the password to bytes
@@ -14,4 +41,78 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     plain_password_bytes = plain_password.encode('utf-8')
     hashed_password_bytes = hashed_password.encode('utf-8')
     # Verify the password
-    return bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
\ No newline at end of file
+    return bcrypt.checkpw(plain_password_bytes, hashed_password_bytes)
+
+def _get_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if PASSWORD_HASH_WORKERS <= 0:
+        return None
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return _executor
+
+async def _run(func, *args):
+    """Run a bcrypt call off the event loop, rejecting work once the queue is full"""
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again",
+            headers={"Retry-After": "1"}
+        )
+
+    _pending += 1
+    start = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_get_executor(), func, *args)
+        _stats["completed"] += 1
+        return result
+    except Exception:
+        _stats["failed"] += 1
+        raise
+    finally:
+        _pending -= 1
+        _latencies.append(time.perf_counter() - start)
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop"""
+    return await _run(verify_password, plain_password, hashed_password)
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def get_metrics() -> dict:
+    """Queue depth and latency of the hashing service"""
+    latencies = list(_latencies)
+    workers = max(PASSWORD_HASH_WORKERS, 1)
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "in_flight": min(_pending, workers),
+        "queue_depth": max(_pending - workers, 0),
+        "completed": _stats["completed"],
+        "rejected": _stats["rejected"],
+        "failed": _stats["failed"],
+        "latency_ms_p50": round(_percentile(latencies, 0.50) * 1000, 2),
+        "latency_ms_p99": round(_percentile(latencies, 0.99) * 1000, 2),
+        "latency_ms_max": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+def shutdown_executor():
+    """Stop the worker processes (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+metrics.register("password_hashing", get_metrics)
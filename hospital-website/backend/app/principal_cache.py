@@ -0,0 +1,127 @@
+"""Cache of verified principals for the auth dependencies.
+
+``get_current_user`` / ``get_current_admin`` store the decoded JWT claims
+and a detached, read-only snapshot of the User/Admin row here, keyed by
+token, so repeated requests with the same token skip ``jwt.decode`` and the
+principal SELECT. Writes to users and admins must call ``invalidate_user``
+/ ``invalidate_admin`` so stale snapshots are never served.
+
+A lookup that loaded the row before a concurrent write committed could
+otherwise store its snapshot after the invalidation: callers take a
+``generation()`` before loading the row and pass it to ``store``, which
+drops the snapshot if the principal was invalidated since.
+"""
+import copy
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import inspect as sa_inspect
+
+from . import metrics
+from .ttl_cache import TTLCache
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+class PrincipalSnapshot:
+    """Read-only copy of the column values of a User or Admin row"""
+
+    def __init__(self, kind: str, obj):
+        data = {
+            attr.key: copy.deepcopy(getattr(obj, attr.key))
+            for attr in sa_inspect(obj).mapper.column_attrs
+        }
+        object.__setattr__(self, "kind", kind)
+        object.__setattr__(self, "_data", data)
+
+    def __getattr__(self, name):
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal snapshots are read-only")
+
+    def __repr__(self):
+        return f"<PrincipalSnapshot {self.kind} id={self._data.get('id')}>"
+
+# (kind, principal id) -> cache keys holding that principal
+_keys_by_principal = {}
+# (kind, principal id) -> generation of its last invalidation
+_invalidated_at = {}
+_generation = 0
+_index_lock = threading.Lock()
+_invalidations = 0
+
+def _on_remove(key, value):
+    _, principal = value
+    with _index_lock:
+        keys = _keys_by_principal.get((principal.kind, principal.id))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _keys_by_principal[(principal.kind, principal.id)]
+
+_cache = TTLCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS, on_remove=_on_remove)
+
+def lookup(kind: str, token: str) -> Optional[PrincipalSnapshot]:
+    """Return the cached principal for a token, or None on a miss"""
+    entry = _cache.get((kind, token))
+    return entry[1] if entry is not None else None
+
+def lookup_with_claims(kind: str, token: str) -> Optional[Tuple[dict, PrincipalSnapshot]]:
+    """Like ``lookup``, but returns (claims, principal)"""
+    return _cache.get((kind, token))
+
+def generation() -> int:
+    """Take before loading a principal; pass to ``store``"""
+    return _generation
+
+def store(kind: str, token: str, claims: dict, obj, generation: Optional[int] = None) -> PrincipalSnapshot:
+    """Snapshot a verified principal and cache it until the token or TTL expires
+
+    The snapshot is returned but not kept if the principal was invalidated
+    after ``generation`` was taken.
+    """
+    principal = PrincipalSnapshot(kind, obj)
+    exp = claims.get("exp")
+    ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+    key = (kind, token)
+    _cache.set(key, (dict(claims), principal), ttl=ttl)
+    with _index_lock:
+        _keys_by_principal.setdefault((kind, principal.id), set()).add(key)
+        # Checked after indexing the key: an invalidation from here on finds it
+        stale = generation is not None and _invalidated_at.get((kind, principal.id), -1) > generation
+    if stale:
+        _cache.pop(key)
+    return principal
+
+def _invalidate(kind: str, principal_id: int):
+    global _generation, _invalidations
+    with _index_lock:
+        _generation += 1
+        _invalidated_at[(kind, principal_id)] = _generation
+        keys = list(_keys_by_principal.get((kind, principal_id), ()))
+    for key in keys:
+        _cache.pop(key)
+    if keys:
+        _invalidations += 1
+
+def invalidate_user(user_id: int):
+    """Drop every cached token of a user"""
+    _invalidate("user", user_id)
+
+def invalidate_admin(admin_id: int):
+    """Drop every cached token of an admin"""
+    _invalidate("admin", admin_id)
+
+def clear():
+    _cache.clear()
+
+def get_metrics() -> dict:
+    return {**_cache.stats(), "invalidations": _invalidations}
+
+metrics.register("principal_cache", get_metrics)
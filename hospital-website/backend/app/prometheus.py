@@ -0,0 +1,69 @@
+"""Prometheus text exposition of the app's metrics.
+
+HTTP request metrics come from ``middleware.request_metrics``; every
+numeric value in the ``metrics`` registry (caches, pools, buffers) is
+exported as an ``app_<subsystem>_<name>`` gauge.
+"""
+import re
+from typing import List
+
+from . import metrics
+from .middleware import request_metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_invalid_name_chars = re.compile(r"[^a-zA-Z0-9_]")
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _http_metrics(lines: List[str]):
+    latency, statuses, in_flight = request_metrics.snapshot()
+
+    lines.append("# HELP http_requests_total Requests handled, by route template and status.")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route, status), count in sorted(statuses.items()):
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines.append("# HELP http_request_duration_seconds Request latency, by route template.")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for (method, route), histogram in sorted(latency.items()):
+        cumulative = 0
+        for bound, count in zip(request_metrics.LATENCY_BUCKETS, histogram.counts):
+            cumulative += count
+            labels = _labels(method=method, route=route, le=f"{bound:.6g}")
+            lines.append(f"http_request_duration_seconds_bucket{labels} {cumulative}")
+        labels = _labels(method=method, route=route, le="+Inf")
+        lines.append(f"http_request_duration_seconds_bucket{labels} {histogram.count}")
+        labels = _labels(method=method, route=route)
+        lines.append(f"http_request_duration_seconds_sum{labels} {_number(histogram.sum)}")
+        lines.append(f"http_request_duration_seconds_count{labels} {histogram.count}")
+
+    lines.append("# HELP http_requests_in_flight Requests currently being handled.")
+    lines.append("# TYPE http_requests_in_flight gauge")
+    for method, count in sorted(in_flight.items()):
+        lines.append(f"http_requests_in_flight{_labels(method=method)} {count}")
+
+def _app_metrics(lines: List[str]):
+    for subsystem, values in sorted(metrics.snapshot().items()):
+        if subsystem == "http":
+            continue  # already exported above
+        for key, value in sorted(values.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = _invalid_name_chars.sub("_", f"app_{subsystem}_{key}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_number(value)}")
+
+def render() -> str:
+    lines: List[str] = []
+    _http_metrics(lines)
+    _app_metrics(lines)
+    return "\n".join(lines) + "\n"
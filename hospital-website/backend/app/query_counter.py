@@ -0,0 +1,178 @@
+"""Per-request SQL statement counts and N+1 detection.
+
+A ``before_cursor_execute`` listener on every engine records each
+statement, its parameters and its duration in the ``QueryLog`` of the
+current request (a context variable, opened by ``RequestMetricsMiddleware``
+or by ``capture()`` in tests and scripts). The same statement text run
+``SQL_N_PLUS_ONE_THRESHOLD`` or more times with different parameters is
+the signature of a lazy load inside a loop. Transaction commits are
+counted too. ``observe_requests()`` hands finished request logs to the
+caller, whichever thread served them (the query budget tests use it).
+
+These are the only cursor listeners: the statement duration they measure
+is also added to the request's ``Server-Timing`` ``db`` entry.
+
+``SQL_QUERY_CHECK`` selects the mode:
+
+* ``off``    - nothing is recorded (default);
+* ``debug``  - requests are logged with a warning when they look like N+1;
+* ``strict`` - as ``debug``, and the relationships in ``models`` are
+  configured with ``raise_on_sql`` so an accidental lazy load raises
+  instead of querying. The test suite runs in this mode.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from . import metrics, server_timing
+
+SQL_QUERY_CHECK = os.getenv("SQL_QUERY_CHECK", "off").lower()
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "3"))
+
+# Loader strategy for the relationships in models.py
+RELATIONSHIP_LOADING = "raise_on_sql" if SQL_QUERY_CHECK == "strict" else "select"
+
+logger = logging.getLogger(__name__)
+
+class QueryLog:
+    """Statements executed within one request (or ``capture()`` block)"""
+
+    __slots__ = ("statements", "seconds", "commits")
+
+    def __init__(self):
+        # (statement, parameters as passed to the cursor); the parameters
+        # are only repr()'d when a report needs them
+        self.statements: List[Tuple[str, object]] = []
+        self.seconds = 0.0
+        self.commits = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def add(self, statement: str, parameters, seconds: float):
+        self.statements.append((statement, parameters))
+        self.seconds += seconds
+
+    def repeated(self, threshold: int = None) -> List[Tuple[str, int]]:
+        """Statements run with at least ``threshold`` distinct parameter sets"""
+        threshold = threshold or SQL_N_PLUS_ONE_THRESHOLD
+        distinct: Dict[str, set] = {}
+        for statement, parameters in self.statements:
+            distinct.setdefault(statement, set()).add(repr(parameters))
+        return [
+            (statement, len(parameters))
+            for statement, parameters in distinct.items()
+            if len(parameters) >= threshold
+        ]
+
+    def format(self) -> str:
+        return "\n".join(
+            f"{number:3d}. {statement}  {parameters!r}"
+            for number, (statement, parameters) in enumerate(self.statements, 1)
+        )
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+_observers: List[list] = []
+_stats = {"requests": 0, "statements": 0, "db_seconds": 0.0, "n_plus_one": 0}
+
+def enabled() -> bool:
+    return SQL_QUERY_CHECK in ("debug", "strict")
+
+def current() -> Optional[QueryLog]:
+    return _current.get()
+
+@contextmanager
+def observe_requests():
+    """Collect ``(label, QueryLog)`` for each request finished in this block"""
+    finished = []
+    _observers.append(finished)
+    try:
+        yield finished
+    finally:
+        _observers.remove(finished)
+
+@contextmanager
+def capture():
+    """Record the statements executed in this context, whatever the mode"""
+    log = QueryLog()
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+def begin():
+    """Open the request's log; returns a token for ``end``"""
+    if not (enabled() or _observers):
+        return None
+    return _current.set(QueryLog())
+
+def end(token, label: str):
+    """Close the request's log, update the totals and warn about N+1 patterns"""
+    if token is None:
+        return
+    log = _current.get()
+    _current.reset(token)
+    for finished in _observers:
+        finished.append((label, log))
+    if not enabled():
+        return
+    _stats["requests"] += 1
+    _stats["statements"] += log.count
+    _stats["db_seconds"] += log.seconds
+    repeated = log.repeated()
+    if repeated:
+        _stats["n_plus_one"] += 1
+        for statement, times in repeated:
+            logger.warning(
+                "Possible N+1 in %s: statement run %d times with different parameters "
+                "(%d statements, %.1fms in total): %s",
+                label, times, log.count, log.seconds * 1000, statement
+            )
+
+def get_metrics() -> dict:
+    requests = _stats["requests"]
+    return {
+        **_stats,
+        "db_seconds": round(_stats["db_seconds"], 3),
+        "statements_per_request": round(_stats["statements"] / requests, 2) if requests else 0.0,
+    }
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None or server_timing.current() is not None:
+        conn.info.setdefault("query_log_starts", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_log_starts")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    log = _current.get()
+    if log is not None:
+        log.add(statement, parameters, seconds)
+    timings = server_timing.current()
+    if timings is not None:
+        timings.add("db", seconds)
+
+@event.listens_for(Engine, "commit")
+def _commit(conn):
+    log = _current.get()
+    if log is not None:
+        log.commits += 1
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_log_starts"):
+        connection.info["query_log_starts"].pop()
+
+metrics.register("sql", get_metrics)
@@ -0,0 +1,179 @@
+"""Response cache for public GET endpoints.
+
+``@cached(...)`` stores the serialized JSON body of a route, keyed by path
+and query string, with a TTL and an LRU size bound. Each entry carries
+tags (e.g. ``news:list``, ``news:42``) and write paths call
+``invalidate_tags`` to purge everything that depends on the data they
+changed. A hit returns the stored bytes before the endpoint body runs, so
+it never touches the database: dependencies named in ``defer`` (the DB
+session) are left out of the route's signature and only opened on a miss.
+
+A miss that read the data before a concurrent write committed could
+otherwise store its response after the purge, so an entry is dropped
+again if any of its tags was invalidated while it was being built.
+
+Purges are per process; with several workers the TTL bounds how long
+another worker can serve an entry after an admin edit.
+"""
+import functools
+import inspect
+import os
+import threading
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi import Request, Response, params
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics
+from .ttl_cache import TTLCache
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+_keys_by_tag = {}
+# tag -> generation of its last invalidation
+_invalidated_at = {}
+_generation = 0
+_index_lock = threading.Lock()
+_stats = {"invalidations": 0}
+
+def _on_remove(key, entry):
+    with _index_lock:
+        for tag in entry["tags"]:
+            keys = _keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del _keys_by_tag[tag]
+
+_cache = TTLCache(RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS, on_remove=_on_remove)
+
+def cache_key(request: Request) -> tuple:
+    return (request.url.path, tuple(sorted(request.query_params.multi_items())))
+
+def invalidate_tags(*tags: str):
+    """Purge every cached response carrying any of the tags"""
+    global _generation
+    with _index_lock:
+        _generation += 1
+        keys = set()
+        for tag in tags:
+            _invalidated_at[tag] = _generation
+            keys |= _keys_by_tag.get(tag, set())
+    for key in keys:
+        _cache.pop(key)
+    _stats["invalidations"] += 1
+
+def clear():
+    _cache.clear()
+
+def get_metrics() -> dict:
+    return {**_cache.stats(), **_stats}
+
+def _store(key, body: bytes, headers: dict, tags: Iterable[str], ttl: Optional[float], generation: int):
+    tags = tuple(tags)
+    _cache.set(key, {"body": body, "headers": headers, "tags": tags}, ttl=ttl)
+    with _index_lock:
+        for tag in tags:
+            _keys_by_tag.setdefault(tag, set()).add(key)
+        # Checked after indexing the key: an invalidation from here on finds it
+        stale = any(_invalidated_at.get(tag, -1) > generation for tag in tags)
+    if stale:
+        _cache.pop(key)
+
+@asynccontextmanager
+async def _open_deferred(request: Request, deferred: Dict[str, Callable]):
+    """Resolve parameterless dependencies as FastAPI would, honouring overrides"""
+    async with AsyncExitStack() as stack:
+        resolved = {}
+        for name, dependency in deferred.items():
+            dependency = request.app.dependency_overrides.get(dependency, dependency)
+            if inspect.isasyncgenfunction(dependency):
+                resolved[name] = await stack.enter_async_context(asynccontextmanager(dependency)())
+            elif inspect.isgeneratorfunction(dependency):
+                resolved[name] = stack.enter_context(contextmanager(dependency)())
+            elif inspect.iscoroutinefunction(dependency):
+                resolved[name] = await dependency()
+            else:
+                resolved[name] = dependency()
+        yield resolved
+
+def cached(
+    response_model,
+    tags: Iterable[str],
+    ttl: Optional[float] = None,
+    on_hit: Optional[Callable] = None,
+    defer: Iterable[str] = ("db",)
+):
+    """Cache a GET route's JSON response.
+
+    ``response_model`` must match the route's; it is used to serialize the
+    endpoint's return value once, on a miss. ``tags`` may reference path
+    parameters, e.g. ``"news:{article_id}"``. ``on_hit`` is called with the
+    endpoint's keyword arguments when a cached response is served, for side
+    effects that must still happen (such as counting a view). ``defer``
+    names ``Depends`` parameters, taking no parameters of their own, that
+    are resolved only on a miss.
+    """
+    adapter = TypeAdapter(response_model)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        deferred = {
+            name: param.default.dependency
+            for name, param in signature.parameters.items()
+            if name in defer and isinstance(param.default, params.Depends)
+        }
+        signature = signature.replace(parameters=[
+            param for name, param in signature.parameters.items() if name not in deferred
+        ])
+        request_param = next(
+            (name for name, param in signature.parameters.items() if param.annotation is Request),
+            None
+        )
+        if request_param is None:
+            # Ask FastAPI for the request without changing the endpoint's own signature
+            request_param = "_cache_request"
+            signature = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(request_param, inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            request = kwargs[request_param]
+            endpoint_kwargs = {k: v for k, v in kwargs.items() if k != "_cache_request"}
+            key = cache_key(request)
+
+            entry = _cache.get(key)
+            if entry is not None:
+                if on_hit is not None:
+                    on_hit(**endpoint_kwargs)
+                return Response(entry["body"], media_type="application/json", headers=entry["headers"])
+
+            generation = _generation
+            async with _open_deferred(request, deferred) as resolved:
+                if inspect.iscoroutinefunction(func):
+                    result = await func(**endpoint_kwargs, **resolved)
+                else:
+                    result = await run_in_threadpool(func, **endpoint_kwargs, **resolved)
+            if isinstance(result, Response):
+                return result
+
+            body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            # Keep headers the endpoint set on an injected Response (e.g. X-Next-Cursor)
+            headers = {}
+            for value in endpoint_kwargs.values():
+                if isinstance(value, Response):
+                    headers.update((k, v) for k, v in value.headers.items() if k != "content-length")
+            _store(key, body, headers, [tag.format(**endpoint_kwargs) for tag in tags], ttl, generation)
+            return Response(body, media_type="application/json", headers=headers)
+
+        wrapper.__signature__ = signature
+        return wrapper
+
+    return decorator
+
+metrics.register("response_cache", get_metrics)
@@ -1,27 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from .. import crud, models, schemas
-from ..database import get_db
-from ..auth_utils import get_current_admin, get_password_hash
+from .. import async_crud, crud, exports, login_activity, models, news_import, schemas
+from ..database import get_async_db
+from ..auth_utils import get_current_admin, optional_oauth2_scheme, revoke_access_token
+from ..password_utils import hash_password_async, verify_password_async
+from .. import metrics, principal_cache, response_cache
+from ..server_timing import TimedRoute
 from datetime import datetime
-from sqlalchemy import func
+import logging
 import secrets
-import bcrypt
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/api/admin",
-    tags=["admin"]
+    tags=["admin"],
+    route_class=TimedRoute
 )
 
 # Admin Authentication
 @router.post("/login", response_model=schemas.TokenResponse)
 async def admin_login(
     form_data: schemas.AdminLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    admin = crud.authenticate_admin(db, form_data.username, form_data.password)
-    if not admin:
+    admin = await async_crud.get_admin_by_username(db, form_data.username)
+    if not admin or not await verify_password_async(form_data.password, admin.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -31,7 +36,8 @@ async def admin_login(
     refresh_token = secrets.token_urlsafe(32)
     
     # Create refresh token in database
-    crud.create_admin_refresh_token(db, admin.id, refresh_token)
+    await async_crud.create_admin_refresh_token(db, admin.id, refresh_token)
+    login_activity.record_login("admin", admin.id)
     
     return {
         "access_token": access_token,
@@ -44,11 +50,12 @@ async def admin_login(
 async def get_all_news(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
-    total = crud.get_news_articles_count(db)
-    articles = crud.get_news_articles(db, skip=skip, limit=limit)
+    total = await async_crud.get_news_articles_count(db)
+    articles, next_cursor = await async_crud.get_news_articles_page(db, skip=skip, limit=limit, cursor=cursor)
     
     # Convert SQLAlchemy models to dictionaries with admin fields
     articles_list = [
@@ -70,30 +77,60 @@ async def get_all_news(
         "total": total,
         "items": articles_list,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
 @router.post("/news", response_model=schemas.NewsArticle)
 async def create_news_article(
     article: schemas.NewsArticleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
-    db_article = crud.create_news_article(db, article, current_admin.id)
+    db_article = await async_crud.create_news_article(db, article, current_admin.id)
     # Convert the SQLAlchemy model instance to a Pydantic model
     return schemas.NewsArticle.from_orm(db_article)
 
+@router.post("/news/import", response_model=schemas.NewsImportReport)
+async def import_news_articles(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    on_error: str = Query("abort", pattern="^(abort|skip)$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """Bulk-load articles from an NDJSON or CSV request body in one transaction
+
+    The format comes from ``?format=`` or else the Content-Type. With
+    ``on_error=abort`` nothing is imported if any row is invalid.
+    """
+    if fmt is None:
+        content_type = request.headers.get("content-type", "")
+        fmt = "csv" if content_type.startswith("text/csv") else "ndjson"
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > news_import.IMPORT_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload exceeds {news_import.IMPORT_MAX_BYTES} bytes; split it into several imports"
+            )
+    try:
+        return await news_import.import_articles(db, bytes(data), fmt, current_admin.id, on_error)
+    except news_import.ImportFormatError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @router.put("/news/{article_id}", response_model=schemas.AdminNewsArticle)
 async def update_article(
     article_id: int,
     article: schemas.NewsArticleUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Update a news article"""
     try:
         # Check if article exists
-        db_article = crud.get_news_article(db, article_id)
+        db_article = await async_crud.get_news_article(db, article_id)
         if not db_article:
             raise HTTPException(
                 status_code=404,
@@ -122,14 +159,14 @@ async def update_article(
         if article.status is not None:
             update_data["status"] = article.status
             
-        print(f"Update data received: {update_data}")  # Debug log
+        logger.debug("Update data received: %s", update_data)
         
         # Update the article object
         for key, value in update_data.items():
             setattr(db_article, key, value)
         
-        db.commit()
-        db.refresh(db_article)
+        await db.commit()
+        response_cache.invalidate_tags("news:list", f"news:{article_id}")
         
         return schemas.AdminNewsArticle(
             id=db_article.id,
@@ -145,7 +182,7 @@ async def update_article(
         
     except Exception as e:
         print(f"Error updating article: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=str(e)
@@ -154,11 +191,11 @@ async def update_article(
 @router.delete("/news/{article_id}")
 async def delete_news_article(
     article_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     # First check if article exists, including drafts
-    article = crud.get_news_article(db, article_id, include_drafts=True)
+    article = await async_crud.get_news_article(db, article_id)
     if not article:
         raise HTTPException(
             status_code=404,
@@ -172,7 +209,7 @@ async def delete_news_article(
             detail="Not authorized to delete this article"
         )
     
-    crud.delete_news_article(db, article_id)
+    await async_crud.delete_news_article(db, article_id)
     return {"message": "Article deleted successfully"}
 
 # Admin Profile Management
@@ -185,34 +222,43 @@ async def get_admin_profile(
 @router.put("/profile", response_model=schemas.Admin)
 async def update_admin_profile(
     profile: schemas.AdminUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
-    return crud.update_admin(db, current_admin.id, profile)
+    # Activation and permissions are managed through /admins/{admin_id}
+    update_data = profile.model_dump(exclude_unset=True, include={"username", "email", "password"})
+    if update_data.get("password") is not None:
+        update_data["password_hash"] = await hash_password_async(update_data.pop("password"))
+    return await async_crud.update_admin(db, current_admin.id, update_data)
 
 # Categories
 @router.get("/categories", response_model=List[str])
 async def get_categories(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
-    return crud.get_news_categories(db)
+    return await async_crud.get_news_categories(db)
 
 # Statistics
 @router.get("/statistics", response_model=schemas.AdminStatistics)
 async def get_statistics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
-    return crud.get_admin_statistics(db)
+    stats = await async_crud.get_admin_statistics(db)
+    return {
+        "totalUsers": stats["total_users"],
+        "totalArticles": stats["total_articles"],
+        "totalViews": stats["total_views"]
+    }
 
 @router.get("/users", response_model=List[schemas.UserResponse])
 async def get_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Get all users (admin only)"""
-    users = db.query(models.User).all()
+    users = await async_crud.get_users(db)
     return [
         schemas.UserResponse(
             id=user.id,
@@ -226,31 +272,71 @@ async def get_users(
         for user in users
     ]
 
+# Exports (streamed; see app.exports)
+
+@router.get("/export/users")
+async def export_users(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    is_active: Optional[bool] = None,
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """Stream users as NDJSON or CSV, filtered by signup date [date_from, date_to)"""
+    return exports.export_response(exports.users_query(date_from, date_to, is_active), fmt, "users")
+
+@router.get("/export/appointments")
+async def export_appointments(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[List[str]] = Query(None),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """Stream appointments as NDJSON or CSV, filtered by date [date_from, date_to) and status"""
+    return exports.export_response(exports.appointments_query(date_from, date_to, status), fmt, "appointments")
+
+@router.get("/export/news")
+async def export_news(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status: Optional[List[str]] = Query(None),
+    category: Optional[str] = None,
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """Stream articles as NDJSON or CSV, filtered by date [date_from, date_to), status and category"""
+    return exports.export_response(exports.articles_query(date_from, date_to, status, category), fmt, "news")
+
+@router.get("/metrics")
+async def get_metrics(
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """Runtime metrics of the app's subsystems (admin only)"""
+    return metrics.snapshot()
+
 @router.get("/stats", response_model=schemas.AdminStatistics)
 async def get_admin_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
-    total_users = db.query(models.User).count()
-    total_articles = db.query(models.NewsArticle).count()
-    total_views = db.query(func.sum(models.NewsArticle.views_count)).scalar() or 0
-
+    stats = await async_crud.get_admin_statistics(db)
     return {
-        "totalUsers": total_users,
-        "totalArticles": total_articles,
-        "totalViews": total_views
+        "totalUsers": stats["total_users"],
+        "totalArticles": stats["total_articles"],
+        "totalViews": stats["total_views"]
     }
 
 @router.post("/users", response_model=schemas.UserResponse)
 async def create_user(
     user: schemas.UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Create a new user (admin only)"""
     try:
         # Check if email already exists
-        db_user = crud.get_user_by_email(db, user.email)
+        db_user = await async_crud.get_user_by_email(db, user.email)
         if db_user:
             raise HTTPException(
                 status_code=400,
@@ -258,7 +344,7 @@ async def create_user(
             )
         
         # Create new user
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await hash_password_async(user.password)
         
         new_user = models.User(
             name=user.name,
@@ -269,8 +355,7 @@ async def create_user(
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
         
         return schemas.UserResponse(
             id=new_user.id,
@@ -286,7 +371,7 @@ async def create_user(
         raise e
     except Exception as e:
         print(f"Error creating user: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error creating user: {str(e)}"
@@ -295,25 +380,26 @@ async def create_user(
 @router.delete("/users/{user_id}")
 async def delete_regular_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Delete a regular user"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await async_crud.get_user(db, user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="User not found"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    principal_cache.invalidate_user(user_id)
     return {"message": "User deleted successfully"}
 
 @router.delete("/admins/{admin_id}")
 async def delete_admin(
     admin_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Delete an admin user"""
@@ -324,25 +410,29 @@ async def delete_admin(
             detail="Cannot delete your own admin account"
         )
     
-    admin = db.query(models.Admin).filter(models.Admin.id == admin_id).first()
+    admin = await async_crud.get_admin_by_id(db, admin_id)
     if not admin:
         raise HTTPException(
             status_code=404,
             detail="Admin not found"
         )
     
-    db.delete(admin)
-    db.commit()
+    await db.delete(admin)
+    await db.commit()
+    principal_cache.invalidate_admin(admin_id)
     return {"message": "Admin deleted successfully"}
 
 @router.post("/logout")
 async def admin_logout(
     token: schemas.RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    access_token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Logout admin user without requiring authentication"""
     try:
-        crud.revoke_refresh_token(db, token.refresh_token)
+        await async_crud.revoke_refresh_token(db, token.refresh_token)
+        if access_token:
+            await revoke_access_token(db, access_token)
     except Exception as e:
         # Log the error but don't fail the logout
         print(f"Error revoking token: {e}")
@@ -353,11 +443,11 @@ async def admin_logout(
 
 @router.get("/admins", response_model=List[schemas.AdminResponse])
 async def get_admins(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Get all admins (admin only)"""
-    admins = db.query(models.Admin).all()
+    admins = await async_crud.get_admins(db)
     return [
         schemas.AdminResponse(
             id=admin.id,
@@ -374,11 +464,11 @@ async def get_admins(
 
 @router.get("/users", response_model=List[schemas.UserResponse])
 async def get_regular_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Get all regular users"""
-    users = db.query(models.User).all()
+    users = await async_crud.get_users(db)
     return [
         {
             "id": user.id,
@@ -395,62 +485,49 @@ async def get_regular_users(
 async def update_user(
     user_id: int,
     user: schemas.UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Update a user (admin only)"""
-    db_user = crud.get_user(db, user_id)
+    update_data = user.model_dump(exclude_unset=True)
+    if update_data.get("password") is not None:
+        update_data["hashed_password"] = await hash_password_async(update_data.pop("password"))
+    db_user = await async_crud.update_user(db, user_id, update_data)
     if not db_user:
         raise HTTPException(
             status_code=404,
             detail="User not found"
         )
-    
-    for key, value in user.model_dump(exclude_unset=True).items():
-        setattr(db_user, key, value)
-    
-    db.commit()
-    db.refresh(db_user)
     return schemas.UserResponse.from_user(db_user)
 
 @router.put("/admins/{admin_id}", response_model=schemas.AdminResponse)
 async def update_admin(
     admin_id: int,
     admin: schemas.AdminUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Update an admin user"""
-    db_admin = crud.get_admin(db, admin_id)
+    update_data = admin.model_dump(exclude_unset=True)
+    if update_data.get("password") is not None:
+        update_data["password_hash"] = await hash_password_async(update_data.pop("password"))
+    db_admin = await async_crud.update_admin(db, admin_id, update_data)
     if not db_admin:
         raise HTTPException(
             status_code=404,
             detail="Admin not found"
         )
-    
-    for key, value in admin.model_dump(exclude_unset=True).items():
-        setattr(db_admin, key, value)
-    
-    db.commit()
-    db.refresh(db_admin)
     return schemas.AdminResponse.from_orm(db_admin)
 
 @router.patch("/admins/{admin_id}", response_model=schemas.AdminResponse)
 async def patch_admin(
     admin_id: int,
     admin: schemas.AdminUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Update an admin user"""
     try:
-        db_admin = crud.get_admin_by_id(db, admin_id)
-        if not db_admin:
-            raise HTTPException(
-                status_code=404,
-                detail="Admin not found"
-            )
-        
         # Create update_data dictionary manually from non-None values
         update_data = {}
         if admin.username is not None:
@@ -458,24 +535,20 @@ async def patch_admin(
         if admin.email is not None:
             update_data["email"] = admin.email
         if admin.password is not None:
-            hashed_password = bcrypt.hashpw(
-                admin.password.encode('utf-8'), 
-                bcrypt.gensalt()
-            )
-            update_data["password_hash"] = hashed_password.decode('utf-8')
+            update_data["password_hash"] = await hash_password_async(admin.password)
         if admin.is_active is not None:
             update_data["is_active"] = admin.is_active
         if admin.permissions is not None:
             update_data["permissions"] = admin.permissions
             
-        print(f"Update data received: {update_data}")  # Debug log
+        logger.debug("Update data received: %s", {key: value for key, value in update_data.items() if key != "password_hash"})
         
-        # Update the admin object
-        for key, value in update_data.items():
-            setattr(db_admin, key, value)
-        
-        db.commit()
-        db.refresh(db_admin)
+        db_admin = await async_crud.update_admin(db, admin_id, update_data)
+        if not db_admin:
+            raise HTTPException(
+                status_code=404,
+                detail="Admin not found"
+            )
         
         return schemas.AdminResponse(
             id=db_admin.id,
@@ -489,7 +562,7 @@ async def patch_admin(
         )
     except Exception as e:
         print(f"Error updating admin: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=str(e)
@@ -499,18 +572,11 @@ async def patch_admin(
 async def patch_user(
     user_id: int,
     user: schemas.UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Update a user (admin only)"""
     try:
-        db_user = crud.get_user(db, user_id)
-        if not db_user:
-            raise HTTPException(
-                status_code=404,
-                detail="User not found"
-            )
-        
         # Create update_data dictionary manually from non-None values
         update_data = {}
         if user.name is not None:
@@ -518,20 +584,20 @@ async def patch_user(
         if user.email is not None:
             update_data["email"] = user.email
         if user.password is not None:
-            update_data["hashed_password"] = get_password_hash(user.password)
+            update_data["hashed_password"] = await hash_password_async(user.password)
         if user.is_active is not None:
             update_data["is_active"] = user.is_active
         if user.phone is not None:
             update_data["phone"] = user.phone
             
-        print(f"Update data received: {update_data}")  # Debug log
-        
-        # Update the user object
-        for key, value in update_data.items():
-            setattr(db_user, key, value)
+        logger.debug("Update data received: %s", {key: value for key, value in update_data.items() if key != "hashed_password"})
         
-        db.commit()
-        db.refresh(db_user)
+        db_user = await async_crud.update_user(db, user_id, update_data)
+        if not db_user:
+            raise HTTPException(
+                status_code=404,
+                detail="User not found"
+            )
         
         return schemas.UserResponse(
             id=db_user.id,
@@ -548,13 +614,13 @@ async def patch_user(
 @router.post("/admins", response_model=schemas.AdminResponse)
 async def create_admin(
     admin: schemas.AdminCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.Admin = Depends(get_current_admin)
 ):
     """Create a new admin"""
     try:
         # Check if username already exists
-        db_admin = crud.get_admin_by_username(db, admin.username)
+        db_admin = await async_crud.get_admin_by_username(db, admin.username)
         if db_admin:
             raise HTTPException(
                 status_code=400,
@@ -562,7 +628,7 @@ async def create_admin(
             )
         
         # Check if email already exists
-        db_admin = crud.get_admin_by_email(db, admin.email)
+        db_admin = await async_crud.get_admin_by_email(db, admin.email)
         if db_admin:
             raise HTTPException(
                 status_code=400,
@@ -570,23 +636,17 @@ async def create_admin(
             )
         
         # Create new admin
-        hashed_password = bcrypt.hashpw(
-            admin.password.encode('utf-8'), 
-            bcrypt.gensalt()
-        )
-        
         new_admin = models.Admin(
             username=admin.username,
             email=admin.email,
-            password_hash=hashed_password.decode('utf-8'),
+            password_hash=await hash_password_async(admin.password),
             permissions=admin.permissions,
             is_active=admin.is_active,
             role=admin.role
         )
         
         db.add(new_admin)
-        db.commit()
-        db.refresh(new_admin)
+        await db.commit()
         
         return schemas.AdminResponse(
             id=new_admin.id,
@@ -603,7 +663,7 @@ async def create_admin(
         raise e
     except Exception as e:
         print(f"Error creating admin: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error creating admin: {str(e)}"
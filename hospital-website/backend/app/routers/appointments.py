@@ -1,22 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from .. import crud, models, schemas
-from ..database import get_db
+from datetime import datetime
+from .. import async_crud, auto_assign, availability, models, schemas
+from ..database import get_async_db
 from ..auth_utils import get_current_user, get_current_admin
+from ..pagination import NEXT_CURSOR_HEADER
+from ..server_timing import TimedRoute
 import logging
 
 router = APIRouter(
     prefix="/api/appointments",
-    tags=["appointments"]
+    tags=["appointments"],
+    route_class=TimedRoute
 )
 
 @router.post("/", response_model=schemas.Appointment, status_code=status.HTTP_201_CREATED)
 async def create_appointment_endpoint(
     appointment: schemas.AppointmentCreate,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new appointment"""
     try:
@@ -29,7 +33,7 @@ async def create_appointment_endpoint(
         }
         
         # Create appointment
-        db_appointment = crud.create_appointment(
+        db_appointment = await async_crud.create_appointment(
             db=db,
             appointment=appointment_data
         )
@@ -42,6 +46,8 @@ async def create_appointment_endpoint(
             "status": db_appointment.status,
             "user_id": db_appointment.user_id
         }
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -50,9 +56,9 @@ async def create_appointment_endpoint(
 
 @router.post("/admin", response_model=schemas.Appointment, status_code=status.HTTP_201_CREATED)
 async def create_appointment_admin(
-    appointment: schemas.AppointmentCreate,
+    appointment: schemas.AdminAppointmentCreate,
     current_admin: models.User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create an appointment (admin only)"""
     try:
@@ -60,12 +66,14 @@ async def create_appointment_admin(
         appointment_data = appointment.dict()
         
         # Create appointment
-        db_appointment = crud.create_appointment(
+        db_appointment = await async_crud.create_appointment(
             db=db,
             appointment=appointment_data
         )
         
         return db_appointment
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -74,38 +82,74 @@ async def create_appointment_admin(
 
 @router.get("/", response_model=List[schemas.Appointment])
 async def read_appointments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    appointments = crud.get_appointments(db, skip=skip, limit=limit, status=status)
+    appointments, next_cursor = await async_crud.get_appointments_page(
+        db, skip=skip, limit=limit, status=status, cursor=cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return appointments
 
 @router.get("/pending", response_model=List[schemas.Appointment])
 async def read_pending_appointments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    appointments = crud.get_appointments(db, skip=skip, limit=limit, status="pending")
+    appointments, next_cursor = await async_crud.get_appointments_page(
+        db, skip=skip, limit=limit, status="pending", cursor=cursor
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return appointments
 
+@router.get("/availability", response_model=List[schemas.AvailableSlot])
+async def read_availability(
+    specialty: str,
+    count: int = Query(5, ge=1, le=100),
+    after: Optional[datetime] = None
+):
+    """Next free slots with doctors of a specialty, earliest first (served from app.availability)"""
+    await availability.ready()
+    return availability.next_free_slots(specialty, count, after)
+
 @router.post("/{appointment_id}/assign", response_model=schemas.Appointment)
 async def assign_doctor(
     appointment_id: int,
     doctor_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.assign_doctor_to_appointment(
+    return await async_crud.assign_doctor_to_appointment(
         db=db,
         appointment_id=appointment_id,
         doctor_id=doctor_id
     )
 
+@router.post("/admin/auto-assign", response_model=schemas.AutoAssignReport)
+async def auto_assign_appointments(
+    request: schemas.AutoAssignRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: models.Admin = Depends(get_current_admin)
+):
+    """Assign the pending appointments of a window to the least-loaded free doctors (admin only)
+
+    The window defaults to the next two weeks; ``dry_run`` only reports the plan.
+    """
+    return await auto_assign.auto_assign(
+        db, request.date_from, request.date_to, request.limit, request.specialty, request.dry_run
+    )
+
 @router.get("/{appointment_id}", response_model=schemas.Appointment)
-async def read_appointment(appointment_id: int, db: Session = Depends(get_db)):
-    appointment = crud.get_appointment(db, appointment_id=appointment_id)
+async def read_appointment(appointment_id: int, db: AsyncSession = Depends(get_async_db)):
+    appointment = await async_crud.get_appointment(db, appointment_id=appointment_id)
     if appointment is None:
         raise HTTPException(status_code=404, detail="Appointment not found")
     return appointment
@@ -114,34 +158,34 @@ async def read_appointment(appointment_id: int, db: Session = Depends(get_db)):
 async def update_appointment(
     appointment_id: int,
     appointment: schemas.AppointmentUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.update_appointment(db=db, appointment_id=appointment_id, appointment=appointment)
+    return await async_crud.update_appointment(db=db, appointment_id=appointment_id, appointment=appointment)
 
 @router.patch("/{appointment_id}", response_model=schemas.Appointment)
 async def patch_appointment(
     appointment_id: int,
     appointment: schemas.AppointmentUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return crud.update_appointment(db=db, appointment_id=appointment_id, appointment=appointment)
+    return await async_crud.update_appointment(db=db, appointment_id=appointment_id, appointment=appointment)
 
 @router.delete("/{appointment_id}", response_model=schemas.Appointment)
 async def delete_appointment(
     appointment_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cancel an appointment"""
-    return crud.delete_appointment(db=db, appointment_id=appointment_id)
+    return await async_crud.delete_appointment(db=db, appointment_id=appointment_id)
 
 @router.get("/user/appointments", response_model=List[schemas.Appointment])
 async def read_user_appointments(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user)
 ):
     """Get appointments for the currently logged-in user"""
     try:
-        appointments = crud.get_user_appointments(db, user_id=current_user.id)
+        appointments = await async_crud.get_user_appointments(db, user_id=current_user.id)
         return appointments
     except Exception as e:
         logging.error(f"Error fetching user appointments: {str(e)}")
@@ -152,15 +196,21 @@ async def read_user_appointments(
 
 @router.get("/admin/all", response_model=List[schemas.Appointment])
 async def read_all_appointments(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_admin: models.User = Depends(get_current_admin)
 ):
     """Get all appointments (admin only)"""
     try:
-        appointments = crud.get_appointments(db, skip=skip, limit=limit, status=status)
+        appointments, next_cursor = await async_crud.get_appointments_page(
+            db, skip=skip, limit=limit, status=status, cursor=cursor
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
         # Convert appointments to response format
         return [
@@ -173,14 +223,10 @@ async def read_all_appointments(
             }
             for appointment in appointments
         ]
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
-
-def get_user_appointments(db: Session, user_id: int):
-    """Get all appointments for a specific user"""
-    return db.query(models.Appointment)\
-             .filter(models.Appointment.user_id == user_id)\
-             .all() 
\ No newline at end of file
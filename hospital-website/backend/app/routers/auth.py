@@ -1,30 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 from typing import Optional
-import secrets
 
-from .. import crud, schemas, models
-from ..database import get_db
+from .. import async_crud, crud, login_activity, schemas, models
+from ..database import get_async_db
 from ..auth_utils import (
     create_access_token,
     get_current_user,
-    get_password_hash,
+    optional_oauth2_scheme,
+    revoke_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
+from ..password_utils import hash_password_async, verify_password_async
+from ..server_timing import TimedRoute
 
 router = APIRouter(
     prefix="/api/auth",
-    tags=["authentication"]
+    tags=["authentication"],
+    route_class=TimedRoute
 )
 
 @router.post("/signup", response_model=schemas.SignupResponse)
 async def signup(
     user_data: schemas.UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_user = crud.get_user_by_email(db, email=user_data.email)
+    db_user = await async_crud.get_user_by_email(db, email=user_data.email)
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -35,7 +38,7 @@ async def signup(
     db_user = models.User(
         email=user_data.email,
         name=user_data.name,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await hash_password_async(user_data.password),
         phone=user_data.phone,
         is_active=True,
         email_verified=False,
@@ -43,8 +46,7 @@ async def signup(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
     
     # Return a dictionary that matches SignupResponse schema
     return {
@@ -60,10 +62,10 @@ async def signup(
 @router.post("/login", response_model=schemas.TokenResponse)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = crud.get_user_by_email(db, email=form_data.username)
-    if not user or not crud.verify_password(form_data.password, user.hashed_password):
+    user = await async_crud.get_user_by_email(db, email=form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -78,10 +80,10 @@ async def login(
     )
 
     # Create refresh token
-    refresh_token = crud.create_refresh_token(db, user_id=user.id)
+    refresh_token = await async_crud.create_refresh_token(db, user_id=user.id)
 
-    # Update last login
-    crud.update_user_last_login(db, user)
+    # Written by the next login activity flush
+    login_activity.record_login("user", user.id)
 
     return {
         "access_token": access_token,
@@ -92,80 +94,49 @@ async def login(
 @router.post("/refresh", response_model=schemas.TokenResponse)
 async def refresh_token(
     token_data: schemas.RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Refresh access token using refresh token"""
-    # Get refresh token from database
-    db_token = crud.get_refresh_token(db, token_data.refresh_token)
-    
-    if not db_token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token"
-        )
-    
-    # Check if token is expired
-    if db_token.expires_at < datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token has expired"
-        )
-    
-    # Check if token is revoked
-    if db_token.is_revoked:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token has been revoked"
-        )
-    
-    # Create new access token based on token type
-    if db_token.user_id:
-        user = crud.get_user_by_id(db, db_token.user_id)
-        access_token = create_access_token(
-            data={
-                "sub": str(user.id),
-                "type": "user"
-            }
-        )
-    elif db_token.admin_id:
-        admin = crud.get_admin_by_id(db, db_token.admin_id)
+    """Rotate a refresh token: revoke it and return a new access and refresh token"""
+    rotated = await async_crud.rotate_refresh_token(db, token_data.refresh_token)
+    if rotated is None:
+        # Only failures pay for a lookup, to say why
+        db_token = await async_crud.get_refresh_token(db, token_data.refresh_token)
+        if not db_token:
+            detail = "Invalid refresh token"
+        elif db_token.is_revoked:
+            detail = "Refresh token has been revoked"
+        elif db_token.expires_at <= datetime.utcnow():
+            detail = "Refresh token has expired"
+        else:
+            detail = "Invalid token type"
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+    owner, new_refresh_token = rotated
+    if owner.user_id:
+        # Same claims as /login; get_current_user looks users up by email
         access_token = create_access_token(
-            data={
-                "sub": str(admin.id),
-                "type": "admin"
-            }
-        )
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token type"
+            data={"sub": owner.email},
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         )
-    
-    # Create new refresh token and revoke the old one
-    if db_token.user_id:
-        new_refresh_token = crud.create_refresh_token(db, user_id=db_token.user_id)
     else:
-        new_refresh_token = crud.create_admin_refresh_token(
-            db, 
-            admin_id=db_token.admin_id,
-            token=secrets.token_urlsafe(32)
-        )
-    
-    # Revoke old token
-    crud.revoke_refresh_token(db, token_data.refresh_token)
-    
+        access_token = crud.create_admin_access_token(owner.admin_id)
+
     return {
         "access_token": access_token,
-        "refresh_token": new_refresh_token.token,
+        "refresh_token": new_refresh_token,
         "token_type": "bearer"
     }
 
 @router.post("/logout")
 async def logout(
     token: schemas.RefreshTokenRequest,
-    db: Session = Depends(get_db)
+    access_token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    crud.revoke_refresh_token(db, token.refresh_token)
+    await async_crud.revoke_refresh_token(db, token.refresh_token)
+    # The access token sent with the request stops working too
+    if access_token:
+        await revoke_access_token(db, access_token)
     return {"message": "Successfully logged out"}
 
 @router.get("/me", response_model=schemas.User)
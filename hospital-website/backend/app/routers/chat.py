@@ -1,13 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
 from typing import List
-from openai import OpenAI
-import os
+import json
+import openai
 
-router = APIRouter()
+from .. import chat_cache
+from ..chat_provider import ChatProvider, acquire, get_chat_provider, limit
+from ..server_timing import TimedRoute, timer
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+router = APIRouter(route_class=TimedRoute)
+
+SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a helpful assistant for a hospital website. Provide accurate and helpful information about health and medical topics. If asked about specific medical advice, remind the user to consult with a healthcare professional."
+}
 
 class Message(BaseModel):
     role: str
@@ -16,37 +24,93 @@ class Message(BaseModel):
 class ChatRequest(BaseModel):
     messages: List[Message]
 
-@router.post("/chat")
-async def create_chat(request: ChatRequest):
-    try:
-        # Convert Pydantic models to dictionaries
-        messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
-        
-        # Add system message
-        system_message = {
-            "role": "system",
-            "content": "You are a helpful assistant for a hospital website. Provide accurate and helpful information about health and medical topics. If asked about specific medical advice, remind the user to consult with a healthcare professional."
-        }
-        
-        # Create completion using the OpenAI client
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[system_message] + messages
+def build_messages(request: ChatRequest):
+    # Convert Pydantic models to dictionaries and add the system message
+    return [SYSTEM_MESSAGE] + [{"role": msg.role, "content": msg.content} for msg in request.messages]
+
+def upstream_error(e: Exception) -> HTTPException:
+    """Map an upstream failure to the HTTP error returned to the client"""
+    print(f"Chat provider error: {str(e)}")
+    if isinstance(e, openai.RateLimitError) or "rate limit" in str(e).lower():
+        return HTTPException(
+            status_code=429,
+            detail="Too many requests, please try again later"
+        )
+    if isinstance(e, openai.APITimeoutError):
+        return HTTPException(
+            status_code=504,
+            detail="The assistant took too long to respond"
         )
+    return HTTPException(
+        status_code=500,
+        detail="An error occurred while processing your request"
+    )
+
+@router.post("/chat")
+async def create_chat(request: ChatRequest, provider: ChatProvider = Depends(get_chat_provider)):
+    messages = build_messages(request)
+
+    async def complete():
+        # The upstream error is mapped outside the slot, so that ``limit``
+        # counts it as a timeout or failure
+        try:
+            async with limit():
+                with timer("upstream"):
+                    return await provider.complete(messages)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise upstream_error(e)
+
+    # Repeated questions are answered from the cache, and identical ones in
+    # flight at the same time share one upstream call
+    content = await chat_cache.get_or_complete(messages, complete)
+
+    if not content:
+        raise HTTPException(status_code=500, detail="No response from OpenAI")
+
+    return {"message": content}
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/chat/stream")
+async def stream_chat(request: ChatRequest, provider: ChatProvider = Depends(get_chat_provider)):
+    """Server-sent events variant of /chat: one ``data: {"token": ...}`` event per
+    piece of the reply, then ``event: done``. Failures after the stream has
+    started are reported as an ``event: error``. A cached reply is sent as a
+    single token; live streams are not coalesced but fill the cache."""
+    messages = build_messages(request)
+    cached = chat_cache.lookup(messages)
+    if cached is not None:
+        async def replay():
+            yield sse_event({"token": cached})
+            yield sse_event({}, event="done")
+        return StreamingResponse(replay(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    # Take the concurrency slot up front so a busy server still answers 503
+    slot = await acquire()
+
+    async def events():
+        error = None
+        reply = []
+        try:
+            async for token in provider.stream(messages):
+                reply.append(token)
+                yield sse_event({"token": token})
+            chat_cache.store(messages, "".join(reply))
+            yield sse_event({}, event="done")
+        except Exception as e:
+            error = e
+            yield sse_event({"detail": upstream_error(e).detail}, event="error")
+        finally:
+            await slot.release(error)
 
-        if not response.choices[0].message.content:
-            raise HTTPException(status_code=500, detail="No response from OpenAI")
-
-        return {"message": response.choices[0].message.content}
-
-    except Exception as e:
-        print(f"OpenAI API error: {str(e)}")  # Add this for debugging
-        if "rate limit" in str(e).lower():
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests, please try again later"
-            )
-        raise HTTPException(
-            status_code=500,
-            detail="An error occurred while processing your request"
-        )
\ No newline at end of file
+    # The background task runs even when the client disconnects before the
+    # body is iterated, in which case the generator's finally never does
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers=SSE_HEADERS, background=BackgroundTask(slot.release)
+    )
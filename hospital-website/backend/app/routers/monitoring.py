@@ -0,0 +1,19 @@
+import os
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from typing import Optional
+
+from .. import prometheus
+
+router = APIRouter(tags=["monitoring"])
+
+# When set, scrapers must send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint"""
+    if METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(prometheus.render(), media_type=prometheus.CONTENT_TYPE)
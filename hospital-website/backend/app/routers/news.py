@@ -1,21 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional  # Add this import
-from .. import crud, schemas
+from .. import crud, schemas, view_counter
+from ..response_cache import cached
 from ..database import get_db
 from ..models import NewsArticle
+from ..pagination import NEXT_CURSOR_HEADER, keyset_page
+from ..server_timing import TimedRoute
 
-router = APIRouter(prefix="/api/news")
+router = APIRouter(prefix="/api/news", route_class=TimedRoute)
 
 @router.get("/", response_model=List[schemas.PublicNewsArticle])
-def read_news(skip: int = 0, limit: int = 6, db: Session = Depends(get_db)):
-    # Get only published articles, sorted by date in descending order
-    articles = db.query(NewsArticle)\
-        .filter(NewsArticle.status == "published")\
-        .order_by(NewsArticle.date.desc())\
-        .offset(skip)\
-        .limit(limit)\
-        .all()
+@cached(List[schemas.PublicNewsArticle], tags=["news:list"])
+def read_news(
+    response: Response,
+    skip: int = 0,
+    limit: int = 6,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    # Get only published articles, sorted by date in descending order.
+    # Pass the X-Next-Cursor header back as ?cursor= to fetch the next page.
+    articles, next_cursor = keyset_page(
+        db.query(NewsArticle).filter(NewsArticle.status == "published"),
+        NewsArticle.date,
+        NewsArticle.id,
+        limit,
+        cursor=cursor,
+        skip=skip,
+        descending=True
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     
     # Convert SQLAlchemy models to dictionaries
     articles_list = [
@@ -34,6 +50,12 @@ def read_news(skip: int = 0, limit: int = 6, db: Session = Depends(get_db)):
     return articles_list
 
 @router.get("/{article_id}", response_model=schemas.PublicNewsArticle)
+@cached(
+    schemas.PublicNewsArticle,
+    tags=["news:list", "news:{article_id}"],
+    # Cached hits skip crud.get_news_article, so count the view here
+    on_hit=lambda article_id, **_: view_counter.record_view(article_id)
+)
 async def read_article(article_id: int, db: Session = Depends(get_db)):
     article = crud.get_news_article(db, article_id, increment_views=True)
     if article is None:
@@ -128,6 +128,12 @@ class AppointmentBase(BaseModel):
 class AppointmentCreate(AppointmentBase):
     pass
 
+class AdminAppointmentCreate(AppointmentCreate):
+    # Admins may book on behalf of a patient, or leave the slot unowned,
+    # and may book the doctor straight away
+    user_id: Optional[int] = None
+    doctor_id: Optional[int] = None
+
 class AppointmentUpdate(BaseModel):
     date: Optional[datetime] = None
     reason: Optional[str] = None
@@ -138,10 +144,44 @@ class AppointmentUpdate(BaseModel):
 
 class Appointment(AppointmentBase):
     id: int
-    user_id: int
+    user_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+class AvailableSlot(BaseModel):
+    doctor_id: int
+    doctor_name: str
+    specialty: str
+    start: datetime
+    end: datetime
+
+class AutoAssignRequest(BaseModel):
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    specialty: Optional[str] = None
+    limit: int = Field(1000, ge=1, le=10000)
+    dry_run: bool = False
+
+class AutoAssignment(BaseModel):
+    appointment_id: int
+    doctor_id: int
+    doctor_name: str
+    specialty: str
+    date: datetime
+
+class AutoAssignSkipped(BaseModel):
+    appointment_id: int
+    reason: str
+
+class AutoAssignReport(BaseModel):
+    considered: int
+    assigned: int
+    dry_run: bool
+    scheduling_ms: float
+    write_ms: float
+    assignments: List[AutoAssignment]
+    skipped: List[AutoAssignSkipped]
+
 class AdminLogin(BaseModel):
     username: str
     password: str
@@ -194,6 +234,16 @@ class NewsArticleUpdate(BaseModel):
     def model_dump(self, *args, **kwargs):
         return super().dict(*args, **kwargs)
 
+class NewsImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class NewsImportReport(BaseModel):
+    rows: int
+    imported: int
+    invalid: int
+    errors: List[NewsImportRowError]
+
 class AdminStatistics(BaseModel):
     totalUsers: int
     totalArticles: int
@@ -219,7 +269,8 @@ class UserResponse(BaseModel):
             email=user.email,
             name=user.name,
             is_active=user.is_active,
-            role=user.role,
+            role="user",
+            status="active" if user.is_active else "inactive",
             created_at=user.created_at
         )
 
@@ -271,6 +322,7 @@ class PaginatedAdminNewsArticles(BaseModel):
     items: List[AdminNewsArticle]
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,139 @@
+"""Request-scoped timing breakdown (``Server-Timing``).
+
+``RequestMetricsMiddleware`` opens a ``RequestTimings`` for each request
+in a context variable. It is shared with the threadpool (sync routes and
+dependencies) and with tasks spawned during the request, since both copy
+the context. Timings are collected from:
+
+* ``db``        - every cursor execution, timed by the engine listeners of
+  app.query_counter;
+* ``auth``      - ``get_current_user`` / ``get_current_admin`` (including
+  their lookup query, which also counts towards ``db``);
+* ``handler``   - the endpoint function itself;
+* ``serialize`` - response-model validation and JSON encoding, i.e. from the
+  endpoint returning to the response being built (``TimedRoute``);
+* ``upstream``  - the chat provider call.
+
+``SERVER_TIMING`` selects the output per environment: ``off`` (default),
+``header`` (``Server-Timing`` response header), ``log`` (fields on the
+access log line) or ``on`` (both).
+"""
+import asyncio
+import functools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.routing import APIRoute
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "off").lower()
+
+def header_enabled() -> bool:
+    return SERVER_TIMING in ("header", "on")
+
+def log_enabled() -> bool:
+    return SERVER_TIMING in ("log", "on")
+
+class RequestTimings:
+    __slots__ = ("durations", "counts", "endpoint_end")
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.endpoint_end: Optional[float] = None
+
+    def add(self, name: str, seconds: float):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def header_value(self, total: float) -> str:
+        parts = []
+        for name, seconds in self.durations.items():
+            part = f"{name};dur={seconds * 1000:.1f}"
+            if name == "db":
+                part += f';desc="{self.counts[name]} queries"'
+            parts.append(part)
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+    def fields(self, total: float) -> dict:
+        fields = {f"{name}_ms": round(seconds * 1000, 2) for name, seconds in self.durations.items()}
+        if "db" in self.counts:
+            fields["db_queries"] = self.counts["db"]
+        fields["total_ms"] = round(total * 1000, 2)
+        return fields
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("server_timing", default=None)
+
+def begin():
+    """Start collecting for the current request; returns a token for ``end``"""
+    if not (header_enabled() or log_enabled()):
+        return None
+    return _current.set(RequestTimings())
+
+def end(token):
+    if token is not None:
+        _current.reset(token)
+
+def current() -> Optional[RequestTimings]:
+    return _current.get()
+
+@contextmanager
+def timer(name: str):
+    """Add the time spent in the block to ``name`` (no-op when disabled)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+# Endpoint and serialization time
+
+def _timed_endpoint(call):
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return await call(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                timings.endpoint_end = time.perf_counter()
+                timings.add("handler", timings.endpoint_end - start)
+    else:
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            timings = _current.get()
+            if timings is None:
+                return call(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                timings.endpoint_end = time.perf_counter()
+                timings.add("handler", timings.endpoint_end - start)
+    return endpoint
+
+class TimedRoute(APIRoute):
+    """APIRoute that reports endpoint (``handler``) and ``serialize`` time"""
+
+    def get_route_handler(self):
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = _current.get()
+            if timings is not None and timings.endpoint_end is not None:
+                timings.add("serialize", time.perf_counter() - timings.endpoint_end)
+            return response
+
+        return timed_handler
@@ -0,0 +1,155 @@
+"""Incrementally maintained totals behind the admin dashboard.
+
+Instead of COUNT(*)/SUM() scans over ``news_articles`` and ``users``, the
+dashboard reads the small ``site_counters`` table with a single aggregate
+query. The counters are updated in the same transaction as the writes
+that change them:
+
+* an ``after_flush`` session hook adjusts them for every ORM insert,
+  delete, status change and category change of articles and users;
+* writers that bypass the ORM (view-count flushes, bulk loads) call
+  ``bump`` themselves;
+* ``rebuild`` recomputes everything from scratch (migrations, seeding,
+  synthetic data loads).
+
+Every write that adds a user or changes an article bumps the same few
+counters, so each counter is striped over ``SITE_COUNTER_STRIPES`` rows,
+(name, slot), and ``read`` sums the stripes. A connection always writes
+to the same slot, picked at random when it first bumps, so concurrent
+transactions mostly lock different rows while one transaction never
+holds two stripes of a counter (which could deadlock against another).
+"""
+import os
+import random
+from collections import Counter
+from typing import Dict
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+ARTICLES = "articles"
+USERS = "users"
+VIEWS = "views"
+STATUS_PREFIX = "articles:status:"
+CATEGORY_PREFIX = "articles:category:"
+
+SITE_COUNTER_STRIPES = int(os.getenv("SITE_COUNTER_STRIPES", "16"))
+
+_table = models.SiteCounter.__table__
+_upsert = insert(_table)
+_upsert = _upsert.on_conflict_do_update(
+    index_elements=[_table.c.name, _table.c.slot],
+    set_={"value": _table.c.value + _upsert.excluded.value}
+)
+
+_read_statistics = text(f"""
+    SELECT
+        coalesce(sum(value) FILTER (WHERE name = '{USERS}'), 0)::bigint AS total_users,
+        coalesce(sum(value) FILTER (WHERE name = '{ARTICLES}'), 0)::bigint AS total_articles,
+        coalesce(sum(value) FILTER (WHERE name = '{STATUS_PREFIX}published'), 0)::bigint AS published_articles,
+        coalesce(sum(value) FILTER (WHERE name = '{STATUS_PREFIX}draft'), 0)::bigint AS draft_articles,
+        coalesce(sum(value) FILTER (WHERE name = '{VIEWS}'), 0)::bigint AS total_views,
+        coalesce(
+            jsonb_object_agg(substr(name, {len(CATEGORY_PREFIX) + 1}), value)
+                FILTER (WHERE name LIKE '{CATEGORY_PREFIX}%' AND value <> 0),
+            '{{}}'::jsonb
+        ) AS articles_by_category
+    FROM (SELECT name, sum(value)::bigint AS value FROM site_counters GROUP BY name) AS totals
+""")
+
+def bump(connection, deltas: Dict[str, int]):
+    """Add ``deltas`` to the named counters, inside the caller's transaction
+
+    ``connection`` may be a Connection or a Session.
+    """
+    if isinstance(connection, Session):
+        connection = connection.connection()
+    slot = connection.info.setdefault("site_counter_slot", random.randrange(SITE_COUNTER_STRIPES))
+    rows = [{"name": name, "slot": slot, "value": delta} for name, delta in sorted(deltas.items()) if delta]
+    if rows:
+        # Sorted so concurrent writers lock counter rows in the same order
+        connection.execute(_upsert, rows)
+
+def read(db: Session) -> dict:
+    """All dashboard totals, summed over their stripes, in one query"""
+    return dict(db.execute(_read_statistics).mappings().one())
+
+def rebuild(db: Session):
+    """Recompute every counter from the base tables"""
+    article = models.NewsArticle
+    totals = Counter()
+    totals[USERS] = db.scalar(select(func.count()).select_from(models.User))
+    totals[VIEWS] = db.scalar(select(func.coalesce(func.sum(article.views_count), 0)))
+    for status, count in db.execute(select(article.status, func.count()).group_by(article.status)):
+        totals[ARTICLES] += count
+        totals[STATUS_PREFIX + (status or "draft")] += count
+    for category, count in db.execute(select(article.category, func.count()).group_by(article.category)):
+        totals[CATEGORY_PREFIX + category] += count
+
+    db.execute(_table.delete())
+    if totals:
+        db.execute(_table.insert(), [{"name": name, "value": value} for name, value in totals.items()])
+    db.commit()
+
+def _article_counters(deltas: Counter, sign: int, status, category):
+    deltas[STATUS_PREFIX + (status or "draft")] += sign
+    deltas[CATEGORY_PREFIX + category] += sign
+
+_UNCHANGED = object()
+
+def _previous_value(obj, key: str):
+    history = inspect(obj).attrs[key].history
+    if history.added and history.deleted and history.added[0] != history.deleted[0]:
+        return history.deleted[0]
+    return _UNCHANGED
+
+@event.listens_for(Session, "before_flush")
+def _load_deleted_articles(session, flush_context, instances):
+    # Deleted rows can't be loaded after the DELETE runs, so read what the
+    # after_flush hook needs while they still exist
+    for obj in session.deleted:
+        if isinstance(obj, models.NewsArticle):
+            obj.status, obj.category, obj.views_count
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_changes(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, models.NewsArticle):
+            deltas[ARTICLES] += 1
+            deltas[VIEWS] += obj.views_count or 0
+            _article_counters(deltas, 1, obj.status, obj.category)
+        elif isinstance(obj, models.User):
+            deltas[USERS] += 1
+    for obj in session.deleted:
+        if isinstance(obj, models.NewsArticle):
+            deltas[ARTICLES] -= 1
+            deltas[VIEWS] -= obj.views_count or 0
+            _article_counters(deltas, -1, obj.status, obj.category)
+        elif isinstance(obj, models.User):
+            deltas[USERS] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, models.NewsArticle) or obj in session.deleted:
+            continue
+        old_status = _previous_value(obj, "status")
+        old_category = _previous_value(obj, "category")
+        if old_status is not _UNCHANGED or old_category is not _UNCHANGED:
+            _article_counters(
+                deltas, -1,
+                obj.status if old_status is _UNCHANGED else old_status,
+                obj.category if old_category is _UNCHANGED else old_category
+            )
+            _article_counters(deltas, 1, obj.status, obj.category)
+    if deltas:
+        bump(session.connection(), deltas)
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# Make sure the old status/category is loaded before it is overwritten, so
+# the flush hook always knows which counters to decrement
+for _attribute in (models.NewsArticle.status, models.NewsArticle.category):
+    event.listen(_attribute, "set", _load_previous_value, active_history=True, retval=True)
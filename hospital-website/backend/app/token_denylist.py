@@ -0,0 +1,190 @@
+"""Denylist of revoked access tokens.
+
+Access tokens are stateless JWTs, so logging out used to leave them valid
+until they expired. Every token now carries a ``jti``; logout records it in
+``revoked_tokens`` with the token's expiry, and ``get_current_user`` /
+``get_current_admin`` reject it.
+
+Checks never touch the database. Each process keeps the unexpired revoked
+jtis in memory as a Bloom filter in front of an exact set: nearly every
+request carries a token that was never revoked, and the filter answers
+those with a few bit tests; the rare hit (a revoked token or, at
+``DENYLIST_FALSE_POSITIVE_RATE``, a false positive) is settled by the set.
+
+Revocations made by this process apply at once; those made by other
+workers arrive with the incremental sync every ``DENYLIST_SYNC_SECONDS``.
+Every ``DENYLIST_REBUILD_SECONDS``, or when the filter has filled up, both
+are rebuilt from the table, which drops expired jtis (a Bloom filter cannot
+delete) and resizes the filter.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import background, database, metrics, models
+
+logger = logging.getLogger(__name__)
+
+DENYLIST_SYNC_SECONDS = float(os.getenv("DENYLIST_SYNC_SECONDS", "5"))
+DENYLIST_REBUILD_SECONDS = float(os.getenv("DENYLIST_REBUILD_SECONDS", "600"))
+# Each sync re-reads this much history, to tolerate clock skew between workers
+DENYLIST_SYNC_OVERLAP_SECONDS = float(os.getenv("DENYLIST_SYNC_OVERLAP_SECONDS", "60"))
+DENYLIST_FALSE_POSITIVE_RATE = float(os.getenv("DENYLIST_FALSE_POSITIVE_RATE", "0.001"))
+DENYLIST_MIN_CAPACITY = int(os.getenv("DENYLIST_MIN_CAPACITY", "1024"))
+
+class BloomFilter:
+    """Bloom filter over strings, sized for ``capacity`` entries at ``false_positive_rate``"""
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & 1 << (position & 7) for position in self._positions(key))
+
+_lock = threading.Lock()
+_bloom: Optional[BloomFilter] = None
+# jti -> expiry
+_revoked: Dict[str, datetime] = {}
+_synced_until: Optional[datetime] = None
+_last_rebuild = 0.0
+_stats = {
+    "checks": 0,
+    "filter_hits": 0,
+    "false_positives": 0,
+    "rejected": 0,
+    "syncs": 0,
+    "rebuilds": 0,
+    "last_rebuild_seconds": None,
+}
+
+def _add(jti: str, expires_at: datetime):
+    with _lock:
+        if _bloom is not None:
+            _bloom.add(jti)
+            _revoked[jti] = expires_at
+
+def rebuild():
+    """Reload the unexpired revoked jtis into a new, right-sized filter and set"""
+    global _bloom, _revoked, _synced_until, _last_rebuild
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    table = models.RevokedToken
+    with database.SessionLocal() as db:
+        rows = db.execute(select(table.jti, table.expires_at).where(table.expires_at > now)).all()
+    bloom = BloomFilter(max(2 * len(rows), DENYLIST_MIN_CAPACITY), DENYLIST_FALSE_POSITIVE_RATE)
+    revoked = {}
+    for jti, expires_at in rows:
+        bloom.add(jti)
+        revoked[jti] = expires_at
+    with _lock:
+        # Revocations made by this process while loading
+        if _bloom is not None:
+            for jti, expires_at in _revoked.items():
+                if jti not in revoked and expires_at > now:
+                    bloom.add(jti)
+                    revoked[jti] = expires_at
+        _bloom, _revoked, _synced_until = bloom, revoked, now
+        _last_rebuild = time.monotonic()
+    _stats["rebuilds"] += 1
+    _stats["last_rebuild_seconds"] = round(time.perf_counter() - started, 3)
+
+def sync():
+    """Periodic pickup of other workers' revocations; a no-op until something has checked a token"""
+    global _synced_until
+    if _bloom is None:
+        return
+    if time.monotonic() - _last_rebuild >= DENYLIST_REBUILD_SECONDS or len(_revoked) > _bloom.capacity:
+        rebuild()
+        return
+    now = datetime.utcnow()
+    table = models.RevokedToken
+    with database.SessionLocal() as db:
+        rows = db.execute(
+            select(table.jti, table.expires_at)
+            .where(table.revoked_at >= _synced_until - timedelta(seconds=DENYLIST_SYNC_OVERLAP_SECONDS))
+            .where(table.expires_at > now)
+        ).all()
+    for jti, expires_at in rows:
+        if jti not in _revoked:
+            _add(jti, expires_at)
+    _synced_until = now
+    _stats["syncs"] += 1
+
+def ensure_loaded():
+    if _bloom is None:
+        with _lock:
+            loaded = _bloom is not None
+        if not loaded:
+            rebuild()
+
+async def ready():
+    """``ensure_loaded`` for async callers, off the event loop"""
+    if _bloom is None:
+        # run_in_executor does not copy the context, so the one-off load is
+        # not charged to the current request's query log
+        await asyncio.get_running_loop().run_in_executor(None, ensure_loaded)
+
+def reset():
+    """Forget everything; the next check reloads (used by tests)"""
+    global _bloom, _revoked
+    with _lock:
+        _bloom, _revoked = None, {}
+
+def is_revoked(jti: Optional[str]) -> bool:
+    """Whether an access token's jti was revoked; the denylist must be loaded"""
+    _stats["checks"] += 1
+    if not jti or jti not in _bloom:
+        return False
+    _stats["filter_hits"] += 1
+    expires_at = _revoked.get(jti)
+    if expires_at is None:
+        _stats["false_positives"] += 1
+        return False
+    _stats["rejected"] += 1
+    return True
+
+async def revoke(db: AsyncSession, jti: str, expires_at: datetime):
+    """Record a revoked jti, shared with the other workers through ``revoked_tokens``"""
+    await db.execute(
+        insert(models.RevokedToken)
+        .values(jti=jti, expires_at=expires_at, revoked_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["jti"])
+    )
+    await db.commit()
+    await ready()
+    _add(jti, expires_at)
+
+def get_metrics() -> dict:
+    return {
+        **_stats,
+        "entries": len(_revoked),
+        "filter_bits": _bloom.size if _bloom is not None else 0,
+        "filter_hashes": _bloom.hashes if _bloom is not None else 0,
+    }
+
+background.register(background.PeriodicTask("sync-token-denylist", DENYLIST_SYNC_SECONDS, sync))
+metrics.register("token_denylist", get_metrics)
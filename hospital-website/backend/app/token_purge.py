@@ -0,0 +1,128 @@
+"""Background purge of expired and revoked auth rows.
+
+Every login adds a refresh token and nothing else ever deletes them; user
+and admin sessions, password reset tokens and revoked access-token jtis
+only grow too, and so do their unique indexes. ``purge`` deletes the dead
+rows in small batches, ``DELETE ... WHERE ctid IN (SELECT ctid ... LIMIT n
+FOR UPDATE SKIP LOCKED)``, each batch its own short transaction, and sleeps
+between batches to stay under ``TOKEN_PURGE_MAX_ROWS_PER_SECOND``.
+
+A run holds a PostgreSQL advisory lock on its connection, so with several
+workers only one purges at a time and the others skip their run.
+
+Rows are kept for ``TOKEN_PURGE_RETENTION_HOURS`` after they expire or are
+revoked, so a replayed refresh token is still reported as expired or
+revoked rather than unknown.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, literal_column, select
+from sqlalchemy.engine import Connection
+
+from . import background, database, metrics, models
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PURGE_INTERVAL = float(os.getenv("TOKEN_PURGE_INTERVAL", "300"))
+TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "1000"))
+# 0 disables the rate limit
+TOKEN_PURGE_MAX_ROWS_PER_SECOND = float(os.getenv("TOKEN_PURGE_MAX_ROWS_PER_SECOND", "5000"))
+# Per rule and run, so a large backlog is worked off over several runs
+TOKEN_PURGE_MAX_BATCHES = int(os.getenv("TOKEN_PURGE_MAX_BATCHES", "100"))
+TOKEN_PURGE_RETENTION_HOURS = float(os.getenv("TOKEN_PURGE_RETENTION_HOURS", "24"))
+# Application-wide key for pg_try_advisory_lock
+TOKEN_PURGE_LOCK_KEY = int(os.getenv("TOKEN_PURGE_LOCK_KEY", "5610022"))
+
+_stats = {
+    "runs": 0,
+    "skipped_runs": 0,
+    "failed_runs": 0,
+    "batches": 0,
+    "last_run_seconds": None,
+    "last_run_deleted": 0,
+}
+# Rows deleted since startup, per rule
+_deleted = {}
+
+def _rules(cutoff: datetime) -> List[Tuple[str, object, object]]:
+    """(name, table, condition) of the rows to delete; each condition has an index"""
+    refresh = models.RefreshToken
+    return [
+        ("refresh_tokens_expired", refresh.__table__, refresh.expires_at < cutoff),
+        ("refresh_tokens_revoked", refresh.__table__, and_(refresh.is_revoked, refresh.revoked_at < cutoff)),
+        ("user_sessions", models.UserSession.__table__, models.UserSession.expires_at < cutoff),
+        ("admin_sessions", models.AdminSession.__table__, models.AdminSession.expires_at < cutoff),
+        ("password_reset_tokens", models.PasswordResetToken.__table__, models.PasswordResetToken.expires_at < cutoff),
+        ("revoked_tokens", models.RevokedToken.__table__, models.RevokedToken.expires_at < cutoff),
+    ]
+
+def _delete_batch(table, condition, limit: int):
+    ctid = literal_column("ctid")
+    doomed = select(ctid).select_from(table).where(condition).limit(limit).with_for_update(skip_locked=True)
+    return delete(table).where(ctid.in_(doomed.scalar_subquery()))
+
+def _purge_rule(conn: Connection, table, condition, batch_size: int, max_batches: int,
+                max_rows_per_second: float) -> int:
+    deleted = 0
+    for _ in range(max_batches):
+        started = time.perf_counter()
+        count = conn.execute(_delete_batch(table, condition, batch_size)).rowcount
+        conn.commit()
+        deleted += count
+        _stats["batches"] += 1
+        if count < batch_size:
+            break
+        if max_rows_per_second > 0:
+            time.sleep(max(count / max_rows_per_second - (time.perf_counter() - started), 0))
+    return deleted
+
+def purge(now: Optional[datetime] = None, batch_size: Optional[int] = None, max_batches: Optional[int] = None,
+          max_rows_per_second: Optional[float] = None) -> Optional[dict]:
+    """Delete dead tokens and sessions; returns rows deleted per rule, or None if another worker holds the lock"""
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=TOKEN_PURGE_RETENTION_HOURS)
+    batch_size = batch_size or TOKEN_PURGE_BATCH_SIZE
+    max_batches = max_batches or TOKEN_PURGE_MAX_BATCHES
+    if max_rows_per_second is None:
+        max_rows_per_second = TOKEN_PURGE_MAX_ROWS_PER_SECOND
+
+    started = time.perf_counter()
+    # The advisory lock belongs to the connection, so every batch uses this one
+    with database.engine.connect() as conn:
+        locked = conn.scalar(select(func.pg_try_advisory_lock(TOKEN_PURGE_LOCK_KEY)))
+        conn.commit()
+        if not locked:
+            _stats["skipped_runs"] += 1
+            return None
+        try:
+            deleted = {}
+            for name, table, condition in _rules(cutoff):
+                deleted[name] = _purge_rule(conn, table, condition, batch_size, max_batches, max_rows_per_second)
+                _deleted[name] = _deleted.get(name, 0) + deleted[name]
+        except Exception:
+            conn.rollback()
+            _stats["failed_runs"] += 1
+            raise
+        finally:
+            conn.execute(select(func.pg_advisory_unlock(TOKEN_PURGE_LOCK_KEY)))
+            conn.commit()
+
+    _stats["runs"] += 1
+    _stats["last_run_seconds"] = round(time.perf_counter() - started, 3)
+    _stats["last_run_deleted"] = sum(deleted.values())
+    if _stats["last_run_deleted"]:
+        logger.info("Purged %s expired or revoked rows: %s", _stats["last_run_deleted"], deleted)
+    return deleted
+
+def get_metrics() -> dict:
+    return {
+        **_stats,
+        "deleted": sum(_deleted.values()),
+        **{f"deleted_{name}": count for name, count in _deleted.items()},
+    }
+
+background.register(background.PeriodicTask("purge-tokens", TOKEN_PURGE_INTERVAL, purge))
+metrics.register("token_purge", get_metrics)
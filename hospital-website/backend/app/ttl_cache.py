@@ -0,0 +1,88 @@
+"""Thread-safe in-process cache with per-entry TTL and LRU eviction."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``on_remove(key, value)`` is called whenever an entry leaves the cache
+    (expiry, eviction, explicit removal) so callers can keep secondary
+    indexes in sync.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        on_remove: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._on_remove = on_remove
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value; ``ttl`` overrides the default lifetime for this entry"""
+        lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+        if lifetime <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + lifetime, value)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _remove(self, key: Hashable):
+        _, value = self._entries.pop(key)
+        if self._on_remove is not None:
+            self._on_remove(key, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,134 @@
+"""Write-behind buffer for article view counts.
+
+Public article views are counted in memory (sharded by article id so
+concurrent requests rarely share a lock) and flushed periodically with a
+single ``UPDATE ... FROM (VALUES ...)`` adding each article's delta to its
+``views_count``, instead of a read-modify-write and commit on every page
+view. Views of articles deleted before the flush are dropped, and only the
+views actually written are added to the ``site_counters`` total.
+
+``news_articles.views_count`` is therefore eventually consistent: it lags
+the views served by up to ``VIEW_COUNT_FLUSH_INTERVAL`` seconds (per
+worker). Readers that need the live figure add ``pending_views`` for the
+article, as ``crud.get_admin_statistics`` does for the total; the public
+article response, being cached, does not expose the count at all.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import Integer, column, func, update, values
+from sqlalchemy.orm import Session
+
+from . import background, database, metrics, models, site_counters
+
+logger = logging.getLogger(__name__)
+
+VIEW_COUNT_SHARDS = int(os.getenv("VIEW_COUNT_SHARDS", "16"))
+VIEW_COUNT_FLUSH_INTERVAL = float(os.getenv("VIEW_COUNT_FLUSH_INTERVAL", "5"))
+
+class ShardedCounter:
+    """Integer counters keyed by id, split across independently locked shards"""
+
+    def __init__(self, shards: int):
+        self._shards = [(threading.Lock(), {}) for _ in range(max(shards, 1))]
+
+    def _shard(self, key: int):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def add(self, key: int, delta: int = 1):
+        lock, counts = self._shard(key)
+        with lock:
+            counts[key] = counts.get(key, 0) + delta
+
+    def get(self, key: int) -> int:
+        lock, counts = self._shard(key)
+        with lock:
+            return counts.get(key, 0)
+
+    def total(self) -> int:
+        total = 0
+        for lock, counts in self._shards:
+            with lock:
+                total += sum(counts.values())
+        return total
+
+    def drain(self) -> Dict[int, int]:
+        """Remove and return every pending count"""
+        drained = {}
+        for lock, counts in self._shards:
+            with lock:
+                taken = dict(counts)
+                counts.clear()
+            for key, delta in taken.items():
+                drained[key] = drained.get(key, 0) + delta
+        return drained
+
+_pending = ShardedCounter(VIEW_COUNT_SHARDS)
+_stats = {"flushes": 0, "flushed_views": 0, "failed_flushes": 0}
+
+_table = models.NewsArticle.__table__
+
+def _increment_views(deltas: Dict[int, int]):
+    pending = values(column("article_id", Integer), column("delta", Integer), name="pending").data(
+        list(deltas.items())
+    )
+    return (
+        update(_table)
+        .where(_table.c.id == pending.c.article_id)
+        .values(views_count=func.coalesce(_table.c.views_count, 0) + pending.c.delta)
+        .returning(_table.c.id)
+    )
+
+def record_view(article_id: int):
+    """Count one view of an article; it reaches the database on the next flush"""
+    _pending.add(article_id)
+
+def pending_views(article_id: Optional[int] = None) -> int:
+    """Views recorded but not flushed yet, for one article or in total"""
+    if article_id is not None:
+        return _pending.get(article_id)
+    return _pending.total()
+
+def flush(db: Optional[Session] = None) -> int:
+    """Write pending views to the database and return how many were written"""
+    deltas = _pending.drain()
+    if not deltas:
+        return 0
+
+    own_session = db is None
+    if own_session:
+        db = database.SessionLocal()
+    try:
+        updated = db.execute(_increment_views(deltas)).scalars()
+        # Articles deleted meanwhile match no row; their views are dropped
+        flushed = sum(deltas[article_id] for article_id in updated)
+        site_counters.bump(db, {site_counters.VIEWS: flushed})
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Put the deltas back so the next flush retries them
+        for article_id, delta in deltas.items():
+            _pending.add(article_id, delta)
+        _stats["failed_flushes"] += 1
+        raise
+    finally:
+        if own_session:
+            db.close()
+
+    _stats["flushes"] += 1
+    _stats["flushed_views"] += flushed
+    return flushed
+
+def discard_pending():
+    """Drop all pending views without writing them (used by tests)"""
+    _pending.drain()
+
+def get_metrics() -> dict:
+    return {**_stats, "pending_views": pending_views()}
+
+background.register(background.PeriodicTask(
+    "flush-view-counts", VIEW_COUNT_FLUSH_INTERVAL, flush, on_stop=flush
+))
+metrics.register("view_counter", get_metrics)
@@ -0,0 +1,101 @@
+"""Admin dashboard statistics: aggregate scans vs the site_counters table.
+
+    python -m benchmarks.admin_statistics --rows 100000
+
+Builds ``bench.news_articles``, ``bench.users`` and ``bench.site_counters``
+(same columns and indexes as ``public``; run ``alembic upgrade head``
+first), then times the previous six COUNT/SUM/GROUP BY queries against the
+single counters query used by ``/api/admin/stats``. Pass ``--keep`` to
+reuse already-populated tables.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app import site_counters
+from app.database import engine
+from app.models import NewsArticle, User
+
+from .common import print_table
+
+def build_tables(conn, rows: int):
+    conn.execute(text("CREATE SCHEMA IF NOT EXISTS bench"))
+    for table in ("news_articles", "users", "site_counters"):
+        conn.execute(text(f"DROP TABLE IF EXISTS bench.{table}"))
+        conn.execute(text(
+            f"CREATE TABLE bench.{table} (LIKE public.{table} INCLUDING DEFAULTS INCLUDING INDEXES)"
+        ))
+    conn.execute(text("""
+        INSERT INTO bench.news_articles
+            (id, title, summary, content, category, image_url, date, status, views_count)
+        SELECT g, 'Article ' || g, 'Summary', 'Content',
+               (ARRAY['Research', 'Events', 'Community', 'Health'])[g % 4 + 1],
+               'https://example.com/image.jpg',
+               timestamp '2015-01-01' + (g * interval '3 minutes'),
+               CASE WHEN g % 10 = 0 THEN 'draft' ELSE 'published' END,
+               g % 500
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows})
+    conn.execute(text("""
+        INSERT INTO bench.users (id, email, name, phone, hashed_password, is_active, email_verified)
+        SELECT g, 'user' || g || '@example.com', 'User ' || g, '555', 'x', true, true
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows})
+    conn.execute(text("ANALYZE bench.news_articles"))
+    conn.execute(text("ANALYZE bench.users"))
+
+def scan_statistics(db: Session) -> dict:
+    """The dashboard queries as they were before site_counters existed"""
+    article = NewsArticle
+    return {
+        "total_users": db.query(User).count(),
+        "total_articles": db.query(article).count(),
+        "published_articles": db.query(article).filter(article.status == "published").count(),
+        "draft_articles": db.query(article).filter(article.status == "draft").count(),
+        "total_views": db.query(func.sum(article.views_count)).scalar() or 0,
+        "articles_by_category": dict(
+            db.query(article.category, func.count(article.id)).group_by(article.category).all()
+        ),
+    }
+
+def time_query(func, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2),
+    }
+
+def main(args):
+    with engine.begin() as conn:
+        if not args.keep:
+            print(f"Loading {args.rows:,} articles and users into the bench schema ...")
+            build_tables(conn, args.rows)
+
+    with engine.connect() as conn:
+        conn.execute(text("SET search_path TO bench, public"))
+        session = Session(bind=conn)
+        if not args.keep:
+            site_counters.rebuild(session)
+
+        assert scan_statistics(session) == site_counters.read(session), "counters out of sync"
+        results = {
+            "six aggregate queries": time_query(lambda: scan_statistics(session), args.repeat),
+            "site_counters query": time_query(lambda: site_counters.read(session), args.repeat),
+        }
+        session.close()
+
+    print_table(f"Admin statistics at {args.rows:,} rows", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="reuse the existing bench tables")
+    main(parser.parse_args())
@@ -0,0 +1,136 @@
+"""Throughput of blocking vs async database access inside async handlers.
+
+    python -m benchmarks.async_db_throughput --clients 50 200 1000 --duration 10
+
+Starts a single uvicorn worker serving two versions of the appointments
+listing and drives each with ``--clients`` concurrent clients:
+
+* ``/sync/appointments``  - ``async def`` route using the psycopg2 Session
+  and ``crud`` (how the routers worked before), which blocks the event loop
+  for every query;
+* ``/async/appointments`` - the same query through ``get_async_db`` and
+  ``async_crud`` on asyncpg.
+
+Both use pools of ``--pool-size`` connections. ``--db-latency-ms`` adds a ``pg_sleep`` to
+each request to stand in for the network round trip to a remote database
+(the local socket makes queries unrealistically cheap). Reports requests
+per second, latency percentiles and error counts per variant. Every run
+gets a fresh server, because a server stuck on blocking pool checkouts
+stays stuck long after the clients give up.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import async_crud, crud
+from app.database import get_async_db, get_db
+
+from .common import print_table, summarize
+
+DB_LATENCY_SECONDS = float(os.getenv("BENCH_DB_LATENCY_MS", "2")) / 1000
+SIMULATED_LATENCY = text("SELECT pg_sleep(:seconds)")
+
+app = FastAPI()
+
+@app.get("/sync/appointments")
+async def sync_appointments(db: Session = Depends(get_db)):
+    if DB_LATENCY_SECONDS:
+        db.execute(SIMULATED_LATENCY, {"seconds": DB_LATENCY_SECONDS})
+    appointments, _ = crud.get_appointments_page(db, limit=20)
+    return {"count": len(appointments)}
+
+@app.get("/async/appointments")
+async def async_appointments(db: AsyncSession = Depends(get_async_db)):
+    if DB_LATENCY_SECONDS:
+        await db.execute(SIMULATED_LATENCY, {"seconds": DB_LATENCY_SECONDS})
+    appointments, _ = await async_crud.get_appointments_page(db, limit=20)
+    return {"count": len(appointments)}
+
+async def client_loop(client: httpx.AsyncClient, path: str, stop_at: float, latencies: list, errors: dict):
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            key = None if response.status_code == 200 else str(response.status_code)
+        except httpx.HTTPError as e:
+            key = type(e).__name__
+        if key is None:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors[key] = errors.get(key, 0) + 1
+
+async def run(base_url: str, path: str, clients: int, duration: float, timeout: float) -> dict:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        # Warm up connections and pools before timing
+        await asyncio.gather(*[client.get(path) for _ in range(min(clients, 50))], return_exceptions=True)
+        latencies, errors = [], {}
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(*[
+            client_loop(client, path, stop_at, latencies, errors) for _ in range(clients)
+        ])
+    return {
+        "rps": round(len(latencies) / duration, 1),
+        **summarize(latencies),
+        "errors": sum(errors.values()),
+    }
+
+def start_server(port: int, db_latency_ms: float, pool_size: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "BENCH_DB_LATENCY_MS": str(db_latency_ms),
+        "DB_POOL_SIZE": str(pool_size),
+        "DB_MAX_OVERFLOW": "0",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.async_db_throughput:app",
+         "--port", str(port), "--log-level", "warning", "--backlog", "4096"],
+        env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("benchmark server did not start")
+
+def main(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    for clients in args.clients:
+        for variant in ("sync", "async"):
+            server = start_server(args.port, args.db_latency_ms, args.pool_size)
+            try:
+                label = f"{variant} x{clients}"
+                results[label] = asyncio.run(run(
+                    base_url, f"/{variant}/appointments", clients, args.duration, args.timeout
+                ))
+                print(f"  {label}: {results[label]}", flush=True)
+            finally:
+                server.kill()
+                server.wait()
+    print_table(
+        f"GET appointments, db latency {args.db_latency_ms} ms, pool {args.pool_size}", results
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout; slower requests count as errors")
+    parser.add_argument("--port", type=int, default=8765)
+    main(parser.parse_args())
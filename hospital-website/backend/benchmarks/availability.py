@@ -0,0 +1,92 @@
+"""Free-slot search and conflict checks against the availability index.
+
+    python -m benchmarks.generate_data --scale 0.1     # doctors to search
+    python -m benchmarks.availability --occupancy 0.8
+
+Loads the index from the database (timing the build), then books
+``--occupancy`` of every doctor's working slots over the search horizon
+in memory only (nothing is written), and times ``next_free_slots`` per
+specialty and ``claim`` against booked slots.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from app import availability
+
+from .common import print_table, summarize
+
+class BenchSession:
+    """Claims only use a session's ``info``"""
+
+    def __init__(self):
+        self.info = {}
+
+def book(occupancy: float, seed: int) -> int:
+    """Fill the index with fake bookings; returns how many"""
+    rng = random.Random(seed)
+    index = availability._index
+    today = datetime.utcnow().date()
+    booked = 0
+    for doctor_id, doctor in list(index.doctors.items()):
+        for offset in range(availability.AVAILABILITY_HORIZON_DAYS):
+            day = today + timedelta(days=offset)
+            hours = doctor.hours[day.weekday()]
+            for slot in range(hours.bit_length()):
+                if hours >> slot & 1 and rng.random() < occupancy:
+                    booked += 1
+                    availability.record(-booked, doctor_id, availability.slot_start(day, slot), "assigned")
+    return booked
+
+def time_calls(func, iterations: int) -> list:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main(args):
+    availability.ensure_loaded()
+    metrics = availability.get_metrics()
+    if not metrics["doctors"]:
+        raise SystemExit("no doctors in the database; run benchmarks.generate_data first")
+    started = time.perf_counter()
+    booked = book(args.occupancy, args.seed)
+    fill_seconds = time.perf_counter() - started
+
+    specialties = sorted({doctor.specialty for doctor in availability._index.doctors.values()})
+    results = {}
+    for count in (1, 10, 50):
+        latencies = []
+        for specialty in specialties:
+            latencies += time_calls(lambda: availability.next_free_slots(specialty, count), args.iterations)
+        results[f"next_free_slots n={count}"] = summarize(latencies)
+
+    booked_slots = list(availability._index.holders)
+    rng = random.Random(args.seed)
+    session = BenchSession()
+
+    def rejected_claim():
+        doctor_id, day, slot = rng.choice(booked_slots)
+        try:
+            availability.claim(session, doctor_id, availability.slot_start(day, slot))
+        except HTTPException:
+            pass
+
+    results["claim (conflict)"] = summarize(time_calls(rejected_claim, args.iterations * len(specialties)))
+    print_table(
+        f"{metrics['doctors']} doctors, {len(specialties)} specialties, {booked} slots booked "
+        f"({args.occupancy:.0%}; filled in {fill_seconds:.1f}s), index built in {metrics['last_build_seconds']}s",
+        results
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--occupancy", type=float, default=0.8)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,29 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+
+BASE_URL = os.getenv("BENCH_BASE_URL", "http://localhost:8000")
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(latencies) -> dict:
+    """p50/p95/p99/max of a list of latencies in seconds, reported in ms"""
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+def print_table(title: str, rows: dict):
+    """Print ``{label: summary}`` rows as an aligned table"""
+    print(f"\n{title}")
+    for label, summary in rows.items():
+        fields = "  ".join(f"{key}={value}" for key, value in summary.items())
+        print(f"  {label:<28} {fields}")
@@ -0,0 +1,86 @@
+"""Peak server memory: GET /api/admin/users vs the streaming export.
+
+    python -m benchmarks.generate_data --scale 0.1     # 100k users
+    python -m benchmarks.export_memory
+
+Starts a fresh uvicorn worker for each endpoint, downloads the full user
+list once and reports the worker's peak resident memory (``VmHWM``) over
+its idle baseline, plus time and body size. The list endpoint builds every
+ORM object and the whole JSON body; the export streams batches from a
+server-side cursor, so its peak should not grow with the row count.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+from sqlalchemy import func, select
+
+from app import crud, models
+from app.database import SessionLocal
+
+from .common import print_table
+
+def peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "REQUEST_LOG_SAMPLE_RATE": "0"}
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("server did not start")
+
+def measure(port: int, path: str, token: str) -> dict:
+    server = start_server(port)
+    try:
+        idle = peak_rss_mb(server.pid)
+        start = time.perf_counter()
+        size = 0
+        with httpx.stream("GET", f"http://127.0.0.1:{port}{path}",
+                          headers={"Authorization": f"Bearer {token}"}, timeout=600) as response:
+            response.raise_for_status()
+            for chunk in response.iter_bytes():
+                size += len(chunk)
+        return {
+            "seconds": round(time.perf_counter() - start, 2),
+            "body_mb": round(size / 2**20, 1),
+            "peak_rss_mb": round(peak_rss_mb(server.pid), 1),
+            "growth_mb": round(peak_rss_mb(server.pid) - idle, 1),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+def main(args):
+    with SessionLocal() as db:
+        admin_id = db.scalar(select(models.Admin.id).limit(1))
+        users = db.scalar(select(func.count()).select_from(models.User))
+    if admin_id is None:
+        raise SystemExit("no admin in the database; run seed_db.py or benchmarks.generate_data first")
+    token = crud.create_admin_access_token(admin_id)
+    results = {
+        "list /api/admin/users": measure(args.port, "/api/admin/users", token),
+        "export ndjson": measure(args.port, "/api/admin/export/users", token),
+        "export csv": measure(args.port, "/api/admin/export/users?format=csv", token),
+    }
+    print_table(f"Full user download, {users} users", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    main(parser.parse_args())
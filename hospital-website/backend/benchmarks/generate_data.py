@@ -0,0 +1,337 @@
+"""Synthetic production-scale dataset for capacity tests.
+
+    python -m benchmarks.generate_data --scale 1 --workers 4
+    python -m benchmarks.generate_data --scale 0.01          # ~1% of the volumes, seconds
+    python -m benchmarks.generate_data --reset                # remove what a run created
+
+At ``--scale 1`` it loads 1M users, 2k doctors, 5M appointments, 50 admins,
+200k news articles and 10M refresh tokens into the database configured by
+the usual ``DB_*`` variables (or ``--database-url``).
+
+Rows are generated in chunks of ``--chunk-size``; each chunk is streamed
+to PostgreSQL with ``COPY ... FROM STDIN`` and recorded in
+``synthetic_data_chunks`` in the same transaction. A chunk's rows depend
+only on the seed, the table and the chunk number, and its ids come from a
+range reserved for the run in ``synthetic_data_plan``. So an interrupted
+run picks up where it stopped, a rerun is a no-op, and the same seed
+always produces the same dataset. Chunks of one table are independent and
+are loaded by ``--workers`` processes in parallel.
+
+All users and admins get the password ``synthetic-password`` so load
+tests can log in as any of them (``user<N>@synthetic.example``,
+``admin<N>``). Afterwards the id sequences are moved past the generated
+ids, the tables are analyzed and the dashboard counters are rebuilt.
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import site_counters
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.password_utils import get_password_hash
+
+PASSWORD = "synthetic-password"
+
+# Rows per table at --scale 1
+VOLUMES = {
+    "users": 1_000_000,
+    "doctors": 2_000,
+    "admins": 50,
+    "appointments": 5_000_000,
+    "news_articles": 200_000,
+    "refresh_tokens": 10_000_000,
+}
+
+# Base time for all generated timestamps, so output doesn't depend on the clock
+EPOCH = datetime(2025, 1, 1)
+
+FIRST_NAMES = ["Ava", "Liam", "Mia", "Noah", "Zoe", "Ethan", "Lena", "Omar", "Priya", "Diego",
+               "Hana", "Ivan", "Chloe", "Kofi", "Sara", "Mateo", "Aiko", "Ben", "Nora", "Yusuf"]
+LAST_NAMES = ["Nguyen", "Smith", "Garcia", "Kim", "Patel", "Johnson", "Lopez", "Chen", "Brown",
+              "Silva", "Khan", "Muller", "Rossi", "Sato", "Okafor", "Cohen", "Novak", "Ali"]
+SPECIALTIES = ["Cardiology", "Dermatology", "Neurology", "Pediatrics", "Orthopedics", "Oncology",
+               "Psychiatry", "Radiology", "General", "Gastroenterology", "Ophthalmology", "Urology"]
+REASONS = ["General checkup", "Follow-up visit", "Chest pain", "Skin rash", "Headache",
+           "Vaccination", "Back pain", "Blood test results", "Prescription renewal", "Fever"]
+CATEGORIES = ["Research", "Technology", "Community", "Events", "Health Tips", "Announcements",
+              "Patient Stories", "Awards"]
+WORDS = ("patients hospital care new treatment study team health clinic research program "
+         "community doctors results early support services children heart cancer program "
+         "local award wellness nurses emergency surgery open week annual center data").split()
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+def timestamp(rng: random.Random, days_before: float, days_after: float = 0.0) -> datetime:
+    return EPOCH + timedelta(seconds=rng.uniform(-days_before * 86400, days_after * 86400))
+
+# Row generators: (rng, first_id, count, plan) -> rows in ``columns`` order
+
+def user_rows(rng, first_id, count, plan):
+    for user_id in range(first_id, first_id + count):
+        created = timestamp(rng, 3 * 365)
+        verified = rng.random() < 0.8
+        yield (
+            user_id, f"user{user_id}@synthetic.example",
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"555{rng.randrange(10**7):07d}",
+            plan["password_hash"], rng.random() < 0.97, created, created,
+            created + timedelta(days=rng.uniform(0, 300)) if rng.random() < 0.7 else None,
+            verified, created + timedelta(hours=rng.uniform(0, 48)) if verified else None,
+        )
+
+def doctor_rows(rng, first_id, count, plan):
+    for doctor_id in range(first_id, first_id + count):
+        created = timestamp(rng, 5 * 365)
+        yield (
+            doctor_id, f"Dr. {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            rng.choice(SPECIALTIES), f"doctor{doctor_id}@synthetic.example", created, created,
+        )
+
+def admin_rows(rng, first_id, count, plan):
+    for admin_id in range(first_id, first_id + count):
+        created = timestamp(rng, 5 * 365)
+        yield (
+            admin_id, f"admin{admin_id}", f"admin{admin_id}@synthetic.example", plan["password_hash"],
+            created, created, "admin" if rng.random() < 0.2 else "editor", True,
+        )
+
+def appointment_rows(rng, first_id, count, plan):
+    users, doctors = plan["ids"]["users"], plan["ids"]["doctors"]
+    for appointment_id in range(first_id, first_id + count):
+        date = timestamp(rng, 2 * 365, 90).replace(minute=rng.choice((0, 15, 30, 45)), second=0, microsecond=0)
+        roll = rng.random()
+        if date > EPOCH:
+            status = "pending" if roll < 0.45 else "assigned" if roll < 0.9 else "cancelled"
+        else:
+            status = "completed" if roll < 0.8 else "cancelled" if roll < 0.95 else "assigned"
+        doctor_id = rng.randint(*doctors) if status != "pending" else None
+        yield (
+            appointment_id, date, rng.choice(REASONS), status,
+            sentence(rng, 8) if rng.random() < 0.2 else None,
+            rng.randint(*users), doctor_id, date - timedelta(days=rng.uniform(1, 60)),
+        )
+
+def article_rows(rng, first_id, count, plan):
+    admins = plan["ids"]["admins"]
+    for article_id in range(first_id, first_id + count):
+        date = timestamp(rng, 5 * 365)
+        published = rng.random() < 0.85
+        yield (
+            article_id, sentence(rng, rng.randint(5, 10))[:-1], sentence(rng, 25),
+            "\n\n".join(sentence(rng, 40) for _ in range(3)), rng.choice(CATEGORIES),
+            f"https://images.synthetic.example/{article_id}.jpg", date,
+            "published" if published else "draft", date, date, date if published else None,
+            int(rng.paretovariate(1.2) * 20) if published else 0, rng.randint(*admins),
+        )
+
+def refresh_token_rows(rng, first_id, count, plan):
+    users, admins = plan["ids"]["users"], plan["ids"]["admins"]
+    for token_id in range(first_id, first_id + count):
+        created = timestamp(rng, 365)
+        revoked = rng.random() < 0.3
+        for_admin = rng.random() < 0.05
+        yield (
+            token_id, f"{token_id:x}.{rng.getrandbits(128):032x}",
+            None if for_admin else rng.randint(*users), rng.randint(*admins) if for_admin else None,
+            created + timedelta(days=7 if for_admin else 30), created,
+            revoked, created + timedelta(days=rng.uniform(0, 7)) if revoked else None,
+        )
+
+class TableSpec(NamedTuple):
+    name: str
+    columns: List[str]
+    rows: Callable
+
+# In dependency order: referenced tables first
+TABLES = [
+    TableSpec("users", ["id", "email", "name", "phone", "hashed_password", "is_active", "created_at",
+                        "updated_at", "last_login", "email_verified", "email_verified_at"], user_rows),
+    TableSpec("doctors", ["id", "name", "specialty", "email", "created_at", "updated_at"], doctor_rows),
+    TableSpec("admins", ["id", "username", "email", "password_hash", "created_at", "updated_at",
+                         "role", "is_active"], admin_rows),
+    TableSpec("appointments", ["id", "date", "reason", "status", "additional_notes", "user_id",
+                               "doctor_id", "created_at"], appointment_rows),
+    TableSpec("news_articles", ["id", "title", "summary", "content", "category", "image_url", "date",
+                                "status", "created_at", "updated_at", "published_at", "views_count",
+                                "admin_id"], article_rows),
+    TableSpec("refresh_tokens", ["id", "token", "user_id", "admin_id", "expires_at", "created_at",
+                                 "is_revoked", "revoked_at"], refresh_token_rows),
+]
+SPECS = {spec.name: spec for spec in TABLES}
+
+BOOKKEEPING = """
+CREATE TABLE IF NOT EXISTS synthetic_data_plan (
+    table_name text PRIMARY KEY,
+    seed bigint NOT NULL,
+    total_rows bigint NOT NULL,
+    chunk_size integer NOT NULL,
+    id_offset bigint NOT NULL
+);
+CREATE TABLE IF NOT EXISTS synthetic_data_chunks (
+    table_name text NOT NULL,
+    chunk integer NOT NULL,
+    row_count integer NOT NULL,
+    loaded_at timestamp NOT NULL DEFAULT now(),
+    PRIMARY KEY (table_name, chunk)
+);
+"""
+
+def generate_chunk(spec: TableSpec, chunk: int, plan: dict):
+    """(CSV, row count) for one chunk; depends only on the seed, the table and the chunk number"""
+    table_plan = plan["tables"][spec.name]
+    first = chunk * table_plan["chunk_size"]
+    count = min(table_plan["chunk_size"], table_plan["total_rows"] - first)
+    rng = random.Random(f"{plan['seed']}:{spec.name}:{chunk}")
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(spec.rows(rng, table_plan["id_offset"] + first + 1, count, plan))
+    return buffer.getvalue(), count
+
+_engine = None
+
+def _init_worker(database_url: str):
+    global _engine
+    _engine = create_engine(database_url, poolclass=NullPool)
+
+def load_chunk(table: str, chunk: int, plan: dict) -> int:
+    """COPY one chunk and mark it loaded, in a single transaction"""
+    spec = SPECS[table]
+    data, count = generate_chunk(spec, chunk, plan)
+    connection = _engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(spec.columns)}) FROM STDIN WITH (FORMAT csv)",
+                io.StringIO(data)
+            )
+            cursor.execute(
+                "INSERT INTO synthetic_data_chunks (table_name, chunk, row_count) VALUES (%s, %s, %s)",
+                (table, chunk, count)
+            )
+        connection.commit()
+        return count
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+def make_plan(engine, seed: int, scale: float, chunk_size: int) -> dict:
+    """Reserve (or reuse) an id range per table; refuses to mix different runs"""
+    plan = {"seed": seed, "tables": {}, "ids": {}}
+    with engine.begin() as connection:
+        for statement in BOOKKEEPING.split(";"):
+            if statement.strip():
+                connection.execute(text(statement))
+        existing = {
+            row.table_name: row._asdict()
+            for row in connection.execute(text("SELECT * FROM synthetic_data_plan"))
+        }
+        for spec in TABLES:
+            total = max(1, int(VOLUMES[spec.name] * scale))
+            table_plan = existing.get(spec.name)
+            if table_plan is None:
+                id_offset = connection.scalar(text(f"SELECT coalesce(max(id), 0) FROM {spec.name}"))
+                table_plan = {"seed": seed, "total_rows": total, "chunk_size": chunk_size, "id_offset": id_offset}
+                connection.execute(
+                    text("INSERT INTO synthetic_data_plan VALUES (:table, :seed, :total_rows, :chunk_size, :id_offset)"),
+                    {"table": spec.name, **table_plan}
+                )
+            elif (table_plan["seed"], table_plan["total_rows"], table_plan["chunk_size"]) != (seed, total, chunk_size):
+                raise SystemExit(
+                    f"{spec.name} was generated with seed={table_plan['seed']}, rows={table_plan['total_rows']}, "
+                    f"chunk size={table_plan['chunk_size']}; rerun with those or use --reset first"
+                )
+            plan["tables"][spec.name] = {key: table_plan[key] for key in ("total_rows", "chunk_size", "id_offset")}
+            plan["ids"][spec.name] = (table_plan["id_offset"] + 1, table_plan["id_offset"] + total)
+    plan["password_hash"] = get_password_hash(PASSWORD)
+    return plan
+
+def pending_chunks(engine, table: str, plan: dict) -> List[int]:
+    table_plan = plan["tables"][table]
+    chunks = -(-table_plan["total_rows"] // table_plan["chunk_size"])
+    with engine.connect() as connection:
+        done = set(connection.scalars(
+            text("SELECT chunk FROM synthetic_data_chunks WHERE table_name = :table"), {"table": table}
+        ))
+    return [chunk for chunk in range(chunks) if chunk not in done]
+
+def finish(engine):
+    """Move sequences past the generated ids, refresh statistics and counters"""
+    with engine.begin() as connection:
+        for spec in TABLES:
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{spec.name}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {spec.name}), false)"
+            ))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"ANALYZE {', '.join(spec.name for spec in TABLES)}"))
+    with Session(engine) as db:
+        site_counters.rebuild(db)
+
+def reset(engine):
+    """Delete the rows a previous run generated, newest tables first"""
+    with engine.begin() as connection:
+        connection.execute(text(BOOKKEEPING.split(";")[0]))
+        plans = {row.table_name: row for row in connection.execute(text("SELECT * FROM synthetic_data_plan"))}
+        for spec in reversed(TABLES):
+            table_plan = plans.get(spec.name)
+            if table_plan is None:
+                continue
+            deleted = connection.execute(
+                text(f"DELETE FROM {spec.name} WHERE id > :low AND id <= :high"),
+                {"low": table_plan.id_offset, "high": table_plan.id_offset + table_plan.total_rows}
+            ).rowcount
+            print(f"  {spec.name}: deleted {deleted} rows")
+        connection.execute(text("DROP TABLE IF EXISTS synthetic_data_chunks, synthetic_data_plan"))
+    with Session(engine) as db:
+        site_counters.rebuild(db)
+
+def generate(database_url: str, seed: int = 1, scale: float = 1.0, chunk_size: int = 50_000, workers: int = 1):
+    engine = create_engine(database_url, poolclass=NullPool)
+    plan = make_plan(engine, seed, scale, chunk_size)
+    _init_worker(database_url)
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(database_url,)) if workers > 1 else None
+    try:
+        for spec in TABLES:
+            chunks = pending_chunks(engine, spec.name, plan)
+            total = plan["tables"][spec.name]["total_rows"]
+            if not chunks:
+                print(f"  {spec.name}: {total} rows already loaded")
+                continue
+            start = time.perf_counter()
+            if executor is None:
+                loaded = sum(load_chunk(spec.name, chunk, plan) for chunk in chunks)
+            else:
+                loaded = sum(executor.map(load_chunk, [spec.name] * len(chunks), chunks, [plan] * len(chunks)))
+            elapsed = time.perf_counter() - start
+            print(f"  {spec.name}: loaded {loaded} of {total} rows in {elapsed:.1f}s "
+                  f"({loaded / elapsed:,.0f} rows/s)", flush=True)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    finish(engine)
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=SQLALCHEMY_DATABASE_URL)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the row counts")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--reset", action="store_true", help="delete the generated rows and bookkeeping")
+    args = parser.parse_args()
+    if args.reset:
+        reset(create_engine(args.database_url, poolclass=NullPool))
+    else:
+        generate(args.database_url, args.seed, args.scale, args.chunk_size, args.workers)
@@ -0,0 +1,101 @@
+"""Offset vs keyset pagination of the public news listing at 1M rows.
+
+    python -m benchmarks.keyset_pagination --rows 1000000 --page-size 20
+
+Builds ``bench.news_articles`` with the same columns and indexes as
+``public.news_articles`` (run ``alembic upgrade head`` first), fills it
+with ``--rows`` articles using ``generate_series`` and times page 1 and
+page 10,000 of the published listing with both ``skip`` and ``cursor``. The queries are built with the
+same ``keyset_page`` helper the ``/api/news`` route uses. Pass ``--keep``
+to reuse an already-populated table.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models import NewsArticle
+from app.pagination import encode_cursor, keyset_page
+
+from .common import print_table
+
+def build_table(conn, rows: int):
+    conn.execute(text("CREATE SCHEMA IF NOT EXISTS bench"))
+    conn.execute(text("DROP TABLE IF EXISTS bench.news_articles"))
+    conn.execute(text(
+        "CREATE TABLE bench.news_articles "
+        "(LIKE public.news_articles INCLUDING DEFAULTS INCLUDING INDEXES)"
+    ))
+    conn.execute(text("""
+        INSERT INTO bench.news_articles
+            (id, title, summary, content, category, image_url, date, status, views_count)
+        SELECT g, 'Article ' || g, 'Summary', 'Content', 'Research',
+               'https://example.com/image.jpg',
+               timestamp '2015-01-01' + (g * interval '3 minutes'),
+               CASE WHEN g % 10 = 0 THEN 'draft' ELSE 'published' END,
+               0
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows})
+    conn.execute(text("ANALYZE bench.news_articles"))
+
+def published(session: Session):
+    return session.query(NewsArticle).filter(NewsArticle.status == "published")
+
+def page(session: Session, page_size: int, skip: int = 0, cursor=None):
+    return keyset_page(
+        published(session), NewsArticle.date, NewsArticle.id, page_size,
+        cursor=cursor, skip=skip, descending=True
+    )
+
+def time_query(func, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2),
+    }
+
+def main(args):
+    with engine.begin() as conn:
+        if not args.keep:
+            print(f"Loading {args.rows:,} rows into bench.news_articles ...")
+            build_table(conn, args.rows)
+
+    with engine.connect() as conn:
+        conn.execute(text("SET search_path TO bench, public"))
+        session = Session(bind=conn)
+
+        deep_skip = (args.page - 1) * args.page_size
+        # Cursor pointing at the end of page N-1, computed once outside the timings
+        previous, _ = page(session, args.page_size, skip=deep_skip - args.page_size)
+        deep_cursor = encode_cursor(previous[-1].date, previous[-1].id)
+        session.expunge_all()
+
+        results = {
+            "offset page 1": time_query(lambda: page(session, args.page_size), args.repeat),
+            f"offset page {args.page:,}": time_query(
+                lambda: page(session, args.page_size, skip=deep_skip), args.repeat
+            ),
+            "keyset page 1": time_query(lambda: page(session, args.page_size), args.repeat),
+            f"keyset page {args.page:,}": time_query(
+                lambda: page(session, args.page_size, cursor=deep_cursor), args.repeat
+            ),
+        }
+        session.close()
+
+    print_table(f"Published news listing, {args.page_size} per page", results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="reuse the existing bench table")
+    main(parser.parse_args())
@@ -0,0 +1,117 @@
+"""Closed-loop asyncio/httpx load driver for the scenario benchmarks.
+
+A scenario is an ``async def scenario(user: VirtualUser)`` that runs one
+journey, issuing requests through ``user.request(step, method, url, ...)``.
+``run`` starts ``users`` virtual users, each repeating the scenario until
+the duration is up. Every request is recorded under its step name, so the
+report shows throughput, latency percentiles and errors for each step
+(e.g. "login", "book") as well as for the scenario as a whole.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+from .common import summarize
+
+class StepFailed(Exception):
+    """Raised by ``VirtualUser.request`` so the rest of the journey is skipped"""
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def success(self, step: str, seconds: float):
+        self.latencies.setdefault(step, []).append(seconds)
+
+    def failure(self, step: str, kind: str):
+        errors = self.errors.setdefault(step, {})
+        errors[kind] = errors.get(kind, 0) + 1
+
+    def report(self, duration: float) -> dict:
+        steps = {}
+        for step in sorted(set(self.latencies) | set(self.errors)):
+            steps[step] = step_report(self.latencies.get(step, []), self.errors.get(step, {}), duration)
+        everything = [seconds for latencies in self.latencies.values() for seconds in latencies]
+        errors: Dict[str, int] = {}
+        for step_errors in self.errors.values():
+            for kind, count in step_errors.items():
+                errors[kind] = errors.get(kind, 0) + count
+        return {"total": step_report(everything, errors, duration), "steps": steps}
+
+def step_report(latencies: List[float], errors: Dict[str, int], duration: float) -> dict:
+    failed = sum(errors.values())
+    requests = len(latencies) + failed
+    return {
+        "rps": round(len(latencies) / duration, 1),
+        **summarize(latencies),
+        "errors": failed,
+        "error_rate": round(failed / requests, 4) if requests else 0.0,
+        "error_kinds": dict(sorted(errors.items())),
+    }
+
+class VirtualUser:
+    """One simulated client; ``state`` survives between iterations (e.g. tokens)"""
+
+    def __init__(self, number: int, client: httpx.AsyncClient, recorder: Recorder, run_id: str):
+        self.number = number
+        self.client = client
+        self.recorder = recorder
+        self.run_id = run_id
+        self.iteration = 0
+        self.state: dict = {}
+
+    async def request(self, step: str, method: str, url: str, expect: Iterable[int] = (200,), **kwargs) -> httpx.Response:
+        """Send a request and record it; raises ``StepFailed`` on an unexpected outcome"""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.failure(step, type(e).__name__)
+            raise StepFailed(step) from e
+        if response.status_code not in expect:
+            self.recorder.failure(step, str(response.status_code))
+            raise StepFailed(step)
+        self.recorder.success(step, time.perf_counter() - start)
+        return response
+
+Scenario = Callable[[VirtualUser], Awaitable[None]]
+
+async def _user_loop(user: VirtualUser, scenario: Scenario, stop_at: float):
+    while time.perf_counter() < stop_at:
+        try:
+            await scenario(user)
+        except StepFailed:
+            # Back off briefly so a failing step doesn't turn into a busy loop
+            await asyncio.sleep(0.05)
+        user.iteration += 1
+
+async def run(
+    base_url: str,
+    scenario: Scenario,
+    users: int,
+    duration: float,
+    timeout: float = 30.0,
+    warmup: float = 0.0,
+    run_id: Optional[str] = None
+) -> dict:
+    """Drive ``scenario`` with ``users`` concurrent virtual users for ``duration`` seconds"""
+    run_id = run_id or f"{int(time.time())}"
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        if warmup:
+            warmup_users = [VirtualUser(n, client, Recorder(), f"{run_id}w") for n in range(users)]
+            stop_at = time.perf_counter() + warmup
+            await asyncio.gather(*[_user_loop(user, scenario, stop_at) for user in warmup_users])
+
+        recorder = Recorder()
+        virtual_users = [VirtualUser(n, client, recorder, run_id) for n in range(users)]
+        start = time.perf_counter()
+        await asyncio.gather(*[_user_loop(user, scenario, start + duration) for user in virtual_users])
+        # The last journeys finish after the deadline; count the real elapsed time
+        elapsed = time.perf_counter() - start
+    report = recorder.report(elapsed)
+    report["journeys"] = sum(user.iteration for user in virtual_users)
+    return report
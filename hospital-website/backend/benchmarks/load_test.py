@@ -0,0 +1,210 @@
+"""Load test of the main user journeys, with JSON baselines to diff against.
+
+Start the stub LLM and the API (seeded with ``python seed_db.py``, so the
+admin account and some published news exist), then run:
+
+    python -m benchmarks.stub_llm --port 9100 --latency-ms 300 &
+    CHAT_API_BASE_URL=http://localhost:9100/v1 uvicorn main:app --workers 1 &
+    python -m benchmarks.load_test --users 20 --duration 30 --save
+    # ... change something, restart the API ...
+    python -m benchmarks.load_test --users 20 --duration 30 --compare
+
+Scenarios (modeled on tests/integration/test_workflows.py):
+
+* ``signup_book``     - sign up, log in, book an appointment, list own
+  appointments; a new account every journey;
+* ``news_browsing``   - anonymous: first page of news, a couple of articles,
+  the next page through the cursor;
+* ``admin_dashboard`` - an admin (logged in once per virtual user) loading
+  statistics, the news table, categories and the pending appointments;
+* ``chat``            - questions to /api/chat, drawn from a small set so
+  repeats exercise the reply cache as they do in production.
+
+Each scenario runs on its own for ``--duration`` seconds with ``--users``
+virtual users. The report has requests per second, p50/p95/p99 and error
+rate per step and per scenario. ``--save`` writes it to
+``benchmarks/results/`` (or the given path); ``--compare`` diffs the run
+against the given baseline, or the most recent one in that directory.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+from . import load_driver
+from .common import BASE_URL
+from .load_driver import VirtualUser
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+CHAT_QUESTIONS = [
+    "What are the visiting hours?",
+    "Where can I park?",
+    "What does a cardiologist do?",
+    "How do I book an appointment?",
+    "Is there a pharmacy on site?",
+    "What should I bring to my first visit?",
+]
+
+# Scenarios
+
+async def signup_book(user: VirtualUser):
+    email = f"load-{user.run_id}-{user.number}-{user.iteration}@example.com"
+    password = "load-test-password"
+    await user.request("signup", "POST", "/api/auth/signup", json={
+        "email": email, "password": password, "name": "Load Test", "phone": "0000000000"
+    })
+    tokens = (await user.request("login", "POST", "/api/auth/login", data={
+        "username": email, "password": password
+    })).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    when = (datetime.now() + timedelta(days=random.randint(1, 60))).replace(minute=0, second=0, microsecond=0)
+    await user.request("book", "POST", "/api/appointments/", expect=(201,), headers=headers, json={
+        "date": when.isoformat(), "reason": "General checkup", "status": "pending"
+    })
+    await user.request("my_appointments", "GET", "/api/appointments/user/appointments", headers=headers)
+
+async def news_browsing(user: VirtualUser):
+    first = await user.request("news_list", "GET", "/api/news/", params={"limit": 10})
+    articles = first.json()
+    for article in random.sample(articles, min(2, len(articles))):
+        await user.request("news_article", "GET", f"/api/news/{article['id']}")
+    cursor = first.headers.get("X-Next-Cursor")
+    if cursor:
+        await user.request("news_next_page", "GET", "/api/news/", params={"limit": 10, "cursor": cursor})
+
+async def admin_dashboard(user: VirtualUser):
+    if "headers" not in user.state:
+        tokens = (await user.request("admin_login", "POST", "/api/admin/login", json={
+            "username": ADMIN_USERNAME, "password": ADMIN_PASSWORD
+        })).json()
+        user.state["headers"] = {"Authorization": f"Bearer {tokens['access_token']}"}
+    headers = user.state["headers"]
+    await user.request("statistics", "GET", "/api/admin/statistics", headers=headers)
+    await user.request("admin_news", "GET", "/api/admin/news", headers=headers, params={"limit": 20})
+    await user.request("categories", "GET", "/api/admin/categories", headers=headers)
+    await user.request("pending", "GET", "/api/appointments/pending", headers=headers, params={"limit": 20})
+
+async def chat(user: VirtualUser):
+    question = random.choice(CHAT_QUESTIONS)
+    await user.request("chat", "POST", "/api/chat", json={
+        "messages": [{"role": "user", "content": question}]
+    })
+
+SCENARIOS = {
+    "signup_book": signup_book,
+    "news_browsing": news_browsing,
+    "admin_dashboard": admin_dashboard,
+    "chat": chat,
+}
+
+# Baselines
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def latest_baseline() -> Optional[Path]:
+    baselines = sorted(RESULTS_DIR.glob("load-*.json"))
+    return baselines[-1] if baselines else None
+
+def save(results: dict, path: Optional[str]) -> Path:
+    target = Path(path) if path else RESULTS_DIR / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(results, indent=2, sort_keys=True))
+    return target
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+def diff(baseline: dict, results: dict) -> Dict[str, dict]:
+    """Per scenario and step: rps, p95 and error rate before -> after"""
+    rows = {}
+    for scenario, report in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(scenario)
+        if old is None:
+            continue
+        pairs = [("total", old["total"], report["total"])]
+        pairs += [
+            (step, old["steps"][step], summary)
+            for step, summary in report["steps"].items() if step in old["steps"]
+        ]
+        for step, before, after in pairs:
+            rows[f"{scenario}/{step}"] = {
+                "rps": f"{before['rps']} -> {after['rps']} ({change(before['rps'], after['rps'])})",
+                "p95_ms": f"{before['p95_ms']} -> {after['p95_ms']} ({change(before['p95_ms'], after['p95_ms'])})",
+                "error_rate": f"{before['error_rate']} -> {after['error_rate']}",
+            }
+    return rows
+
+def print_report(results: dict):
+    for scenario, report in results["scenarios"].items():
+        print(f"\n{scenario} ({report['journeys']} journeys)")
+        for step, summary in [("total", report["total"]), *report["steps"].items()]:
+            print(
+                f"  {step:<18} rps={summary['rps']:<8} p50={summary['p50_ms']}ms "
+                f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms "
+                f"errors={summary['errors']} ({summary['error_rate'] * 100:.2f}%)"
+            )
+
+async def main(args):
+    results = {
+        "meta": {
+            "base_url": args.base_url,
+            "users": args.users,
+            "duration": args.duration,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+        },
+        "scenarios": {},
+    }
+    run_id = f"{int(time.time())}"
+    for name in args.scenarios:
+        print(f"running {name} ...", flush=True)
+        results["scenarios"][name] = await load_driver.run(
+            args.base_url, SCENARIOS[name], args.users, args.duration,
+            timeout=args.timeout, warmup=args.warmup, run_id=f"{run_id}-{name}"
+        )
+    print_report(results)
+
+    if args.compare is not None:
+        baseline_path = Path(args.compare) if args.compare else latest_baseline()
+        if baseline_path is None:
+            print("\nno baseline to compare against")
+        else:
+            print(f"\ncompared with {baseline_path}")
+            for label, row in diff(json.loads(baseline_path.read_text()), results).items():
+                print(f"  {label:<34} " + "  ".join(f"{key}: {value}" for key, value in row.items()))
+    if args.save is not None:
+        print(f"\nsaved {save(results, args.save or None)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), metavar="scenario",
+                        help=f"any of {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unrecorded seconds before each scenario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout")
+    parser.add_argument("--save", nargs="?", const="", help="write the results as JSON (default: benchmarks/results/)")
+    parser.add_argument("--compare", nargs="?", const="", help="diff against a baseline (default: the latest saved)")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    asyncio.run(main(args))
@@ -0,0 +1,73 @@
+"""p99 latency of GET /api/news while a login storm is running.
+
+Start the API (``uvicorn main:app --workers 1``) and run:
+
+    python -m benchmarks.login_storm --duration 10 --login-concurrency 32
+
+The script first measures /api/news alone, then again while
+``--login-concurrency`` clients log in back to back. With bcrypt running
+on the event loop the second p99 grows by roughly one hash time per
+queued login; with the hashing pool it should stay close to the baseline.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .common import BASE_URL, print_table, summarize
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-password-123"
+
+async def ensure_user(client: httpx.AsyncClient):
+    response = await client.post("/api/auth/signup", json={
+        "email": EMAIL,
+        "password": PASSWORD,
+        "name": "Benchmark User",
+        "phone": "0000000000"
+    })
+    if response.status_code not in (200, 400):
+        response.raise_for_status()
+
+async def poll_news(client: httpx.AsyncClient, stop_at: float, latencies: list):
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await client.get("/api/news/")
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+
+async def login_loop(client: httpx.AsyncClient, stop_at: float, counters: dict):
+    while time.perf_counter() < stop_at:
+        response = await client.post("/api/auth/login", data={"username": EMAIL, "password": PASSWORD})
+        key = "ok" if response.status_code == 200 else str(response.status_code)
+        counters[key] = counters.get(key, 0) + 1
+
+async def run_phase(client, duration: float, news_concurrency: int, login_concurrency: int):
+    stop_at = time.perf_counter() + duration
+    latencies, counters = [], {}
+    tasks = [poll_news(client, stop_at, latencies) for _ in range(news_concurrency)]
+    tasks += [login_loop(client, stop_at, counters) for _ in range(login_concurrency)]
+    await asyncio.gather(*tasks)
+    return latencies, counters
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.news_concurrency + args.login_concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        await ensure_user(client)
+        idle, _ = await run_phase(client, args.duration, args.news_concurrency, 0)
+        storm, logins = await run_phase(client, args.duration, args.news_concurrency, args.login_concurrency)
+
+    print_table("GET /api/news latency", {
+        "idle": summarize(idle),
+        f"login storm (x{args.login_concurrency})": summarize(storm),
+    })
+    print(f"  logins during storm: {logins}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--news-concurrency", type=int, default=4)
+    parser.add_argument("--login-concurrency", type=int, default=32)
+    asyncio.run(main(parser.parse_args()))
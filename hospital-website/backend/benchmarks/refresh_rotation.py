@@ -0,0 +1,105 @@
+"""Refresh-token rotations per second through POST /api/auth/refresh.
+
+    python -m benchmarks.refresh_rotation --duration 10 --concurrency 16
+
+Runs the app in-process (httpx ``ASGITransport``, no network) against the
+configured database, which needs at least one user (``seed_db.py`` or
+``benchmarks.generate_data``). Each of ``--concurrency`` clients starts
+from its own refresh token and rotates it back to back for
+``--duration`` seconds. Reports rotations per second, latency, SQL
+statements and commits per rotation, and how many of ``--races`` pairs of
+simultaneous refreshes of one token both succeeded (double spends).
+Tokens created by the run are deleted afterwards.
+"""
+import argparse
+import asyncio
+import secrets
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, select
+
+from app import models, query_counter
+from app.database import SessionLocal
+from app.main import app
+
+from .common import print_table, summarize
+
+ROUTE = "POST /api/auth/refresh"
+
+def issue_tokens(count: int) -> list:
+    with SessionLocal() as db:
+        user_id = db.scalar(select(models.User.id).order_by(models.User.id).limit(1))
+        if user_id is None:
+            raise SystemExit("no users in the database; run seed_db.py or benchmarks.generate_data first")
+        tokens = [secrets.token_urlsafe(32) for _ in range(count)]
+        db.add_all([
+            models.RefreshToken(token=token, user_id=user_id, expires_at=datetime.utcnow() + timedelta(days=1))
+            for token in tokens
+        ])
+        db.commit()
+    return tokens
+
+def delete_tokens(tokens: list):
+    with SessionLocal() as db:
+        for start in range(0, len(tokens), 5000):
+            db.execute(delete(models.RefreshToken).where(models.RefreshToken.token.in_(tokens[start:start + 5000])))
+        db.commit()
+
+async def rotate(client: httpx.AsyncClient, token: str) -> httpx.Response:
+    return await client.post("/api/auth/refresh", json={"refresh_token": token})
+
+async def rotation_loop(client, token: str, stop_at: float, latencies: list, issued: list):
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await rotate(client, token)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        token = response.json()["refresh_token"]
+        issued.append(token)
+
+async def main(args):
+    tokens = issue_tokens(args.concurrency + args.races)
+    issued = list(tokens)
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            # Warm up connections and caches
+            await asyncio.gather(*(rotation_loop(client, token, time.perf_counter() + 1, [], issued)
+                                   for token in tokens[:args.concurrency]))
+            starts = issued[-args.concurrency:]
+            with query_counter.observe_requests() as requests:
+                started = time.perf_counter()
+                stop_at = started + args.duration
+                await asyncio.gather(*(rotation_loop(client, token, stop_at, latencies, issued) for token in starts))
+                elapsed = time.perf_counter() - started
+            logs = [log for label, log in requests if label == ROUTE]
+
+            double_spends = 0
+            for token in tokens[args.concurrency:]:
+                first, second = await asyncio.gather(rotate(client, token), rotate(client, token))
+                for response in (first, second):
+                    if response.status_code == 200:
+                        issued.append(response.json()["refresh_token"])
+                double_spends += first.status_code == second.status_code == 200
+    finally:
+        delete_tokens(issued)
+
+    print_table(f"Refresh rotation, {args.concurrency} clients, {args.duration:.0f}s", {
+        "rotations": {
+            "per_second": round(len(latencies) / elapsed, 1),
+            "statements": round(sum(log.count for log in logs) / max(len(logs), 1), 2),
+            "commits": round(sum(log.commits for log in logs) / max(len(logs), 1), 2),
+        },
+        "latency": summarize(latencies),
+        "races": {"pairs": args.races, "double_spends": double_spends},
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--races", type=int, default=50, help="pairs of simultaneous refreshes of one token")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""OpenAI-compatible stub chat server for load tests.
+
+    python -m benchmarks.stub_llm --port 9100 --latency-ms 800 --tokens 40
+
+Serves ``POST /v1/chat/completions`` (plain and ``stream=true``) with a
+canned reply after a configurable delay, so chat load tests measure the
+backend rather than a paid upstream. Start the backend with
+``CHAT_API_BASE_URL=http://localhost:9100/v1`` to use it.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+STUB_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "500"))
+STUB_TOKENS = int(os.getenv("STUB_LLM_TOKENS", "20"))
+
+app = FastAPI(title="Stub chat completions")
+app.state.latency_ms = STUB_LATENCY_MS
+app.state.tokens = STUB_TOKENS
+
+def reply_tokens(messages) -> list:
+    last = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    words = f"Stub reply to: {last}".split()
+    return [(words[i % len(words)] + " ") for i in range(max(app.state.tokens, 1))]
+
+def completion_id() -> str:
+    return f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    tokens = reply_tokens(body.get("messages", []))
+    model = body.get("model", "stub")
+    delay = app.state.latency_ms / 1000
+
+    if not body.get("stream"):
+        await asyncio.sleep(delay)
+        return {
+            "id": completion_id(),
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens).strip()},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+        }
+
+    async def chunks():
+        chunk_id, created = completion_id(), int(time.time())
+        # Spread the delay across the tokens, like a model generating them
+        per_token = delay / len(tokens)
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(per_token)
+            chunk = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": token} if i == 0 else {"content": token},
+                    "finish_reason": None,
+                }],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        done = {
+            "id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=STUB_LATENCY_MS)
+    parser.add_argument("--tokens", type=int, default=STUB_TOKENS)
+    args = parser.parse_args()
+    app.state.latency_ms = args.latency_ms
+    app.state.tokens = args.tokens
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
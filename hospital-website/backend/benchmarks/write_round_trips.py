@@ -0,0 +1,137 @@
+"""SQL statements, commits and latency per request for the write routes.
+
+    python -m benchmarks.write_round_trips --iterations 50
+
+Runs the app in-process (httpx ``ASGITransport``, no network) against the
+configured database and sends ``--iterations`` of each write request:
+signup, user and admin login, appointment create / assign / update /
+cancel, article create / update and admin-created users and admins. Every
+row the run creates is tagged ``bench-writes`` and deleted afterwards
+(the dashboard counters are rebuilt to match).
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, or_, select
+
+from app import crud, models, query_counter, site_counters
+from app.auth_utils import create_access_token
+from app.database import SessionLocal
+from app.main import app
+from app.password_utils import get_password_hash
+
+from .common import print_table, summarize
+
+TAG = "bench-writes"
+PASSWORD = "bench-writes-123"
+ALL_DAY = {day: ["00:00-24:00"] for day in
+           ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")}
+
+def create_principals():
+    """A user, an admin and an always-available doctor to run the requests as"""
+    with SessionLocal() as db:
+        user = models.User(email=f"{TAG}-user@example.com", name=TAG, hashed_password=get_password_hash(PASSWORD))
+        admin = models.Admin(username=f"{TAG}-admin", email=f"{TAG}-admin@example.com",
+                             password_hash=get_password_hash(PASSWORD), permissions={"news": ["all"]})
+        doctor = models.Doctor(name=TAG, specialty="General", email=f"{TAG}-doctor@example.com", schedule=ALL_DAY)
+        db.add_all([user, admin, doctor])
+        db.commit()
+        return user.email, admin.id, doctor.id
+
+def cleanup():
+    with SessionLocal() as db:
+        users = select(models.User.id).where(models.User.email.like(f"{TAG}%"))
+        admins = select(models.Admin.id).where(models.Admin.email.like(f"{TAG}%"))
+        db.execute(delete(models.RefreshToken).where(
+            or_(models.RefreshToken.user_id.in_(users), models.RefreshToken.admin_id.in_(admins))
+        ))
+        db.execute(delete(models.Appointment).where(models.Appointment.reason.like(f"{TAG}%")))
+        db.execute(delete(models.NewsArticle).where(models.NewsArticle.title.like(f"{TAG}%")))
+        db.execute(delete(models.User).where(models.User.email.like(f"{TAG}%")))
+        db.execute(delete(models.Admin).where(models.Admin.email.like(f"{TAG}%")))
+        db.execute(delete(models.Doctor).where(models.Doctor.email.like(f"{TAG}%")))
+        site_counters.rebuild(db)
+        db.commit()
+
+async def timed(client, latencies, label, method, url, **kwargs):
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    latencies[label].append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+async def run(client, iterations: int, user_email: str, admin_id: int, doctor_id: int, latencies):
+    user = {"Authorization": f"Bearer {create_access_token({'sub': user_email})}"}
+    admin = {"Authorization": f"Bearer {crud.create_admin_access_token(admin_id)}"}
+    # One free slot per iteration, well inside the availability horizon
+    first_slot = datetime.combine(datetime.utcnow().date() + timedelta(days=2), datetime.min.time())
+    for i in range(iterations):
+        await timed(client, latencies, "POST /api/auth/signup", "POST", "/api/auth/signup", json={
+            "name": TAG, "email": f"{TAG}-signup-{i}@example.com", "password": PASSWORD
+        })
+        await timed(client, latencies, "POST /api/auth/login", "POST", "/api/auth/login",
+                    data={"username": user_email, "password": PASSWORD})
+        await timed(client, latencies, "POST /api/admin/login", "POST", "/api/admin/login",
+                    json={"username": f"{TAG}-admin", "password": PASSWORD})
+
+        when = first_slot + timedelta(minutes=30 * i)
+        created = await timed(client, latencies, "POST /api/appointments/", "POST", "/api/appointments/",
+                              headers=user, json={"date": when.isoformat(), "reason": f"{TAG} checkup"})
+        appointment_id = created.json()["id"]
+        await timed(client, latencies, "POST /api/appointments/{appointment_id}/assign", "POST",
+                    f"/api/appointments/{appointment_id}/assign", params={"doctor_id": doctor_id})
+        await timed(client, latencies, "PATCH /api/appointments/{appointment_id}", "PATCH",
+                    f"/api/appointments/{appointment_id}", json={"reason": f"{TAG} follow-up"})
+        await timed(client, latencies, "DELETE /api/appointments/{appointment_id}", "DELETE",
+                    f"/api/appointments/{appointment_id}")
+
+        article = await timed(client, latencies, "POST /api/admin/news", "POST", "/api/admin/news", headers=admin, json={
+            "title": f"{TAG} {i}", "summary": "S", "content": "C", "category": "Health", "image_url": "i.jpg"
+        })
+        await timed(client, latencies, "PUT /api/admin/news/{article_id}", "PUT",
+                    f"/api/admin/news/{article.json()['id']}", headers=admin, json={"title": f"{TAG} {i} updated"})
+        await timed(client, latencies, "POST /api/admin/users", "POST", "/api/admin/users", headers=admin, json={
+            "name": TAG, "email": f"{TAG}-created-{i}@example.com", "password": PASSWORD
+        })
+        await timed(client, latencies, "POST /api/admin/admins", "POST", "/api/admin/admins", headers=admin, json={
+            "username": f"{TAG}-admin-{i}", "email": f"{TAG}-admin-{i}@example.com", "password": PASSWORD
+        })
+
+async def main(args):
+    cleanup()
+    user_email, admin_id, doctor_id = create_principals()
+    latencies = defaultdict(list)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            # Warm up connections, the availability index and the hashing pool
+            await run(client, 1, user_email, admin_id, doctor_id, defaultdict(list))
+            cleanup()
+            user_email, admin_id, doctor_id = create_principals()
+            with query_counter.observe_requests() as requests:
+                await run(client, args.iterations, user_email, admin_id, doctor_id, latencies)
+    finally:
+        cleanup()
+
+    logs = defaultdict(list)
+    for label, log in requests:
+        logs[label].append(log)
+    rows = {}
+    for label, route_latencies in latencies.items():
+        route_logs = logs[label]
+        rows[label] = {
+            "statements": round(sum(log.count for log in route_logs) / len(route_logs), 2),
+            "commits": round(sum(log.commits for log in route_logs) / len(route_logs), 2),
+            "p50_ms": summarize(route_latencies)["p50_ms"],
+        }
+    total = sum(row["statements"] for row in rows.values())
+    print_table(f"Write routes, {args.iterations} requests each ({total:g} statements per round)", rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -7,9 +7,9 @@ while ! nc -z db 5432; do
 done
 echo "PostgreSQL is ready!"
 
-# Initialize the database
-echo "Initializing database..."
-python init_db.py
+# Apply database migrations
+echo "Applying database migrations..."
+alembic upgrade head
 
 # Seed the database
 echo "Seeding database..."
@@ -5,10 +5,15 @@ from app.models import (
     Doctor, Appointment
 )
 
+from alembic import command
+from alembic.config import Config
+
 def init_database():
     print("Creating database tables...")
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
+    # The fresh schema matches the latest migration
+    command.stamp(Config("alembic.ini"), "head")
     print("Database tables created successfully!")
 
 if __name__ == "__main__":
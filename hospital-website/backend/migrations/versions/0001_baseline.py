@@ -0,0 +1,131 @@
+"""Baseline schema
+
+The tables as they were created by ``Base.metadata.create_all`` before the
+app moved to migrations. Databases that were created that way already
+have these tables, so each one is only created when it is missing; run
+``alembic upgrade head`` on them as usual.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-12-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _create_table(name, *columns):
+    if sa.inspect(op.get_bind()).has_table(name):
+        return False
+    op.create_table(name, *columns)
+    op.create_index(f"ix_{name}_id", name, ["id"])
+    return True
+
+def upgrade():
+    _create_table(
+        "admins",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False, unique=True),
+        sa.Column("email", sa.String(), nullable=False, unique=True),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("role", sa.String()),
+        sa.Column("permissions", sa.JSON(), nullable=True),
+    )
+    if _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("name", sa.String()),
+        sa.Column("phone", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("last_login", sa.DateTime(), nullable=True),
+        sa.Column("verification_token", sa.String(), nullable=True),
+        sa.Column("email_verified", sa.Boolean()),
+        sa.Column("email_verified_at", sa.DateTime(), nullable=True),
+    ):
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+    _create_table(
+        "doctors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("specialty", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False, unique=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+    _create_table(
+        "news_articles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("image_url", sa.String(), nullable=False),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        sa.Column("published_at", sa.DateTime(), nullable=True),
+        sa.Column("views_count", sa.Integer()),
+        sa.Column("admin_id", sa.Integer(), sa.ForeignKey("admins.id")),
+    )
+    for session_table, owner in (("user_sessions", "user"), ("admin_sessions", "admin")):
+        _create_table(
+            session_table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column(f"{owner}_id", sa.Integer(), sa.ForeignKey(f"{owner}s.id")),
+            sa.Column("token", sa.String(), nullable=False, unique=True),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("ip_address", sa.String(), nullable=True),
+            sa.Column("user_agent", sa.String(), nullable=True),
+        )
+    _create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("token", sa.String(), nullable=False, unique=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("admin_id", sa.Integer(), sa.ForeignKey("admins.id"), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("is_revoked", sa.Boolean()),
+        sa.Column("revoked_at", sa.DateTime(), nullable=True),
+    )
+    _create_table(
+        "password_reset_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("token", sa.String(), nullable=False, unique=True),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("used_at", sa.DateTime(), nullable=True),
+        sa.Column("is_used", sa.Boolean()),
+    )
+    _create_table(
+        "appointments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("date", sa.DateTime(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.Column("status", sa.String()),
+        sa.Column("additional_notes", sa.Text(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("doctor_id", sa.Integer(), sa.ForeignKey("doctors.id"), nullable=True),
+    )
+
+def downgrade():
+    for table in (
+        "appointments", "password_reset_tokens", "refresh_tokens", "admin_sessions",
+        "user_sessions", "news_articles", "doctors", "users", "admins",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,49 @@
+"""Indexes for the hot query paths
+
+Composite and partial indexes matching the filters and sort orders of the
+news listings, appointment queues, refresh-token lookups and password
+resets. They are built CONCURRENTLY so the migration does not block
+writes on a live database.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-12-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # (name, table, columns, partial-index predicate)
+    ("ix_news_articles_published_date_id", "news_articles",
+     [sa.text("date DESC"), sa.text("id DESC")], "status = 'published'"),
+    ("ix_news_articles_date_id", "news_articles",
+     [sa.text("date DESC"), sa.text("id DESC")], None),
+    ("ix_appointments_user_id", "appointments", ["user_id"], None),
+    ("ix_appointments_doctor_id_date", "appointments", ["doctor_id", "date"], None),
+    ("ix_appointments_date_id", "appointments", ["date", "id"], None),
+    ("ix_appointments_pending_date_id", "appointments", ["date", "id"], "status = 'pending'"),
+    ("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"], None),
+    ("ix_refresh_tokens_admin_id", "refresh_tokens", ["admin_id"], None),
+    ("ix_refresh_tokens_expires_at", "refresh_tokens", ["expires_at"], None),
+    ("ix_password_reset_tokens_email", "password_reset_tokens", ["email"], None),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
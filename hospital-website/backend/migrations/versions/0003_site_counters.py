@@ -0,0 +1,40 @@
+"""Incremental counters for the admin dashboard
+
+Adds the ``site_counters`` table read by ``/api/admin/stats`` and fills it
+from the current contents of ``users`` and ``news_articles``.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-12-08
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "site_counters",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("value", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute("""
+        INSERT INTO site_counters (name, value)
+        SELECT 'users', count(*) FROM users
+        UNION ALL
+        SELECT 'articles', count(*) FROM news_articles
+        UNION ALL
+        SELECT 'views', coalesce(sum(views_count), 0) FROM news_articles
+        UNION ALL
+        SELECT 'articles:status:' || coalesce(status, 'draft'), count(*)
+        FROM news_articles GROUP BY coalesce(status, 'draft')
+        UNION ALL
+        SELECT 'articles:category:' || category, count(*)
+        FROM news_articles GROUP BY category
+    """)
+
+def downgrade():
+    op.drop_table("site_counters")
@@ -0,0 +1,23 @@
+"""Weekly working hours for doctors
+
+Adds the nullable ``doctors.schedule`` JSON column that the availability
+index reads to know which slots a doctor can be booked into. Existing
+doctors keep the clinic's default hours.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-12-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("doctors", sa.Column("schedule", sa.JSON(), nullable=True))
+
+def downgrade():
+    op.drop_column("doctors", "schedule")
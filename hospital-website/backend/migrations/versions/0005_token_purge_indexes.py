@@ -0,0 +1,41 @@
+"""Indexes for the token purge
+
+The background purge (app.token_purge) deletes sessions and reset tokens
+by ``expires_at`` and revoked refresh tokens by ``revoked_at``; these
+indexes let each batch find its rows without scanning the table. Built
+CONCURRENTLY like the indexes of 0002.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-12-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # (name, table, columns, partial-index predicate)
+    ("ix_user_sessions_expires_at", "user_sessions", ["expires_at"], None),
+    ("ix_admin_sessions_expires_at", "admin_sessions", ["expires_at"], None),
+    ("ix_password_reset_tokens_expires_at", "password_reset_tokens", ["expires_at"], None),
+    ("ix_refresh_tokens_revoked_at", "refresh_tokens", ["revoked_at"], "is_revoked"),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
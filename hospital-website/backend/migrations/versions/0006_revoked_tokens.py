@@ -0,0 +1,31 @@
+"""Revoked access tokens
+
+Adds ``revoked_tokens``: the jti of every access token revoked at logout,
+kept until the token would have expired. Each worker loads it into its
+in-memory denylist (app.token_denylist) and the token purge deletes the
+expired rows.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-12-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(), primary_key=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+    op.create_index("ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+
+def downgrade():
+    op.drop_table("revoked_tokens")
@@ -0,0 +1,34 @@
+"""Striped site counters
+
+Adds ``site_counters.slot`` to the primary key so each dashboard counter
+can be spread over several rows (see app.site_counters). Existing totals
+become slot 0; the downgrade folds the stripes back into one row each.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-12-29
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("site_counters", sa.Column("slot", sa.SmallInteger(), nullable=False, server_default="0"))
+    op.drop_constraint("site_counters_pkey", "site_counters", type_="primary")
+    op.create_primary_key("site_counters_pkey", "site_counters", ["name", "slot"])
+
+def downgrade():
+    op.execute("""
+        CREATE TEMPORARY TABLE merged_site_counters AS
+        SELECT name, sum(value)::bigint AS value FROM site_counters GROUP BY name
+    """)
+    op.execute("DELETE FROM site_counters")
+    op.drop_constraint("site_counters_pkey", "site_counters", type_="primary")
+    op.drop_column("site_counters", "slot")
+    op.create_primary_key("site_counters_pkey", "site_counters", ["name"])
+    op.execute("INSERT INTO site_counters (name, value) SELECT name, value FROM merged_site_counters")
+    op.execute("DROP TABLE merged_site_counters")
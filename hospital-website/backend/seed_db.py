@@ -1,3 +1,4 @@
+from app import site_counters
 from app.database import SessionLocal, init_db
 from app.models import Admin, NewsArticle, Doctor, User
 from app.password_utils import get_password_hash
@@ -259,6 +260,7 @@ def seed_database():
         db.add_all(users)
 
         db.commit()
+        site_counters.rebuild(db)
         print("Sample data has been inserted successfully!")
 
     except SQLAlchemyError as e:
@@ -17,4 +17,27 @@ def test_get_all_news_articles(client, admin_token):
     assert response.status_code == 200  # Should return empty list if no articles
     data = response.json()
     assert "items" in data
-    assert "total" in data
\ No newline at end of file
+    assert "total" in data
+
+def test_update_admin_profile(client, admin_token):
+    response = client.put(
+        "/api/admin/profile",
+        json={"email": "renamed@test.com", "is_active": False},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["email"] == "renamed@test.com"
+    # Activation is not self-service
+    assert data["is_active"] is True
+
+def test_update_user(client, admin_token, test_user):
+    response = client.put(
+        f"/api/admin/users/{test_user.id}",
+        json={"name": "Renamed User"},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["name"] == "Renamed User"
+    assert data["role"] == "user"
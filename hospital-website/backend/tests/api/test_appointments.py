@@ -17,6 +17,7 @@ def test_create_appointment(client, admin_token, test_user):
     assert response.status_code == 201
     data = response.json()
     assert data["reason"] == appointment_data["reason"]
+    assert data["user_id"] == test_user.id
 
 @pytest.fixture
 def test_doctor(db_session):
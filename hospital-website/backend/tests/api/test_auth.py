@@ -51,4 +51,49 @@ def test_invalid_refresh_token(client):
         json={"refresh_token": "invalid_token"}
     )
     assert response.status_code == 401
-    assert "invalid" in response.json()["detail"].lower()
\ No newline at end of file
+    assert "invalid" in response.json()["detail"].lower()
+
+def test_refreshed_user_token_authenticates(client, test_user, test_user_refresh_token):
+    """The rotated access token carries the same claims as a login token"""
+    response = client.post("/api/auth/refresh", json={"refresh_token": test_user_refresh_token.token})
+    access_token = response.json()["access_token"]
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {access_token}"})
+    assert me.status_code == 200
+    assert me.json()["email"] == test_user.email
+
+def test_refresh_token_is_single_use(client, test_user_refresh_token):
+    """A rotated token is revoked; its successor works once in turn"""
+    first = client.post("/api/auth/refresh", json={"refresh_token": test_user_refresh_token.token})
+    reused = client.post("/api/auth/refresh", json={"refresh_token": test_user_refresh_token.token})
+    assert reused.status_code == 401
+    assert "revoked" in reused.json()["detail"].lower()
+    successor = client.post("/api/auth/refresh", json={"refresh_token": first.json()["refresh_token"]})
+    assert successor.status_code == 200
+
+def test_logout_revokes_the_access_token(client, test_user_token, test_user_refresh_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    response = client.post("/api/auth/logout", json={"refresh_token": test_user_refresh_token.token}, headers=headers)
+    assert response.status_code == 200
+    # Rejected even though the principal was cached by the first request
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+def test_admin_logout_revokes_the_access_token(client, admin_token, test_admin_refresh_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert client.get("/api/admin/admins", headers=headers).status_code == 200
+    client.post("/api/admin/logout", json={"refresh_token": test_admin_refresh_token.token}, headers=headers)
+    assert client.get("/api/admin/admins", headers=headers).status_code == 401
+
+def test_login_records_last_login_write_behind(client, db_session, test_user):
+    from app import login_activity
+
+    response = client.post("/api/auth/login", data={"username": test_user.email, "password": "testpass123"})
+    assert response.status_code == 200
+    assert login_activity.get_metrics()["pending"] == 1
+    db_session.refresh(test_user)
+    assert test_user.last_login is None
+
+    login_activity.flush()
+    db_session.refresh(test_user)
+    assert test_user.last_login is not None
+    assert login_activity.get_metrics()["pending"] == 0
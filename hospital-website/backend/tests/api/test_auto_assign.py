@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import availability, models
+
+@pytest.fixture
+def backlog(db_session, test_user):
+    today = datetime.utcnow().date()
+    monday = datetime.combine(today + timedelta(days=7 - today.weekday()), datetime.min.time())
+    doctors = [
+        models.Doctor(name="Dr. Heart", specialty="Cardiology", email="heart@test.com"),
+        models.Doctor(name="Dr. House", specialty="General", email="house@test.com"),
+    ]
+    db_session.add_all(doctors)
+    db_session.flush()
+    appointments = [
+        models.Appointment(user_id=test_user.id, date=monday.replace(hour=9), reason="Chest pain"),
+        models.Appointment(user_id=test_user.id, date=monday.replace(hour=9), reason="Chest pain"),
+        models.Appointment(user_id=test_user.id, date=monday.replace(hour=10), reason="Fever"),
+        models.Appointment(user_id=test_user.id, date=monday.replace(hour=23), reason="Fever"),
+    ]
+    db_session.add_all(appointments)
+    db_session.commit()
+    return {
+        "window": {"date_from": monday.isoformat(), "date_to": (monday + timedelta(days=1)).isoformat()},
+        "doctors": [doctor.id for doctor in doctors],
+        "appointments": [appointment.id for appointment in appointments],
+    }
+
+def run(client, admin_token, **body):
+    return client.post(
+        "/api/appointments/admin/auto-assign", json=body, headers={"Authorization": f"Bearer {admin_token}"}
+    )
+
+def test_requires_admin(client):
+    assert client.post("/api/appointments/admin/auto-assign", json={}).status_code == 401
+
+def test_auto_assign(client, admin_token, backlog, db_session):
+    heart, house = backlog["doctors"]
+    chest, chest_same_time, fever, late = backlog["appointments"]
+    response = run(client, admin_token, **backlog["window"])
+    assert response.status_code == 200
+    report = response.json()
+    assert report["considered"] == 4 and report["assigned"] == 3
+    assert report["scheduling_ms"] >= 0 and report["write_ms"] > 0
+    plan = {row["appointment_id"]: row["doctor_id"] for row in report["assignments"]}
+    # The second 09:00 chest pain case overflows to the General doctor
+    assert plan == {chest: heart, chest_same_time: house, fever: house}
+    assert [row["appointment_id"] for row in report["skipped"]] == [late]
+
+    db_session.expire_all()
+    rows = {a.id: (a.doctor_id, a.status) for a in db_session.query(models.Appointment)}
+    assert rows[chest] == (heart, "assigned")
+    assert rows[late] == (None, "pending")
+    # The index saw the bulk UPDATE: those slots are no longer free
+    assert not availability.is_free(heart, datetime.fromisoformat(backlog["window"]["date_from"]).replace(hour=9))
+
+    # Nothing left to do
+    assert run(client, admin_token, **backlog["window"]).json()["assigned"] == 0
+
+def test_dry_run_writes_nothing(client, admin_token, backlog, db_session):
+    report = run(client, admin_token, dry_run=True, **backlog["window"]).json()
+    assert report["dry_run"] and report["assigned"] == 0 and len(report["assignments"]) == 3
+    db_session.expire_all()
+    assert db_session.query(models.Appointment).filter_by(status="pending").count() == 4
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import models
+
+@pytest.fixture
+def clinic(db_session, test_user):
+    today = datetime.utcnow().date()
+    monday = datetime.combine(today + timedelta(days=7 - today.weekday()), datetime.min.time())
+    doctor = models.Doctor(name="Dr. Heart", specialty="Cardiology", email="heart@test.com")
+    db_session.add(doctor)
+    db_session.flush()
+    appointments = [
+        models.Appointment(user_id=test_user.id, date=monday.replace(hour=hour, minute=minute),
+                           reason="Checkup", status="pending")
+        for hour, minute in [(9, 0), (9, 10), (10, 0)]
+    ]
+    db_session.add_all(appointments)
+    db_session.commit()
+    return {"monday": monday, "doctor_id": doctor.id, "appointment_ids": [a.id for a in appointments]}
+
+def assign(client, appointment_id, doctor_id):
+    return client.post(f"/api/appointments/{appointment_id}/assign", params={"doctor_id": doctor_id})
+
+def test_free_slots(client, clinic):
+    response = client.get(
+        "/api/appointments/availability",
+        params={"specialty": "cardiology", "count": 2, "after": clinic["monday"].isoformat()}
+    )
+    assert response.status_code == 200
+    slots = response.json()
+    assert [slot["start"] for slot in slots] == [
+        clinic["monday"].replace(hour=9).isoformat(), clinic["monday"].replace(hour=9, minute=30).isoformat()
+    ]
+    assert slots[0]["doctor_name"] == "Dr. Heart"
+
+def test_assignment_books_the_slot(client, clinic):
+    first, same_slot, later = clinic["appointment_ids"]
+    assert assign(client, first, clinic["doctor_id"]).status_code == 200
+
+    # 09:10 falls in the 09:00 slot the doctor now has
+    response = assign(client, same_slot, clinic["doctor_id"])
+    assert response.status_code == 409
+    assert "already booked" in response.json()["detail"]
+    assert assign(client, later, clinic["doctor_id"]).status_code == 200
+
+    slots = client.get(
+        "/api/appointments/availability",
+        params={"specialty": "Cardiology", "count": 1, "after": clinic["monday"].isoformat()}
+    ).json()
+    assert slots[0]["start"] == clinic["monday"].replace(hour=9, minute=30).isoformat()
+
+def test_cancelling_frees_the_slot(client, clinic):
+    first, same_slot, _ = clinic["appointment_ids"]
+    assign(client, first, clinic["doctor_id"])
+    assert client.delete(f"/api/appointments/{first}").status_code == 200
+    assert assign(client, same_slot, clinic["doctor_id"]).status_code == 200
+
+def test_moving_into_a_booked_slot_is_rejected(client, clinic):
+    first, _, later = clinic["appointment_ids"]
+    assign(client, first, clinic["doctor_id"])
+    assign(client, later, clinic["doctor_id"])
+    response = client.patch(f"/api/appointments/{later}", json={"date": clinic["monday"].replace(hour=9, minute=20).isoformat()})
+    assert response.status_code == 409
+    response = client.patch(f"/api/appointments/{later}", json={"date": clinic["monday"].replace(hour=11).isoformat()})
+    assert response.status_code == 200
+
+def test_booking_made_by_another_worker_is_rejected(client, db_session, clinic):
+    first, same_slot, _ = clinic["appointment_ids"]
+    params = {"specialty": "Cardiology", "count": 1, "after": clinic["monday"].isoformat()}
+    assert client.get("/api/appointments/availability", params=params).json()[0]["start"] == \
+        clinic["monday"].replace(hour=9).isoformat()
+
+    # Written behind this process's back, as another worker would
+    db_session.execute(
+        text("UPDATE appointments SET doctor_id = :doctor_id, status = 'assigned' WHERE id = :id"),
+        {"doctor_id": clinic["doctor_id"], "id": first}
+    )
+    db_session.commit()
+
+    response = assign(client, same_slot, clinic["doctor_id"])
+    assert response.status_code == 409
+    # The conflict taught the index about the booking
+    assert client.get("/api/appointments/availability", params=params).json()[0]["start"] == \
+        clinic["monday"].replace(hour=9, minute=30).isoformat()
+
+def test_admin_booking_into_a_booked_slot_is_rejected(client, admin_token, clinic):
+    first, _, _ = clinic["appointment_ids"]
+    assign(client, first, clinic["doctor_id"])
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.post("/api/appointments/admin", headers=headers, json={
+        "date": clinic["monday"].replace(hour=9, minute=5).isoformat(), "doctor_id": clinic["doctor_id"]
+    })
+    assert response.status_code == 409
+    assert "already booked" in response.json()["detail"]
+
+    response = client.post("/api/appointments/admin", headers=headers, json={
+        "date": clinic["monday"].replace(hour=11).isoformat(), "doctor_id": clinic["doctor_id"]
+    })
+    assert response.status_code == 201
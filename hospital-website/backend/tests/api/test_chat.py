@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+
+import httpx
+import openai
+import pytest
+from fastapi import HTTPException
+
+from app import chat_cache, chat_provider
+from app.chat_provider import ChatProvider, get_chat_provider
+from app.main import app
+
+MESSAGES = {"messages": [{"role": "user", "content": "Hello there"}]}
+
+class TimeoutProvider(ChatProvider):
+    """An upstream that never answers in time"""
+
+    def _timeout(self):
+        return openai.APITimeoutError(request=httpx.Request("POST", "http://stub/v1/chat/completions"))
+
+    async def complete(self, messages):
+        raise self._timeout()
+
+    async def stream(self, messages):
+        raise self._timeout()
+        yield
+
+@pytest.fixture
+def timeout_provider():
+    provider = TimeoutProvider()
+    app.dependency_overrides[get_chat_provider] = lambda: provider
+    yield provider
+    app.dependency_overrides.pop(get_chat_provider, None)
+
+def test_chat_returns_completion(client, stub_provider):
+    response = client.post("/api/chat", json=MESSAGES)
+    assert response.status_code == 200
+    assert response.json()["message"].startswith("Stub reply to: Hello there")
+
+def test_chat_stream_sends_tokens_as_events(client, stub_provider):
+    with client.stream("POST", "/api/chat/stream", json=MESSAGES) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line for line in response.iter_lines() if line]
+
+    data = [json.loads(line[len("data: "):]) for line in events if line.startswith("data: ")]
+    tokens = [event["token"] for event in data if "token" in event]
+    assert len(tokens) == 5
+    assert "".join(tokens).startswith("Stub reply to:")
+    assert "event: done" in events
+
+def test_repeated_question_is_served_from_cache(client, stub_provider):
+    first = client.post("/api/chat", json=MESSAGES).json()["message"]
+    before = chat_cache.get_metrics()
+
+    again = {"messages": [{"role": "user", "content": "  hello   THERE? "}]}
+    assert client.post("/api/chat", json=again).json()["message"] == first
+    with client.stream("POST", "/api/chat/stream", json=again) as response:
+        events = [line for line in response.iter_lines() if line]
+    assert events[0] == f"data: {json.dumps({'token': first})}"
+
+    metrics = chat_cache.get_metrics()
+    assert metrics["upstream_calls"] == before["upstream_calls"]
+    assert metrics["saved_upstream_calls"] - before["saved_upstream_calls"] == 2
+
+async def test_concurrent_chats_do_not_block_each_other(db_session, stub_provider):
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.post("/api/chat", json={"messages": [{"role": "user", "content": f"Question {i}"}]})
+            for i in range(10)
+        ])
+        elapsed = time.perf_counter() - start
+
+    assert all(response.status_code == 200 for response in responses)
+    # Ten 200 ms upstream calls overlap instead of running one after another
+    assert elapsed < 1.0
+
+async def test_limit_rejects_when_all_slots_are_busy(monkeypatch):
+    monkeypatch.setattr(chat_provider, "CHAT_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(chat_provider, "CHAT_QUEUE_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(chat_provider, "_semaphore", None)
+
+    async with chat_provider.limit():
+        with pytest.raises(HTTPException) as excinfo:
+            async with chat_provider.limit():
+                pass
+    assert excinfo.value.status_code == 503
+
+    # The slot is free again once the first call finishes
+    async with chat_provider.limit():
+        pass
+    monkeypatch.setattr(chat_provider, "_semaphore", None)
+
+async def test_stream_releases_slot_when_body_is_never_read(monkeypatch, stub_provider):
+    from app.routers.chat import ChatRequest, stream_chat
+
+    monkeypatch.setattr(chat_provider, "CHAT_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(chat_provider, "_semaphore", None)
+
+    # The client goes away before the body is iterated: only the response's
+    # background task runs
+    response = await stream_chat(ChatRequest(**MESSAGES), stub_provider)
+    assert chat_provider.get_metrics()["in_flight"] == 1
+    await response.background()
+    assert chat_provider.get_metrics()["in_flight"] == 0
+
+    async with chat_provider.limit():
+        pass
+    monkeypatch.setattr(chat_provider, "_semaphore", None)
+
+def test_upstream_timeouts_are_counted(client, timeout_provider):
+    before = chat_provider.get_metrics()["timeouts"]
+
+    response = client.post("/api/chat", json=MESSAGES)
+    assert response.status_code == 504
+    with client.stream("POST", "/api/chat/stream", json={"messages": [{"role": "user", "content": "Other"}]}) as response:
+        events = [line for line in response.iter_lines() if line]
+    assert "event: error" in events
+
+    metrics = chat_provider.get_metrics()
+    assert metrics["timeouts"] - before == 2
+    assert metrics["in_flight"] == 0
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app import exports, models
+
+@pytest.fixture
+def export_data(db_session, test_user):
+    users = [
+        models.User(email=f"export{i}@test.com", name=f"Export {i}", hashed_password="x",
+                    is_active=i % 2 == 0, created_at=datetime(2024, 1, 1 + i))
+        for i in range(5)
+    ]
+    db_session.add_all(users)
+    db_session.flush()
+    statuses = ["pending", "assigned", "completed", "cancelled", "pending"]
+    db_session.add_all([
+        models.Appointment(user_id=users[i].id, date=datetime(2024, 3, 1 + i, 9), reason=f"Reason {i}", status=status)
+        for i, status in enumerate(statuses)
+    ])
+    db_session.commit()
+
+def auth(admin_token):
+    return {"Authorization": f"Bearer {admin_token}"}
+
+def test_export_requires_admin(client):
+    assert client.get("/api/admin/export/users").status_code == 401
+
+def test_export_users_ndjson(client, admin_token, export_data, monkeypatch):
+    # Several batches, to exercise the server-side cursor
+    monkeypatch.setattr(exports, "EXPORT_BATCH_SIZE", 2)
+    response = client.get("/api/admin/export/users", headers=auth(admin_token))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "attachment" in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 6
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert "hashed_password" not in rows[0]
+
+def test_export_users_filters(client, admin_token, export_data):
+    response = client.get(
+        "/api/admin/export/users",
+        params={"date_from": "2024-01-02T00:00:00", "date_to": "2024-01-05T00:00:00", "is_active": "true"},
+        headers=auth(admin_token)
+    )
+    emails = [json.loads(line)["email"] for line in response.text.splitlines()]
+    assert emails == ["export2@test.com"]
+
+def test_export_appointments_csv(client, admin_token, export_data):
+    response = client.get(
+        "/api/admin/export/appointments",
+        params=[("format", "csv"), ("status", "pending"), ("status", "completed")],
+        headers=auth(admin_token)
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["status"] for row in rows] == ["pending", "completed", "pending"]
+    assert rows[0]["date"] == "2024-03-01T09:00:00"
+    assert rows[0]["doctor_id"] == ""
+
+def test_export_rejects_unknown_format(client, admin_token):
+    response = client.get("/api/admin/export/users", params={"format": "xml"}, headers=auth(admin_token))
+    assert response.status_code == 422
@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from app.middleware import request_metrics
+from app.middleware.request_metrics import LatencyHistogram
+from app.routers import monitoring
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    request_metrics.reset()
+    yield
+    request_metrics.reset()
+
+def sample(text, name, **labels):
+    """Value of one sample in a Prometheus text exposition"""
+    for line in text.splitlines():
+        match = re.match(rf"{name}\{{(.*)\}} (\S+)$", line)
+        if match and all(f'{key}="{value}"' in match.group(1) for key, value in labels.items()):
+            return float(match.group(2))
+    return None
+
+def test_requests_are_counted_per_route_template(client, test_news_article):
+    article_id = test_news_article.id
+    client.get("/api/news/")
+    client.get(f"/api/news/{article_id}")
+    client.get("/api/news/999999")
+    client.get("/no/such/path")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    route = "/api/news/{article_id}"
+    assert sample(text, "http_requests_total", method="GET", route=route, status=200) == 1
+    assert sample(text, "http_requests_total", method="GET", route=route, status=404) == 1
+    assert sample(text, "http_requests_total", method="GET", route="unmatched", status=404) == 1
+    assert sample(text, "http_request_duration_seconds_count", method="GET", route=route) == 2
+    assert sample(text, "http_request_duration_seconds_bucket", method="GET", route=route, le="+Inf") == 2
+    # Subsystem metrics from the registry are exported as gauges too
+    assert "app_response_cache_hits" in text
+
+def test_metrics_token_is_enforced(client, monkeypatch):
+    monkeypatch.setattr(monitoring, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for _ in range(99):
+        histogram.observe(0.002)
+    histogram.observe(3.0)
+    assert histogram.count == 100
+    assert 0.002 <= histogram.percentile(0.50) < 0.003
+    assert 3.0 <= histogram.percentile(1.0) < 4.3
+
+def test_access_log_sampling(monkeypatch):
+    monkeypatch.setattr(request_metrics, "REQUEST_LOG_SAMPLE_RATE", 0.0)
+    assert not request_metrics._should_log(200, 0.01)
+    assert request_metrics._should_log(503, 0.01)
+    assert request_metrics._should_log(200, 2.0)
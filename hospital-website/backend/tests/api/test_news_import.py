@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+
+from sqlalchemy import func, select
+
+from app import models, news_import
+
+def auth(admin_token):
+    return {"Authorization": f"Bearer {admin_token}"}
+
+def article(i, **fields):
+    return {
+        "title": f"Imported {i}", "summary": "S", "content": "C", "category": "Health",
+        "image_url": "i.jpg", **fields
+    }
+
+def ndjson(*rows):
+    return "".join(json.dumps(row) + "\n" for row in rows)
+
+def article_count(db_session):
+    db_session.expire_all()
+    return db_session.scalar(select(func.count()).select_from(models.NewsArticle))
+
+def counters(db_session):
+    counter = models.SiteCounter
+    return dict(db_session.execute(select(counter.name, func.sum(counter.value)).group_by(counter.name)).all())
+
+def test_import_requires_admin(client):
+    response = client.post("/api/admin/news/import", content=ndjson(article(1)))
+    assert response.status_code == 401
+
+def test_import_ndjson(client, admin_token, test_admin, db_session, monkeypatch):
+    # Several COPY chunks in the one transaction
+    monkeypatch.setattr(news_import, "IMPORT_CHUNK_SIZE", 2)
+    rows = [article(i, status="published" if i % 2 else "draft") for i in range(5)]
+    rows[0]["date"] = "2024-05-01T10:00:00+02:00"
+    assert client.get("/api/news/").json() == []  # cached
+    response = client.post(
+        "/api/admin/news/import",
+        content=ndjson(*rows),
+        headers={**auth(admin_token), "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"rows": 5, "imported": 5, "invalid": 0, "errors": []}
+
+    articles = db_session.scalars(select(models.NewsArticle).order_by(models.NewsArticle.id)).all()
+    assert [a.title for a in articles] == [f"Imported {i}" for i in range(5)]
+    assert articles[0].date.isoformat() == "2024-05-01T08:00:00"
+    assert all(a.admin_id == test_admin.id and a.views_count == 0 and a.created_at for a in articles)
+    totals = counters(db_session)
+    assert totals["articles"] == 5
+    assert totals["articles:status:published"] == 2
+    assert totals["articles:category:Health"] == 5
+
+    # The cached public listing was invalidated
+    assert len(client.get("/api/news/").json()) == 2
+
+def test_import_aborts_on_invalid_rows(client, admin_token, db_session):
+    body = ndjson(article(1)) + "not json\n" + ndjson({"title": "No body"}, article(2))
+    response = client.post("/api/admin/news/import", content=body, headers=auth(admin_token))
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == 0 and report["invalid"] == 2
+    assert report["errors"][0]["row"] == 2 and report["errors"][0]["errors"][0].startswith("Invalid JSON")
+    assert report["errors"][1]["row"] == 3
+    assert "summary: Field required" in report["errors"][1]["errors"]
+    assert article_count(db_session) == 0
+
+def test_json_string_row_is_reported_as_not_an_object():
+    [(number, raw)] = news_import.parse_ndjson('"hello"\n')
+    article, error = news_import.validate(number, raw)
+    assert article is None
+    assert error == {"row": 1, "errors": ["Expected an object"]}
+
+def test_import_skips_invalid_rows(client, admin_token, db_session):
+    body = ndjson(article(1), {"title": "No body"}, article(2))
+    response = client.post(
+        "/api/admin/news/import", params={"on_error": "skip"}, content=body, headers=auth(admin_token)
+    )
+    report = response.json()
+    assert (report["rows"], report["imported"], report["invalid"]) == (3, 2, 1)
+    assert article_count(db_session) == 2
+
+def test_import_csv(client, admin_token, db_session):
+    body = (
+        "title,summary,content,category,image_url,status,date\n"
+        'CSV one,S,"Multi\nline",News,a.jpg,published,2024-02-01T09:00:00\n'
+        "CSV two,S,C,News,b.jpg,,\n"
+    )
+    response = client.post(
+        "/api/admin/news/import", content=body,
+        headers={**auth(admin_token), "Content-Type": "text/csv"}
+    )
+    assert response.json()["imported"] == 2
+    first, second = db_session.scalars(select(models.NewsArticle).order_by(models.NewsArticle.id)).all()
+    assert first.content == "Multi\nline"
+    assert second.status == "draft" and second.date is not None
+
+def test_import_rejects_bad_uploads(client, admin_token, monkeypatch):
+    response = client.post(
+        "/api/admin/news/import", params={"format": "csv"}, content=b"", headers=auth(admin_token)
+    )
+    assert response.status_code == 400
+
+    monkeypatch.setattr(news_import, "IMPORT_MAX_BYTES", 100)
+    response = client.post(
+        "/api/admin/news/import", content=ndjson(article(1), article(2)), headers=auth(admin_token)
+    )
+    assert response.status_code == 413
+
+def test_export_round_trips_through_import(client, admin_token, db_session):
+    client.post("/api/admin/news/import", content=ndjson(article(1), article(2, category="News")),
+                headers=auth(admin_token))
+    exported = client.get(
+        "/api/admin/export/news", params={"format": "csv", "category": "News"}, headers=auth(admin_token)
+    )
+    assert exported.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(exported.text)))
+    assert [row["title"] for row in rows] == ["Imported 2"]
+
+    response = client.post(
+        "/api/admin/news/import", content=exported.text,
+        headers={**auth(admin_token), "Content-Type": "text/csv"}
+    )
+    assert response.json()["imported"] == 1
+    assert article_count(db_session) == 3
@@ -0,0 +1,93 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models import NewsArticle
+from app.pagination import encode_cursor
+
+@pytest.fixture
+def published_articles(db_session, test_admin):
+    base = datetime(2024, 1, 1)
+    articles = [
+        NewsArticle(
+            title=f"Article {i}",
+            summary="Summary",
+            content="Content",
+            category="Test",
+            image_url="https://test.com/image.jpg",
+            status="published",
+            admin_id=test_admin.id,
+            # Two articles share each date so the id tie-breaker matters
+            date=base + timedelta(days=i // 2)
+        )
+        for i in range(7)
+    ]
+    db_session.add_all(articles)
+    db_session.commit()
+    return articles
+
+def test_news_cursor_walks_every_article_once(client, published_articles):
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/news/", params=params)
+        assert response.status_code == 200
+        seen.extend(article["id"] for article in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(published_articles)
+    assert len(set(seen)) == len(seen)
+
+def test_news_cursor_is_stable_when_article_is_published_mid_scroll(client, db_session, test_admin, published_articles):
+    admin_id = test_admin.id
+    first = client.get("/api/news/", params={"limit": 3})
+    cursor = first.headers["X-Next-Cursor"]
+
+    db_session.add(NewsArticle(
+        title="Breaking", summary="s", content="c", category="Test",
+        image_url="https://test.com/image.jpg", status="published",
+        admin_id=admin_id, date=datetime(2030, 1, 1)
+    ))
+    db_session.commit()
+
+    second = client.get("/api/news/", params={"limit": 3, "cursor": cursor})
+    first_ids = {article["id"] for article in first.json()}
+    assert not first_ids & {article["id"] for article in second.json()}
+
+def test_offset_mode_still_supported(client, published_articles):
+    response = client.get("/api/news/", params={"skip": 6, "limit": 3})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+def test_admin_news_returns_next_cursor(client, admin_token, published_articles):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    page = client.get("/api/admin/news", params={"limit": 5}, headers=headers).json()
+    assert page["next_cursor"]
+
+    rest = client.get("/api/admin/news", params={"limit": 5, "cursor": page["next_cursor"]}, headers=headers).json()
+    assert len(rest["items"]) == 2
+    assert rest["next_cursor"] is None
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/news/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_cursor_with_malformed_sort_value_is_rejected(client):
+    cursor = encode_cursor("not-a-date", 1)
+    response = client.get("/api/news/", params={"cursor": cursor})
+    assert response.status_code == 400
+
+def test_zero_limit_returns_an_empty_page(client, admin_token, published_articles):
+    response = client.get("/api/news/", params={"limit": 0})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    page = client.get("/api/admin/news", params={"limit": 0}, headers=headers).json()
+    assert page["items"] == []
+    assert page["next_cursor"] is None
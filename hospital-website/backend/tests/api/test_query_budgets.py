@@ -0,0 +1,186 @@
+"""SQL round-trip budgets for every route.
+
+Each entry in ``BUDGETS`` calls one route against a small fixed data set
+and fails if the request runs more statements or commits than budgeted,
+printing the statements it did run. Lower a budget when a route gets
+cheaper; raising one should come with a reason in the review.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app import models
+from app.main import app
+
+@dataclass(frozen=True)
+class Budget:
+    route: str              # "METHOD /path/template", as the router reports it
+    statements: int
+    commits: int
+    status: int = 200
+    auth: Optional[str] = None  # "user" or "admin"
+    json: Optional[dict] = None
+    data: Optional[dict] = None
+    content: Optional[str] = None
+    params: dict = field(default_factory=dict)
+
+# Path parameters and "{...}" strings in bodies are filled from the ``world`` fixture
+BUDGETS = [
+    # Public news
+    Budget("GET /api/news/", 1, 0),
+    Budget("GET /api/news/{article_id}", 1, 0),
+    Budget("POST /api/news/", 0, 0, status=401, json={
+        "title": "T", "summary": "S", "content": "C", "category": "Health", "image_url": "i.jpg"
+    }),
+
+    # Authentication
+    Budget("POST /api/auth/signup", 3, 1, json={
+        "name": "New User", "email": "new@test.com", "password": "newpass123"
+    }),
+    Budget("POST /api/auth/login", 2, 1, data={
+        "username": "testuser@test.com", "password": "testpass123"
+    }),
+    Budget("POST /api/auth/refresh", 2, 1, json={"refresh_token": "{user_refresh_token}"}),
+    Budget("POST /api/auth/logout", 2, 2, auth="user", json={"refresh_token": "{user_refresh_token}"}),
+    Budget("GET /api/auth/me", 1, 0, auth="user"),
+
+    # Appointments
+    Budget("POST /api/appointments/", 2, 1, status=201, auth="user", json={
+        "date": "2030-01-01T09:00:00", "reason": "Checkup"
+    }),
+    Budget("POST /api/appointments/admin", 2, 1, status=201, auth="admin", json={
+        "date": "2030-01-01T09:00:00", "reason": "Checkup"
+    }),
+    Budget("GET /api/appointments/", 1, 0),
+    Budget("GET /api/appointments/pending", 1, 0),
+    Budget("GET /api/appointments/availability", 0, 0, params={"specialty": "General"}),
+    # Booking writes also lock the slot and re-check it (see app.availability.confirm)
+    Budget("POST /api/appointments/{appointment_id}/assign", 3, 1, params={"doctor_id": "{doctor_id}"}),
+    Budget("GET /api/appointments/{appointment_id}", 1, 0),
+    Budget("PUT /api/appointments/{appointment_id}", 1, 1, json={"reason": "Follow-up"}),
+    Budget("PATCH /api/appointments/{appointment_id}", 1, 1, json={"reason": "Follow-up"}),
+    Budget("DELETE /api/appointments/{appointment_id}", 1, 1),
+    Budget("GET /api/appointments/user/appointments", 2, 0, auth="user"),
+    Budget("GET /api/appointments/admin/all", 2, 0, auth="admin"),
+    Budget("POST /api/appointments/admin/auto-assign", 6, 1, auth="admin", json={}),
+
+    # Admin
+    Budget("POST /api/admin/login", 2, 1, json={"username": "testadmin", "password": "testpass123"}),
+    Budget("POST /api/admin/logout", 2, 2, auth="admin", json={"refresh_token": "{admin_refresh_token}"}),
+    Budget("GET /api/admin/news", 3, 0, auth="admin"),
+    Budget("POST /api/admin/news", 3, 1, auth="admin", json={
+        "title": "T", "summary": "S", "content": "C", "category": "Health", "image_url": "i.jpg"
+    }),
+    # Plus one COPY per chunk, sent on the raw driver connection and so not counted
+    Budget("POST /api/admin/news/import", 2, 1, auth="admin", params={"format": "ndjson"}, content=(
+        '{"title": "T1", "summary": "S", "content": "C", "category": "Health", "image_url": "i.jpg"}\n'
+        '{"title": "T2", "summary": "S", "content": "C", "category": "News", "image_url": "i.jpg"}\n'
+    )),
+    Budget("PUT /api/admin/news/{article_id}", 3, 1, auth="admin", json={"title": "Updated"}),
+    Budget("DELETE /api/admin/news/{article_id}", 4, 1, auth="admin"),
+    Budget("GET /api/admin/profile", 1, 0, auth="admin"),
+    Budget("PUT /api/admin/profile", 2, 1, auth="admin", json={"email": "renamed@test.com"}),
+    Budget("GET /api/admin/categories", 2, 0, auth="admin"),
+    Budget("GET /api/admin/statistics", 2, 0, auth="admin"),
+    Budget("GET /api/admin/stats", 2, 0, auth="admin"),
+    Budget("GET /api/admin/export/users", 2, 0, auth="admin", params={"format": "csv"}),
+    Budget("GET /api/admin/export/appointments", 2, 0, auth="admin", params={"status": "pending"}),
+    Budget("GET /api/admin/export/news", 2, 0, auth="admin", params={"format": "csv", "status": "published"}),
+    Budget("GET /api/admin/metrics", 1, 0, auth="admin"),
+    Budget("GET /api/admin/users", 2, 0, auth="admin"),
+    Budget("POST /api/admin/users", 4, 1, auth="admin", json={
+        "name": "Created", "email": "created@test.com", "password": "createdpass123"
+    }),
+    Budget("PUT /api/admin/users/{user_id}", 2, 1, auth="admin", json={"name": "Renamed"}),
+    Budget("PATCH /api/admin/users/{user_id}", 2, 1, auth="admin", json={"name": "Renamed"}),
+    Budget("DELETE /api/admin/users/{user_id}", 7, 1, auth="admin"),
+    Budget("GET /api/admin/admins", 2, 0, auth="admin"),
+    Budget("POST /api/admin/admins", 4, 1, auth="admin", json={
+        "username": "created", "email": "createdadmin@test.com", "password": "createdpass123"
+    }),
+    Budget("PUT /api/admin/admins/{admin_id}", 2, 1, auth="admin", json={"username": "renamed"}),
+    Budget("PATCH /api/admin/admins/{admin_id}", 2, 1, auth="admin", json={"username": "renamed"}),
+    Budget("DELETE /api/admin/admins/{admin_id}", 6, 1, auth="admin"),
+
+    # Chat (against the stub provider) and monitoring
+    Budget("POST /api/chat", 0, 0, json={"messages": [{"role": "user", "content": "Hi"}]}),
+    Budget("POST /api/chat/stream", 0, 0, json={"messages": [{"role": "user", "content": "Hi"}]}),
+    Budget("GET /metrics", 0, 0),
+    Budget("GET /", 0, 0),
+]
+
+def fill(value, world):
+    if isinstance(value, str):
+        return value.format(**world)
+    if isinstance(value, dict):
+        return {key: fill(item, world) for key, item in value.items()}
+    return value
+
+@pytest.fixture
+def world(db_session, test_user, test_user_token, test_admin, admin_token,
+          test_news_article, test_user_refresh_token, admin_refresh_token):
+    """One of everything the routes need, plus a spare user and admin to edit or delete"""
+    doctor = models.Doctor(name="Dr. Budget", specialty="General", email="budget@test.com")
+    spare_user = models.User(email="spare@test.com", name="Spare", hashed_password="x")
+    spare_admin = models.Admin(username="spare", email="spareadmin@test.com", password_hash="x")
+    db_session.add_all([doctor, spare_user, spare_admin])
+    db_session.flush()
+    appointment = models.Appointment(
+        user_id=test_user.id,
+        date=datetime.utcnow() + timedelta(days=1),
+        reason="Checkup",
+        status="pending"
+    )
+    db_session.add(appointment)
+    db_session.commit()
+    return {
+        "article_id": test_news_article.id,
+        "appointment_id": appointment.id,
+        "doctor_id": doctor.id,
+        "user_id": spare_user.id,
+        "admin_id": spare_admin.id,
+        "user_refresh_token": test_user_refresh_token.token,
+        "admin_refresh_token": admin_refresh_token.token,
+        "tokens": {"user": test_user_token, "admin": admin_token},
+    }
+
+def test_every_route_has_a_budget():
+    routes = {
+        f"{method} {route.path}"
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    budgeted = {budget.route for budget in BUDGETS}
+    assert routes - budgeted == set(), "add these routes to BUDGETS"
+    assert budgeted - routes == set(), "these BUDGETS entries no longer match a route"
+
+@pytest.mark.parametrize("budget", BUDGETS, ids=lambda budget: budget.route)
+def test_query_budget(budget, client, world, stub_provider, request_queries):
+    method, template = budget.route.split(" ", 1)
+    headers = {}
+    if budget.auth:
+        headers["Authorization"] = f"Bearer {world['tokens'][budget.auth]}"
+
+    # Server errors are part of what is measured, so they are returned, not
+    # raised. ``client`` has already run startup and installed the overrides.
+    lenient = TestClient(app, raise_server_exceptions=False)
+    response = lenient.request(
+        method,
+        template.format(**world),
+        headers=headers,
+        params=fill(budget.params, world),
+        json=fill(budget.json, world),
+        data=budget.data,
+        content=budget.content,
+    )
+    assert response.status_code == budget.status, response.text
+
+    [(route, log)] = [entry for entry in request_queries if entry[0] == budget.route]
+    assert log.count <= budget.statements and log.commits <= budget.commits, (
+        f"{budget.route}: {log.count} statements (budget {budget.statements}), "
+        f"{log.commits} commits (budget {budget.commits})\n{log.format()}"
+    )
@@ -0,0 +1,87 @@
+from sqlalchemy import event
+from app import response_cache, view_counter
+from app.database import get_db
+from app.main import app
+from tests.conftest import engine
+
+def count_checkouts():
+    counter = {"checkouts": 0}
+
+    def on_checkout(*args):
+        counter["checkouts"] += 1
+
+    event.listen(engine, "checkout", on_checkout)
+    return counter, lambda: event.remove(engine, "checkout", on_checkout)
+
+def test_news_list_hit_skips_database(client, test_news_article):
+    first = client.get("/api/news/")
+    assert first.status_code == 200
+
+    counter, stop = count_checkouts()
+    try:
+        second = client.get("/api/news/")
+    finally:
+        stop()
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert counter["checkouts"] == 0
+
+def test_article_hit_opens_no_session(client, test_news_article):
+    assert client.get(f"/api/news/{test_news_article.id}").status_code == 200
+
+    override = app.dependency_overrides[get_db]
+    opened = []
+
+    def counting_get_db():
+        opened.append(1)
+        yield from override()
+
+    app.dependency_overrides[get_db] = counting_get_db
+    assert client.get(f"/api/news/{test_news_article.id}").status_code == 200
+    assert client.get("/api/news/9999").status_code == 404
+    # Only the miss asked for a session
+    assert len(opened) == 1
+
+def test_admin_update_purges_cached_article(client, admin_token, test_news_article):
+    article_id = test_news_article.id
+    assert client.get(f"/api/news/{article_id}").json()["title"] == "Test Article"
+    assert client.get("/api/news/").json()[0]["title"] == "Test Article"
+
+    response = client.put(
+        f"/api/admin/news/{article_id}",
+        json={"title": "Updated Title"},
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+
+    assert client.get(f"/api/news/{article_id}").json()["title"] == "Updated Title"
+    assert client.get("/api/news/").json()[0]["title"] == "Updated Title"
+
+def test_response_purged_while_being_built_is_not_cached(client, test_news_article):
+    article_id = test_news_article.id
+    override = app.dependency_overrides[get_db]
+    opened = []
+
+    def get_db_then_concurrent_edit():
+        opened.append(1)
+        yield from override()
+        # An admin edit commits after this miss has read the article
+        if len(opened) == 1:
+            response_cache.invalidate_tags(f"news:{article_id}")
+
+    app.dependency_overrides[get_db] = get_db_then_concurrent_edit
+    assert client.get(f"/api/news/{article_id}").status_code == 200
+    assert client.get(f"/api/news/{article_id}").status_code == 200
+    assert client.get(f"/api/news/{article_id}").status_code == 200
+    # The first response was dropped; the second was cached
+    assert len(opened) == 2
+
+def test_cached_article_hits_still_count_views(client, test_news_article):
+    article_id = test_news_article.id
+    for _ in range(3):
+        assert client.get(f"/api/news/{article_id}").status_code == 200
+    assert view_counter.pending_views(article_id) == 3
+
+def test_missing_article_is_not_cached(client):
+    assert client.get("/api/news/9999").status_code == 404
+    assert client.get("/api/news/9999").status_code == 404
@@ -0,0 +1,60 @@
+import logging
+import re
+
+import pytest
+
+from app import server_timing
+from app.middleware import request_metrics
+
+def parse(header):
+    """{name: (duration_ms, desc)} from a Server-Timing header"""
+    metrics = {}
+    for part in header.split(", "):
+        name, *params = part.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        metrics[name] = (float(values["dur"]), values.get("desc"))
+    return metrics
+
+def test_disabled_by_default(client):
+    response = client.get("/api/news/")
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+
+def test_admin_news_breakdown(client, admin_token, test_news_article, monkeypatch):
+    monkeypatch.setattr(server_timing, "SERVER_TIMING", "header")
+    response = client.get(
+        "/api/admin/news",
+        headers={"Authorization": f"Bearer {admin_token}"}
+    )
+    assert response.status_code == 200
+    metrics = parse(response.headers["server-timing"])
+    assert {"auth", "db", "handler", "serialize", "total"} <= set(metrics)
+    assert re.fullmatch(r'"\d+ queries"', metrics["db"][1])
+    assert metrics["handler"][0] <= metrics["total"][0]
+
+def test_timings_are_request_scoped(client, monkeypatch):
+    monkeypatch.setattr(server_timing, "SERVER_TIMING", "header")
+    first = parse(client.get("/api/news/").headers["server-timing"])
+    second = parse(client.get("/api/news/").headers["server-timing"])
+    # The second request is served from the response cache without queries
+    assert "db" in first
+    assert "db" not in second
+    assert server_timing.current() is None
+
+def test_log_fields(client, monkeypatch):
+    monkeypatch.setattr(server_timing, "SERVER_TIMING", "log")
+    monkeypatch.setattr(request_metrics, "REQUEST_LOG_SAMPLE_RATE", 1.0)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    request_metrics.access_logger.addHandler(handler)
+    request_metrics.access_logger.setLevel(logging.INFO)
+    try:
+        response = client.get("/api/news/")
+    finally:
+        request_metrics.access_logger.removeHandler(handler)
+
+    assert "server-timing" not in response.headers
+    timing = records[-1].timing
+    assert timing["db_queries"] >= 1
+    assert timing["total_ms"] >= timing["db_ms"]
@@ -1,14 +1,25 @@
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from app.database import Base, get_db
+import os
+
+# Lazy relationship loads raise in tests (see app.query_counter)
+os.environ.setdefault("SQL_QUERY_CHECK", "strict")
+
+from app import database
+from app.database import AsyncSessionLocal, Base, SessionLocal, get_async_db, get_db
 from app.main import app
 from app.auth_utils import create_access_token
+from app import availability, chat_cache, login_activity, principal_cache, query_counter, response_cache, token_denylist, view_counter
+from app.chat_provider import OpenAIProvider, get_chat_provider
+from benchmarks import stub_llm
 from .utils.create_test_admin import create_test_admin, cleanup_test_admin
-import os
 
 # Load environment variables from .env
 load_dotenv()
@@ -24,9 +35,27 @@ SQLALCHEMY_TEST_DATABASE_URL = (
 
 engine = create_engine(SQLALCHEMY_TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Background jobs (e.g. view count flushes) open their own sessions or connections
+SessionLocal.configure(bind=engine)
+database.engine = engine
+
+# Each TestClient runs the app on its own event loop, so async connections
+# must not be pooled across tests
+async_engine = create_async_engine(
+    SQLALCHEMY_TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1),
+    poolclass=NullPool
+)
+AsyncSessionLocal.configure(bind=async_engine)
 
 @pytest.fixture(scope="function")
 def db_session():
+    principal_cache.clear()
+    chat_cache.clear()
+    response_cache.clear()
+    view_counter.discard_pending()
+    login_activity.discard_pending()
+    availability.reset()
+    token_denylist.reset()
     Base.metadata.create_all(bind=engine)
     db = TestingSessionLocal()
     try:
@@ -35,6 +64,12 @@ def db_session():
         db.close()
         Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture
+async def async_db_session(db_session):
+    """AsyncSession on the test database, for calling async dependencies directly"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 @pytest.fixture(scope="function")
 def client(db_session):
     def override_get_db():
@@ -43,7 +78,12 @@ def client(db_session):
         finally:
             db_session.close()
     
+    async def override_get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -227,4 +267,21 @@ def revoked_refresh_token(db_session, test_user):
     db_session.add(refresh_token)
     db_session.commit()
     db_session.refresh(refresh_token)
-    return refresh_token
\ No newline at end of file
+    return refresh_token
+
+@pytest.fixture
+def stub_provider():
+    """The real OpenAI provider, talking to the in-process stub server"""
+    stub_llm.app.state.latency_ms = 200
+    stub_llm.app.state.tokens = 5
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_llm.app))
+    provider = OpenAIProvider(api_key="test", base_url="http://stub/v1", http_client=http_client)
+    app.dependency_overrides[get_chat_provider] = lambda: provider
+    yield provider
+    app.dependency_overrides.pop(get_chat_provider, None)
+
+@pytest.fixture
+def request_queries():
+    """(route, QueryLog) for every request the app finishes during the test"""
+    with query_counter.observe_requests() as finished:
+        yield finished
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import async_crud, crud, models, schemas
+from app.database import AsyncSessionLocal
+from app.models import Appointment
+
+def add_appointments(db_session, user_id, count, status="pending"):
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        db_session.add(Appointment(
+            user_id=user_id, date=start + timedelta(hours=i), reason=f"Visit {i}", status=status
+        ))
+    db_session.commit()
+
+async def test_appointment_pages_match_sync_crud(db_session, async_db_session, test_user):
+    add_appointments(db_session, test_user.id, 5)
+    add_appointments(db_session, test_user.id, 2, status="assigned")
+
+    expected, _ = crud.get_appointments_page(db_session, limit=100, status="pending")
+
+    cursor, seen = None, []
+    while True:
+        page, cursor = await async_crud.get_appointments_page(
+            async_db_session, limit=2, status="pending", cursor=cursor
+        )
+        seen += [appointment.id for appointment in page]
+        if cursor is None:
+            break
+    assert seen == [appointment.id for appointment in expected]
+    assert len(seen) == 5
+
+async def test_refresh_token_round_trip(db_session, async_db_session, test_user):
+    token = await async_crud.create_refresh_token(async_db_session, test_user.id)
+    assert (await async_crud.get_refresh_token(async_db_session, token.token)).user_id == test_user.id
+
+    revoked = await async_crud.revoke_refresh_token(async_db_session, token.token)
+    assert revoked.is_revoked is True
+    assert crud.get_refresh_token(db_session, token.token).is_revoked is True
+
+async def test_statistics_run_through_the_async_session(db_session, async_db_session, test_user, test_news_article):
+    stats = await async_crud.get_admin_statistics(async_db_session)
+    assert (stats["total_users"], stats["total_articles"]) == (1, 1)
+
+async def test_concurrent_rotations_of_one_token(db_session, test_user_refresh_token):
+    async def rotate():
+        async with AsyncSessionLocal() as db:
+            return await async_crud.rotate_refresh_token(db, test_user_refresh_token.token)
+
+    results = await asyncio.gather(*(rotate() for _ in range(5)))
+    winners = [result for result in results if result is not None]
+    assert len(winners) == 1
+    owner, new_token = winners[0]
+    assert (owner.user_id, owner.admin_id, owner.email) == (test_user_refresh_token.user_id, None, "testuser@test.com")
+
+    db_session.expire_all()
+    tokens = db_session.query(models.RefreshToken).order_by(models.RefreshToken.id).all()
+    assert [(token.token, token.is_revoked) for token in tokens] == [
+        (test_user_refresh_token.token, True), (new_token, False)
+    ]
+    assert tokens[1].expires_at - tokens[1].created_at == async_crud.USER_REFRESH_TOKEN_LIFETIME
+
+async def test_writes_return_populated_rows(db_session, async_db_session, test_user):
+    created = await async_crud.create_appointment(
+        async_db_session, {"user_id": test_user.id, "date": datetime(2030, 1, 7, 9), "reason": "Checkup"}
+    )
+    # created_at is a server default, returned by the INSERT itself
+    assert created.id and created.created_at is not None
+
+    updated = await async_crud.update_appointment(
+        async_db_session, created.id, schemas.AppointmentUpdate(reason="Follow-up")
+    )
+    assert (updated.reason, updated.date, updated.status) == ("Follow-up", datetime(2030, 1, 7, 9), "pending")
+    cancelled = await async_crud.delete_appointment(async_db_session, created.id)
+    assert (cancelled.status, cancelled.reason) == ("cancelled", "Follow-up")
+    db_session.expire_all()
+    assert db_session.get(Appointment, created.id).status == "cancelled"
+
+    with pytest.raises(HTTPException) as error:
+        await async_crud.delete_appointment(async_db_session, 999999)
+    assert error.value.status_code == 404
+    assert await async_crud.update_user(async_db_session, 999999, {"name": "Nobody"}) is None
+    assert await async_crud.revoke_refresh_token(async_db_session, "no-such-token") is None
+
+async def test_conflicting_assignment_is_rolled_back(db_session, async_db_session, test_user):
+    doctor = models.Doctor(name="Dr. A", specialty="General", email="a@test.com")
+    db_session.add(doctor)
+    db_session.commit()
+    monday = datetime.combine(datetime.utcnow().date() + timedelta(days=7 - datetime.utcnow().weekday()),
+                              datetime.min.time()).replace(hour=10)
+    first, second = [
+        await async_crud.create_appointment(
+            async_db_session, {"user_id": test_user.id, "date": monday + timedelta(minutes=minutes), "reason": "Checkup"}
+        )
+        for minutes in (0, 10)
+    ]
+    first_id, second_id = first.id, second.id
+    await async_crud.assign_doctor_to_appointment(async_db_session, first_id, doctor.id)
+    # 10:10 is in the slot 10:00 now holds
+    with pytest.raises(HTTPException) as error:
+        await async_crud.assign_doctor_to_appointment(async_db_session, second_id, doctor.id)
+    assert error.value.status_code == 409
+
+    db_session.expire_all()
+    unchanged = db_session.get(Appointment, second_id)
+    assert (unchanged.doctor_id, unchanged.status) == (None, "pending")
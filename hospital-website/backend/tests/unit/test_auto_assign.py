@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from app import auto_assign, availability, models
+
+def next_monday(hour):
+    today = datetime.utcnow().date()
+    return datetime.combine(today + timedelta(days=7 - today.weekday()), datetime.min.time()).replace(hour=hour)
+
+def add_doctors(db_session, *specialties):
+    doctors = [
+        models.Doctor(name=f"Dr. {i}", specialty=specialty, email=f"dr{i}@test.com")
+        for i, specialty in enumerate(specialties)
+    ]
+    db_session.add_all(doctors)
+    db_session.commit()
+    availability.ensure_loaded()
+    return [doctor.id for doctor in doctors]
+
+def test_specialty_for():
+    assert auto_assign.specialty_for("Chest pain") == "Cardiology"
+    assert auto_assign.specialty_for("Skin rash") == "Dermatology"
+    assert auto_assign.specialty_for("General checkup") == "General"
+    assert auto_assign.specialty_for(None) == "General"
+
+def test_plan_balances_load_and_avoids_double_booking(db_session):
+    first, second, general = add_doctors(db_session, "Cardiology", "Cardiology", "General")
+    nine, ten = next_monday(9), next_monday(10)
+    pending = [(1, nine, "Chest pain"), (2, nine, "Chest pain"), (3, nine, "Chest pain"),
+               (4, ten, "Chest pain"), (5, ten, "Chest pain")]
+    assignments, skipped = auto_assign.plan(pending, loads={first: 5})
+
+    assert skipped == []
+    # Least loaded first; the third 09:00 case overflows to the general practitioner
+    assert [(a.appointment_id, a.doctor_id, a.specialty) for a in assignments] == [
+        (1, second, "Cardiology"), (2, first, "Cardiology"), (3, general, "General"),
+        (4, second, "Cardiology"), (5, first, "Cardiology"),
+    ]
+
+    # Restricted to one specialty there is no overflow
+    assignments, skipped = auto_assign.plan(pending[:3], loads={}, specialty="Cardiology")
+    assert len(assignments) == 2
+    assert skipped == [auto_assign.Skipped(3, f"No Cardiology doctor free at {nine:%Y-%m-%d %H:%M}")]
+
+def test_plan_falls_back_to_general_and_respects_hours(db_session):
+    general, = add_doctors(db_session, "General")
+    monday = next_monday(9)
+    assignments, skipped = auto_assign.plan(
+        [(1, monday, "Headache"), (2, monday.replace(hour=22), "Fever")], loads={}
+    )
+    assert [(a.appointment_id, a.doctor_id, a.specialty) for a in assignments] == [(1, general, "General")]
+    assert skipped[0].appointment_id == 2
+
+def test_plan_for_one_specialty(db_session):
+    add_doctors(db_session, "General")
+    assignments, skipped = auto_assign.plan([(1, next_monday(9), "Fever")], loads={}, specialty="Urology")
+    assert assignments == [] and skipped == [auto_assign.Skipped(1, "No Urology doctors")]
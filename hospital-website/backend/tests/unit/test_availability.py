@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import availability, models
+
+def next_monday(hour=0, minute=0):
+    today = datetime.utcnow().date()
+    monday = today + timedelta(days=7 - today.weekday())
+    return datetime.combine(monday, datetime.min.time()).replace(hour=hour, minute=minute)
+
+@pytest.fixture
+def doctors(db_session):
+    rows = [
+        models.Doctor(name="Dr. A", specialty="Cardiology", email="a@test.com"),
+        models.Doctor(name="Dr. B", specialty="cardiology", email="b@test.com",
+                      schedule={"monday": ["14:00-15:00"]}),
+        models.Doctor(name="Dr. C", specialty="Dermatology", email="c@test.com"),
+    ]
+    db_session.add_all(rows)
+    db_session.commit()
+    return rows
+
+def book(db_session, doctor, when, status="assigned"):
+    appointment = models.Appointment(date=when, reason="Checkup", status=status, doctor_id=doctor.id)
+    db_session.add(appointment)
+    db_session.commit()
+    return appointment
+
+def test_parse_schedule():
+    masks = availability.parse_schedule({"monday": ["09:00-10:00", "13:15-14:00"], "sunday": ["23:30-24:00"]})
+    # 30 minute slots; 13:15-13:30 is only part of a slot
+    assert masks[0] == (1 << 18) | (1 << 19) | (1 << 27)
+    assert masks[6] == 1 << 47
+    assert masks[1:6] == (0,) * 5
+    with pytest.raises(ValueError):
+        availability.parse_schedule({"monday": ["09:00-25:00"]})
+
+def test_next_free_slots_by_specialty(db_session, doctors):
+    dr_a, dr_b, _ = doctors
+    monday = next_monday()
+    book(db_session, dr_a, monday.replace(hour=9))
+    book(db_session, dr_a, monday.replace(hour=9, minute=40))  # books the 09:30 slot
+    availability.ensure_loaded()
+
+    slots = availability.next_free_slots("CARDIOLOGY", 3, after=monday)
+    assert [(slot["doctor_id"], slot["start"].strftime("%H:%M")) for slot in slots] == [
+        (dr_a.id, "10:00"), (dr_a.id, "10:30"), (dr_a.id, "11:00")
+    ]
+    assert slots[0]["end"] - slots[0]["start"] == timedelta(minutes=30)
+
+    # Dr. B only works Monday 14:00-15:00; both doctors are free then
+    slots = availability.next_free_slots("cardiology", 3, after=monday.replace(hour=14))
+    assert [(slot["doctor_id"], slot["start"].hour) for slot in slots] == [
+        (dr_a.id, 14), (dr_b.id, 14), (dr_a.id, 14)
+    ]
+    assert slots[2]["start"].minute == 30
+    assert availability.next_free_slots("Neurology", 3) == []
+
+def test_follows_committed_changes(db_session, doctors):
+    dr_a = doctors[0]
+    monday = next_monday()
+    availability.ensure_loaded()
+    builds = availability.get_metrics()["builds"]
+
+    def first_free():
+        return availability.next_free_slots("Cardiology", 1, after=monday)[0]["start"].strftime("%H:%M")
+
+    appointment = book(db_session, dr_a, monday.replace(hour=9))
+    assert first_free() == "09:30"
+    appointment.status = "cancelled"
+    db_session.commit()
+    assert first_free() == "09:00"
+
+    # Rolled back changes never reach the index
+    appointment.status = "assigned"
+    db_session.flush()
+    db_session.rollback()
+    assert first_free() == "09:00"
+
+    db_session.add(models.Doctor(name="Dr. D", specialty="Neurology", email="d@test.com"))
+    db_session.commit()
+    assert availability.next_free_slots("Neurology", 1, after=monday)[0]["doctor_name"] == "Dr. D"
+    # All of the above without reloading from the database
+    assert availability.get_metrics()["builds"] == builds
+
+def test_claim_rejects_booked_and_claimed_slots(db_session, doctors):
+    dr_a = doctors[0]
+    monday = next_monday(9)
+    booked = book(db_session, dr_a, monday)
+    availability.ensure_loaded()
+
+    # The appointment may claim its own slot again; others may not
+    availability.claim(db_session, dr_a.id, monday, booked.id)
+    db_session.rollback()
+    with pytest.raises(HTTPException) as error:
+        availability.claim(db_session, dr_a.id, monday + timedelta(minutes=10))
+    assert error.value.status_code == 409
+
+    availability.claim(_Session(), dr_a.id, monday.replace(hour=11))
+    with pytest.raises(HTTPException):
+        availability.claim(_Session(), dr_a.id, monday.replace(hour=11))
+    # A claimed slot is not offered as free
+    slots = availability.next_free_slots("Cardiology", 2, after=monday)
+    assert [slot["start"].strftime("%H:%M") for slot in slots] == ["09:30", "10:00"]
+    assert availability.next_free_slots("Cardiology", 4, after=monday)[-1]["start"].hour == 11
+
+def test_claim_released_on_rollback(db_session, doctors):
+    dr_a = doctors[0]
+    monday = next_monday(9)
+    availability.ensure_loaded()
+    db_session.connection()
+    availability.claim(db_session, dr_a.id, monday)
+    db_session.rollback()
+    assert availability.get_metrics()["pending_claims"] == 0
+    assert availability.next_free_slots("Cardiology", 1, after=monday)[0]["start"] == monday
+
+def test_rebuild_keeps_changes_made_while_loading(db_session, doctors, monkeypatch):
+    dr_a = doctors[0]
+    monday = next_monday(9)
+    availability.ensure_loaded()
+    load = availability._load
+
+    def load_then_commit_elsewhere(db):
+        index = load(db)
+        # Committed after the rebuild's snapshot was read
+        book(db_session, dr_a, monday)
+        return index
+
+    monkeypatch.setattr(availability, "_load", load_then_commit_elsewhere)
+    availability.rebuild()
+    assert availability.next_free_slots("Cardiology", 1, after=monday)[0]["start"] == monday.replace(minute=30)
+
+class _Session:
+    """Stand-in for a second session: only ``info`` is used by claims"""
+
+    def __init__(self):
+        self.info = {}
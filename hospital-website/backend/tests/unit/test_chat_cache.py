@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app import chat_cache
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    chat_cache.clear()
+    yield
+    chat_cache.clear()
+
+def conversation(question, system="You are helpful."):
+    return [{"role": "system", "content": system}, {"role": "user", "content": question}]
+
+def test_key_ignores_case_spacing_and_trailing_punctuation():
+    key = chat_cache.cache_key(conversation("What are the visiting hours?"))
+    assert chat_cache.cache_key(conversation("  what are the   VISITING hours ")) == key
+    assert chat_cache.cache_key(conversation("What are the parking rates?")) != key
+    assert chat_cache.cache_key(conversation("What are the visiting hours?", system="Other")) != key
+
+def test_key_covers_only_the_conversation_tail(monkeypatch):
+    monkeypatch.setattr(chat_cache, "CHAT_CACHE_TAIL_MESSAGES", 1)
+    early = conversation("Hi") + [{"role": "assistant", "content": "Hello"}]
+    late = conversation("Something else") + [{"role": "assistant", "content": "Hello"}]
+    question = {"role": "user", "content": "Where do I park?"}
+    assert chat_cache.cache_key(early + [question]) == chat_cache.cache_key(late + [question])
+
+async def test_concurrent_identical_prompts_share_one_call():
+    calls = 0
+
+    async def complete():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "Visiting hours are 9am to 8pm."
+
+    before = chat_cache.get_metrics()
+    replies = await asyncio.gather(*[
+        chat_cache.get_or_complete(conversation("Visiting hours?"), complete) for _ in range(10)
+    ])
+    assert calls == 1
+    assert set(replies) == {"Visiting hours are 9am to 8pm."}
+
+    # Later requests are plain cache hits
+    await chat_cache.get_or_complete(conversation("visiting hours"), complete)
+    assert calls == 1
+    metrics = chat_cache.get_metrics()
+    assert metrics["saved_upstream_calls"] - before["saved_upstream_calls"] == 10
+    assert metrics["in_flight"] == 0
+
+async def test_failures_are_shared_but_not_cached():
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *[chat_cache.get_or_complete(conversation("Parking?"), failing) for _ in range(3)],
+        return_exceptions=True
+    )
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def working():
+        return "Parking is free."
+    assert await chat_cache.get_or_complete(conversation("Parking?"), working) == "Parking is free."
+
+async def test_caller_cancellation_does_not_cancel_shared_call():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.ensure_future(chat_cache.get_or_complete(conversation("Slow?"), slow))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(chat_cache.get_or_complete(conversation("Slow?"), slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "done"
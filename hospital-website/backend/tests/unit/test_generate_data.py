@@ -0,0 +1,47 @@
+from sqlalchemy import func, select, text
+
+from app import models
+from benchmarks import generate_data
+
+PLAN = {
+    "seed": 7,
+    "password_hash": "x",
+    "ids": {"users": (1, 100), "doctors": (1, 5), "admins": (1, 2)},
+    "tables": {"appointments": {"total_rows": 250, "chunk_size": 100, "id_offset": 0}},
+}
+
+def test_chunks_are_deterministic():
+    spec = generate_data.SPECS["appointments"]
+    first, count = generate_data.generate_chunk(spec, 1, PLAN)
+    again, _ = generate_data.generate_chunk(spec, 1, PLAN)
+    other_seed, _ = generate_data.generate_chunk(spec, 1, {**PLAN, "seed": 8})
+    assert count == 100
+    assert first == again
+    assert first != other_seed
+    # The last chunk holds the remainder
+    assert generate_data.generate_chunk(spec, 2, PLAN)[1] == 50
+
+def test_generate_is_idempotent(db_session, monkeypatch):
+    monkeypatch.setattr(generate_data, "VOLUMES", {
+        "users": 30, "doctors": 3, "admins": 2, "appointments": 120, "news_articles": 10, "refresh_tokens": 50
+    })
+    url = db_session.get_bind().url.render_as_string(hide_password=False)
+    try:
+        generate_data.generate(url, seed=3, chunk_size=40)
+        generate_data.generate(url, seed=3, chunk_size=40)
+
+        assert db_session.scalar(select(func.count()).select_from(models.User)) == 30
+        assert db_session.scalar(select(func.count()).select_from(models.Appointment)) == 120
+        assert db_session.scalar(select(func.count()).select_from(models.RefreshToken)) == 50
+        chunks = db_session.scalar(text("SELECT count(*) FROM synthetic_data_chunks"))
+        assert chunks == 1 + 1 + 1 + 3 + 1 + 2
+        # Sequences continue after the generated ids
+        db_session.add(models.Doctor(name="Dr. New", specialty="General", email="new@example.com"))
+        db_session.commit()
+        counters = dict(db_session.execute(select(models.SiteCounter.name, models.SiteCounter.value)).all())
+        assert counters["users"] == 30
+        assert counters["articles"] == 10
+    finally:
+        db_session.rollback()
+        generate_data.reset(db_session.get_bind())
+    assert db_session.scalar(select(func.count()).select_from(models.Appointment)) == 0
@@ -0,0 +1,105 @@
+import pytest
+from datetime import datetime, timedelta
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql
+from app.database import Base
+from app.models import Appointment, NewsArticle, PasswordResetToken, RefreshToken
+from tests.conftest import engine
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+@pytest.fixture
+def populated_db(db_session, test_admin, test_user):
+    now = datetime.utcnow()
+    db_session.add_all([
+        NewsArticle(
+            title=f"Article {i}", summary="s", content="c", category="Test",
+            image_url="https://test.com/image.jpg",
+            status="published" if i % 4 else "draft",
+            admin_id=test_admin.id, date=now - timedelta(hours=i)
+        )
+        for i in range(200)
+    ])
+    db_session.add_all([
+        Appointment(
+            date=now + timedelta(hours=i), reason="Checkup",
+            status="pending" if i % 10 == 0 else "assigned",
+            user_id=test_user.id if i % 50 == 0 else None
+        )
+        for i in range(200)
+    ])
+    db_session.add_all([
+        RefreshToken(token=f"token-{i}", user_id=test_user.id if i % 50 == 0 else None,
+                     expires_at=now + timedelta(days=i - 100))
+        for i in range(200)
+    ])
+    db_session.add_all([
+        PasswordResetToken(email=f"user{i}@test.com", token=f"reset-{i}",
+                           expires_at=now + timedelta(hours=1))
+        for i in range(200)
+    ])
+    db_session.commit()
+    db_session.execute(text("ANALYZE"))
+    # The tables are tiny, so make sequential scans unattractive to the planner
+    db_session.execute(text("SET enable_seqscan = off"))
+    yield db_session
+    db_session.execute(text("RESET enable_seqscan"))
+
+def plan(db, query) -> str:
+    sql = query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    return "\n".join(row[0] for row in db.execute(text(f"EXPLAIN {sql}")))
+
+def test_published_news_listing_uses_partial_index(populated_db):
+    query = populated_db.query(NewsArticle)\
+        .filter(NewsArticle.status == "published")\
+        .order_by(NewsArticle.date.desc(), NewsArticle.id.desc())\
+        .limit(7)
+    assert "ix_news_articles_published_date_id" in plan(populated_db, query)
+
+def test_pending_appointments_use_partial_index(populated_db):
+    query = populated_db.query(Appointment)\
+        .filter(Appointment.status == "pending")\
+        .order_by(Appointment.date, Appointment.id)\
+        .limit(101)
+    assert "ix_appointments_pending_date_id" in plan(populated_db, query)
+
+def test_user_appointments_use_user_index(populated_db, test_user):
+    query = populated_db.query(Appointment).filter(Appointment.user_id == test_user.id)
+    assert "ix_appointments_user_id" in plan(populated_db, query)
+
+def test_refresh_token_lookups_use_indexes(populated_db, test_user):
+    by_user = populated_db.query(RefreshToken).filter(RefreshToken.user_id == test_user.id)
+    assert "ix_refresh_tokens_user_id" in plan(populated_db, by_user)
+
+    expired = populated_db.query(RefreshToken).filter(RefreshToken.expires_at < datetime(2000, 1, 1))
+    assert "ix_refresh_tokens_expires_at" in plan(populated_db, expired)
+
+def test_token_purge_batches_use_indexes(populated_db):
+    cutoff = datetime(2000, 1, 1)
+    revoked = populated_db.query(RefreshToken).filter(RefreshToken.is_revoked, RefreshToken.revoked_at < cutoff)
+    assert "ix_refresh_tokens_revoked_at" in plan(populated_db, revoked)
+    expired = populated_db.query(PasswordResetToken).filter(PasswordResetToken.expires_at < cutoff)
+    assert "ix_password_reset_tokens_expires_at" in plan(populated_db, expired)
+
+def test_password_reset_lookup_uses_email_index(populated_db):
+    query = populated_db.query(PasswordResetToken).filter(PasswordResetToken.email == "user7@test.com")
+    assert "ix_password_reset_tokens_email" in plan(populated_db, query)
+
+def test_migrations_create_the_indexes():
+    Base.metadata.drop_all(bind=engine)
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    config.set_main_option("sqlalchemy.url", engine.url.render_as_string(hide_password=False))
+    command.upgrade(config, "head")
+    try:
+        indexes = {index["name"] for index in inspect(engine).get_indexes("appointments")}
+        assert {"ix_appointments_pending_date_id", "ix_appointments_user_id"} <= indexes
+        indexes = {index["name"] for index in inspect(engine).get_indexes("news_articles")}
+        assert "ix_news_articles_published_date_id" in indexes
+    finally:
+        command.downgrade(config, "base")
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
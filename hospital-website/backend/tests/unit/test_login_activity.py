@@ -0,0 +1,76 @@
+import random
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app import login_activity
+from app.models import Admin, User
+
+def last_logins(db, model):
+    db.expire_all()
+    return dict(db.execute(select(model.id, model.last_login)).all())
+
+def add_users(db, count):
+    users = [User(email=f"user{i}@test.com", name=f"User {i}", hashed_password="x") for i in range(count)]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+def test_flush_writes_the_latest_login_per_account(db_session, test_user, test_admin):
+    start = datetime(2024, 12, 1, 9)
+    login_activity.record_login("user", test_user.id, start)
+    login_activity.record_login("user", test_user.id, start + timedelta(minutes=5))
+    login_activity.record_login("user", test_user.id, start + timedelta(minutes=1))
+    login_activity.record_login("admin", test_admin.id, start)
+    assert last_logins(db_session, User)[test_user.id] is None
+
+    assert login_activity.flush(db_session) == 2
+    assert last_logins(db_session, User)[test_user.id] == start + timedelta(minutes=5)
+    assert last_logins(db_session, Admin)[test_admin.id] == start
+    assert login_activity.get_metrics()["pending"] == 0
+    assert login_activity.flush(db_session) == 0
+
+def test_an_older_flush_never_overwrites_a_newer_login(db_session, test_user):
+    """Another worker may flush an earlier login of the same user after us"""
+    start = datetime(2024, 12, 1, 9)
+    login_activity.record_login("user", test_user.id, start + timedelta(minutes=5))
+    login_activity.flush(db_session)
+    login_activity.record_login("user", test_user.id, start)
+    login_activity.flush(db_session)
+    assert last_logins(db_session, User)[test_user.id] == start + timedelta(minutes=5)
+
+def test_no_login_is_lost_under_concurrency(db_session):
+    user_ids = add_users(db_session, 50)
+    start = datetime(2024, 12, 1, 9)
+    expected = {}
+    expected_lock = threading.Lock()
+    done = threading.Event()
+
+    def logins(seed):
+        rng = random.Random(seed)
+        for _ in range(400):
+            user_id = rng.choice(user_ids)
+            when = start + timedelta(seconds=rng.randrange(100000))
+            login_activity.record_login("user", user_id, when)
+            with expected_lock:
+                expected[user_id] = max(expected.get(user_id, when), when)
+
+    def flusher():
+        while not done.is_set():
+            login_activity.flush()
+
+    flushing = threading.Thread(target=flusher)
+    flushing.start()
+    workers = [threading.Thread(target=logins, args=(seed,)) for seed in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    done.set()
+    flushing.join()
+    login_activity.flush()
+
+    stored = last_logins(db_session, User)
+    assert {user_id: stored[user_id] for user_id in expected} == expected
+    assert login_activity.get_metrics()["flushes"] > 1
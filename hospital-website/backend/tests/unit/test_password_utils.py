@@ -0,0 +1,28 @@
+import pytest
+from fastapi import HTTPException
+from app import password_utils
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_async():
+    hashed = await password_utils.hash_password_async("testpass123")
+    assert hashed != "testpass123"
+    assert await password_utils.verify_password_async("testpass123", hashed)
+    assert not await password_utils.verify_password_async("wrongpass", hashed)
+    # Hashes produced in the pool are interchangeable with the sync helpers
+    assert password_utils.verify_password("testpass123", hashed)
+
+@pytest.mark.asyncio
+async def test_metrics_track_completed_jobs():
+    before = password_utils.get_metrics()["completed"]
+    await password_utils.hash_password_async("testpass123")
+    metrics = password_utils.get_metrics()
+    assert metrics["completed"] == before + 1
+    assert metrics["queue_depth"] == 0
+    assert metrics["latency_ms_max"] > 0
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_503(monkeypatch):
+    monkeypatch.setattr(password_utils, "PASSWORD_HASH_MAX_QUEUE", 0)
+    with pytest.raises(HTTPException) as exc_info:
+        await password_utils.hash_password_async("testpass123")
+    assert exc_info.value.status_code == 503
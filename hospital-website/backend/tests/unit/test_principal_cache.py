@@ -0,0 +1,57 @@
+import pytest
+from app import crud, principal_cache
+from app.auth_utils import get_current_user, get_current_admin
+from app.database import AsyncSessionLocal
+from app.models import User
+
+@pytest.mark.asyncio
+async def test_repeated_token_hits_cache(db_session, async_db_session, test_user, test_user_token):
+    first = await get_current_user(test_user_token, async_db_session)
+    misses = principal_cache.get_metrics()["misses"]
+    hits = principal_cache.get_metrics()["hits"]
+
+    second = await get_current_user(test_user_token, async_db_session)
+    assert second is first
+    assert second.email == test_user.email
+    assert principal_cache.get_metrics()["hits"] == hits + 1
+    assert principal_cache.get_metrics()["misses"] == misses
+
+@pytest.mark.asyncio
+async def test_snapshot_is_read_only(db_session, async_db_session, test_user, test_user_token):
+    principal = await get_current_user(test_user_token, async_db_session)
+    with pytest.raises(AttributeError):
+        principal.name = "Changed"
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_cached_principal(db_session, async_db_session, test_user, test_user_token):
+    await get_current_user(test_user_token, async_db_session)
+    crud.update_user(db_session, test_user.id, {"name": "Renamed User"})
+
+    # A fresh session, so the lookup cannot be answered from the identity map
+    async with AsyncSessionLocal() as db:
+        principal = await get_current_user(test_user_token, db)
+    assert principal.name == "Renamed User"
+
+@pytest.mark.asyncio
+async def test_update_admin_invalidates_cached_principal(db_session, async_db_session, test_admin, admin_token):
+    await get_current_admin(admin_token, async_db_session)
+    crud.update_admin(db_session, test_admin.id, {"is_active": False})
+
+    async with AsyncSessionLocal() as db:
+        principal = await get_current_admin(admin_token, db)
+    assert principal.is_active is False
+
+def test_store_after_concurrent_invalidation_is_dropped():
+    user = User(id=4242, email="race@test.com", name="Before", hashed_password="x", is_active=True)
+    claims = {"sub": user.email}
+
+    generation = principal_cache.generation()
+    # The row was loaded, then an update committed and invalidated it
+    principal_cache.invalidate_user(user.id)
+    principal = principal_cache.store("user", "raced-token", claims, user, generation)
+    assert principal.name == "Before"
+    assert principal_cache.lookup("user", "raced-token") is None
+
+    principal_cache.store("user", "raced-token", claims, user, principal_cache.generation())
+    assert principal_cache.lookup("user", "raced-token") is not None
+    principal_cache.invalidate_user(user.id)
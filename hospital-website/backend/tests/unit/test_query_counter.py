@@ -0,0 +1,68 @@
+import logging
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+
+from app import crud, models, query_counter
+
+def make_users(db_session, count):
+    users = [
+        models.User(email=f"n{i}@example.com", name=f"User {i}", hashed_password="x")
+        for i in range(count)
+    ]
+    db_session.add_all(users)
+    db_session.commit()
+    return [user.id for user in users]
+
+def test_capture_counts_statements(db_session):
+    user_ids = make_users(db_session, 2)
+    db_session.expunge_all()
+    with query_counter.capture() as log:
+        crud.get_user(db_session, user_ids[0])
+        crud.get_user(db_session, user_ids[1])
+    assert log.count == 2
+    assert log.seconds > 0
+    # Two runs are below the default threshold
+    assert log.repeated() == []
+    assert "FROM users" in log.format()
+
+def test_repeated_statement_with_different_parameters_is_flagged(db_session):
+    user_ids = make_users(db_session, 4)
+    db_session.expunge_all()
+    with query_counter.capture() as log:
+        for user_id in user_ids:
+            crud.get_user(db_session, user_id)
+    [(statement, times)] = log.repeated()
+    assert times == 4
+    assert "FROM users" in statement
+
+def test_same_parameters_are_not_flagged(db_session):
+    [user_id] = make_users(db_session, 1)
+    with query_counter.capture() as log:
+        for _ in range(4):
+            db_session.expunge_all()
+            crud.get_user(db_session, user_id)
+    assert log.count == 4
+    assert log.repeated() == []
+
+def test_request_end_warns_in_debug_mode(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(query_counter, "SQL_QUERY_CHECK", "debug")
+    # Running the migrations (alembic's fileConfig) disables existing loggers
+    monkeypatch.setattr(query_counter.logger, "disabled", False)
+    user_ids = make_users(db_session, 3)
+    db_session.expunge_all()
+    token = query_counter.begin()
+    for user_id in user_ids:
+        crud.get_user(db_session, user_id)
+    with caplog.at_level(logging.WARNING, logger="app.query_counter"):
+        query_counter.end(token, "GET /api/users")
+    assert "Possible N+1 in GET /api/users" in caplog.text
+    assert query_counter.current() is None
+
+@pytest.mark.skipif(query_counter.RELATIONSHIP_LOADING != "raise_on_sql", reason="needs SQL_QUERY_CHECK=strict")
+def test_lazy_load_raises_in_strict_mode(db_session, test_news_article):
+    article_id = test_news_article.id
+    db_session.expunge_all()
+    article = db_session.get(models.NewsArticle, article_id)
+    with pytest.raises(InvalidRequestError):
+        article.admin
@@ -0,0 +1,110 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app import crud, schemas, site_counters, view_counter
+from app.models import NewsArticle, SiteCounter
+
+def counters(db):
+    totals = {}
+    for row in db.query(SiteCounter):
+        totals[row.name] = totals.get(row.name, 0) + row.value
+    return {name: value for name, value in totals.items() if value}
+
+def rebuilt(db):
+    incremental = counters(db)
+    site_counters.rebuild(db)
+    return incremental, counters(db)
+
+def article_data(**overrides):
+    data = {
+        "title": "Counted", "summary": "s", "content": "c", "category": "Research",
+        "image_url": "https://test.com/counted.jpg", "status": "draft"
+    }
+    data.update(overrides)
+    return schemas.NewsArticleCreate(**data)
+
+def test_counters_follow_article_lifecycle(db_session, test_admin):
+    article = crud.create_news_article(db_session, article_data(), test_admin.id)
+    stats = crud.get_admin_statistics(db_session)
+    assert (stats["total_articles"], stats["draft_articles"], stats["published_articles"]) == (1, 1, 0)
+    assert stats["articles_by_category"] == {"Research": 1}
+
+    crud.update_news_article(db_session, article.id, {"status": "published", "category": "Events"})
+    stats = crud.get_admin_statistics(db_session)
+    assert (stats["draft_articles"], stats["published_articles"]) == (0, 1)
+    assert stats["articles_by_category"] == {"Events": 1}
+
+    view_counter.record_view(article.id)
+    view_counter.record_view(article.id)
+    view_counter.flush(db_session)
+    assert crud.get_admin_statistics(db_session)["total_views"] == 2
+
+    crud.delete_news_article(db_session, article.id)
+    stats = crud.get_admin_statistics(db_session)
+    assert (stats["total_articles"], stats["published_articles"], stats["total_views"]) == (0, 0, 0)
+    assert stats["articles_by_category"] == {}
+
+def test_views_of_deleted_article_are_not_counted(db_session, test_admin):
+    kept = crud.create_news_article(db_session, article_data(title="Kept"), test_admin.id)
+    deleted = crud.create_news_article(db_session, article_data(title="Deleted"), test_admin.id)
+    view_counter.record_view(kept.id)
+    view_counter.record_view(deleted.id)
+    view_counter.record_view(deleted.id)
+    crud.delete_news_article(db_session, deleted.id)
+
+    assert view_counter.flush(db_session) == 1
+    assert view_counter.pending_views() == 0
+    incremental, recomputed = rebuilt(db_session)
+    assert incremental == recomputed
+    assert recomputed["views"] == 1
+
+def test_counters_match_rebuild(db_session, test_admin, test_user, test_news_article):
+    for i in range(5):
+        db_session.add(NewsArticle(
+            title=f"Bulk {i}", summary="s", content="c", category=f"Cat{i % 2}",
+            image_url="https://test.com/bulk.jpg", status="published" if i % 2 else "draft",
+            admin_id=test_admin.id, views_count=i, date=datetime.utcnow()
+        ))
+    db_session.commit()
+    first = db_session.query(NewsArticle).filter(NewsArticle.title == "Bulk 0").one()
+    first.status = "published"
+    db_session.delete(db_session.query(NewsArticle).filter(NewsArticle.title == "Bulk 3").one())
+    db_session.commit()
+    crud.delete_user(db_session, test_user.id)
+
+    incremental, recomputed = rebuilt(db_session)
+    assert incremental == recomputed
+    assert "users" not in recomputed
+
+def test_rolled_back_changes_are_not_counted(db_session, test_admin):
+    db_session.add(NewsArticle(
+        title="Rolled back", summary="s", content="c", category="Research",
+        image_url="https://test.com/x.jpg", status="published", admin_id=test_admin.id,
+        date=datetime.utcnow()
+    ))
+    db_session.flush()
+    db_session.rollback()
+    assert counters(db_session) == {}
+
+def test_stats_route_reads_counters(client, db_session, admin_token, test_user, test_news_article):
+    view_counter.record_view(test_news_article.id)
+    for path in ("/api/admin/stats", "/api/admin/statistics"):
+        response = client.get(path, headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        assert response.json() == {"totalUsers": 1, "totalArticles": 1, "totalViews": 1}
+
+def test_bumps_spread_over_stripes(db_session, monkeypatch):
+    slots = iter([3, 5])
+    monkeypatch.setattr(site_counters.random, "randrange", lambda stripes: next(slots))
+    with db_session.get_bind().connect() as first, db_session.get_bind().connect() as second:
+        # Pooled connections may have picked their slot in an earlier test
+        first.info.pop("site_counter_slot", None)
+        second.info.pop("site_counter_slot", None)
+        for connection in (first, second, first):
+            site_counters.bump(connection, {site_counters.USERS: 1})
+            connection.commit()
+    assert counters(db_session) == {"users": 3}
+    stripes = dict(db_session.execute(text("SELECT slot, value FROM site_counters WHERE name = 'users'")).all())
+    assert stripes == {3: 2, 5: 1}
+    assert site_counters.read(db_session)["total_users"] == 3
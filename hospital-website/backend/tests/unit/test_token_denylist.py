@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from jose import jwt
+
+from app import token_denylist
+from app.auth_utils import ALGORITHM, SECRET_KEY, create_access_token
+from app.models import RevokedToken
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = token_denylist.BloomFilter(1000, 0.01)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300  # ~1% expected
+
+def test_access_tokens_carry_unique_jtis():
+    first, second = (jwt.decode(create_access_token({"sub": "a@test.com"}), SECRET_KEY, algorithms=[ALGORITHM])
+                     for _ in range(2))
+    assert first["jti"] and first["jti"] != second["jti"]
+
+async def test_revoke_applies_at_once(async_db_session):
+    later = datetime.utcnow() + timedelta(minutes=30)
+    await token_denylist.ready()
+    assert not token_denylist.is_revoked("jti-1")
+    await token_denylist.revoke(async_db_session, "jti-1", later)
+    # Revoking twice is harmless
+    await token_denylist.revoke(async_db_session, "jti-1", later)
+    assert token_denylist.is_revoked("jti-1")
+    assert not token_denylist.is_revoked("jti-2")
+    assert not token_denylist.is_revoked(None)
+
+def test_sync_picks_up_other_workers_revocations(db_session):
+    token_denylist.ensure_loaded()
+    builds = token_denylist.get_metrics()["rebuilds"]
+    now = datetime.utcnow()
+    db_session.add_all([
+        RevokedToken(jti="elsewhere", expires_at=now + timedelta(minutes=30), revoked_at=now),
+        RevokedToken(jti="long-expired", expires_at=now - timedelta(minutes=1), revoked_at=now),
+    ])
+    db_session.commit()
+    assert not token_denylist.is_revoked("elsewhere")
+
+    token_denylist.sync()
+    assert token_denylist.is_revoked("elsewhere")
+    assert not token_denylist.is_revoked("long-expired")
+    metrics = token_denylist.get_metrics()
+    assert metrics["rebuilds"] == builds and metrics["syncs"] >= 1
+
+def test_rebuild_drops_expired_and_keeps_live_entries(db_session, monkeypatch):
+    now = datetime.utcnow()
+    db_session.add(RevokedToken(jti="live", expires_at=now + timedelta(minutes=30), revoked_at=now))
+    db_session.commit()
+    token_denylist.ensure_loaded()
+    # Expired since it was loaded
+    token_denylist._add("stale", now - timedelta(seconds=1))
+    assert token_denylist.is_revoked("stale")
+
+    monkeypatch.setattr(token_denylist, "DENYLIST_REBUILD_SECONDS", 0)
+    token_denylist.sync()
+    assert token_denylist.is_revoked("live")
+    assert not token_denylist.is_revoked("stale")
+    assert token_denylist.get_metrics()["entries"] == 1
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from app import token_purge
+from app.models import AdminSession, PasswordResetToken, RefreshToken, UserSession
+from tests.conftest import engine
+
+def count(db, model):
+    return db.scalar(select(func.count()).select_from(model))
+
+def test_purge_deletes_only_dead_rows(db_session, test_user, test_admin):
+    now = datetime.utcnow()
+    long_ago = now - timedelta(days=3)
+    recently = now - timedelta(hours=1)
+    later = now + timedelta(days=1)
+    db_session.add_all(
+        [RefreshToken(token=f"expired-{i}", user_id=test_user.id, expires_at=long_ago) for i in range(25)]
+        + [
+            RefreshToken(token="revoked", user_id=test_user.id, expires_at=later, is_revoked=True, revoked_at=long_ago),
+            # Still within the retention period, so a replay is reported as revoked / expired
+            RefreshToken(token="just-revoked", user_id=test_user.id, expires_at=later, is_revoked=True, revoked_at=recently),
+            RefreshToken(token="just-expired", user_id=test_user.id, expires_at=recently),
+            RefreshToken(token="live", admin_id=test_admin.id, expires_at=later),
+            UserSession(user_id=test_user.id, token="old-session", expires_at=long_ago),
+            UserSession(user_id=test_user.id, token="session", expires_at=later),
+            AdminSession(admin_id=test_admin.id, token="old-admin-session", expires_at=long_ago),
+            PasswordResetToken(email=test_user.email, token="old-reset", expires_at=long_ago),
+            PasswordResetToken(email=test_user.email, token="reset", expires_at=later),
+        ]
+    )
+    db_session.commit()
+
+    deleted = token_purge.purge(batch_size=10, max_rows_per_second=0)
+    assert deleted == {
+        "refresh_tokens_expired": 25,
+        "refresh_tokens_revoked": 1,
+        "user_sessions": 1,
+        "admin_sessions": 1,
+        "password_reset_tokens": 1,
+        "revoked_tokens": 0,
+    }
+    remaining = db_session.scalars(select(RefreshToken.token).order_by(RefreshToken.token)).all()
+    assert remaining == ["just-expired", "just-revoked", "live"]
+    assert db_session.scalars(select(UserSession.token)).all() == ["session"]
+    assert count(db_session, AdminSession) == 0
+    assert db_session.scalars(select(PasswordResetToken.token)).all() == ["reset"]
+
+    metrics = token_purge.get_metrics()
+    assert metrics["last_run_deleted"] == 29
+    assert metrics["deleted_refresh_tokens_expired"] >= 25
+
+def test_purge_stops_after_max_batches(db_session, test_user):
+    expired = datetime.utcnow() - timedelta(days=3)
+    db_session.add_all([RefreshToken(token=f"t-{i}", user_id=test_user.id, expires_at=expired) for i in range(30)])
+    db_session.commit()
+
+    assert token_purge.purge(batch_size=10, max_batches=2, max_rows_per_second=0)["refresh_tokens_expired"] == 20
+    assert count(db_session, RefreshToken) == 10
+    # The next run picks up the rest
+    assert token_purge.purge(batch_size=10, max_batches=2, max_rows_per_second=0)["refresh_tokens_expired"] == 10
+
+def test_purge_skips_while_another_worker_holds_the_lock(db_session, test_user):
+    db_session.add(RefreshToken(token="expired", user_id=test_user.id, expires_at=datetime.utcnow() - timedelta(days=3)))
+    db_session.commit()
+    skipped = token_purge.get_metrics()["skipped_runs"]
+
+    with engine.connect() as other_worker:
+        other_worker.execute(text("SELECT pg_advisory_lock(:key)"), {"key": token_purge.TOKEN_PURGE_LOCK_KEY})
+        assert token_purge.purge() is None
+        other_worker.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": token_purge.TOKEN_PURGE_LOCK_KEY})
+
+    assert token_purge.get_metrics()["skipped_runs"] == skipped + 1
+    assert count(db_session, RefreshToken) == 1
+    assert token_purge.purge()["refresh_tokens_expired"] == 1
@@ -0,0 +1,38 @@
+from app import crud, view_counter
+from app.models import NewsArticle
+
+def test_views_are_buffered_until_flush(db_session, test_news_article):
+    for _ in range(3):
+        crud.get_news_article(db_session, test_news_article.id, increment_views=True)
+
+    db_session.refresh(test_news_article)
+    assert test_news_article.views_count == 0
+    assert view_counter.pending_views(test_news_article.id) == 3
+
+    assert view_counter.flush(db_session) == 3
+    db_session.refresh(test_news_article)
+    assert test_news_article.views_count == 3
+    assert view_counter.pending_views() == 0
+
+def test_statistics_include_pending_views(db_session, test_news_article):
+    crud.get_news_article(db_session, test_news_article.id, increment_views=True)
+    stats = crud.get_admin_statistics(db_session)
+    assert stats["total_views"] == 1
+
+def test_flush_combines_increments_per_article(db_session, test_admin, test_news_article):
+    other = NewsArticle(
+        title="Other", summary="s", content="c", category="Test",
+        image_url="https://test.com/other.jpg", status="published",
+        admin_id=test_admin.id, date=test_news_article.date
+    )
+    db_session.add(other)
+    db_session.commit()
+
+    view_counter.record_view(test_news_article.id)
+    view_counter.record_view(other.id)
+    view_counter.record_view(other.id)
+    view_counter.flush(db_session)
+
+    db_session.refresh(test_news_article)
+    db_session.refresh(other)
+    assert (test_news_article.views_count, other.views_count) == (1, 2)